@@ -0,0 +1,133 @@
+### Batch conversion module
+
+'''
+MIT License
+
+Copyright (c) 2023 Harvey Fong
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+### Converts many usd files with a pool of long lived worker processes
+### each worker imports pxr and initializes the plugin registry once, then converts file after file
+### python oomerusd2bella.py "./library/**/*.usd" -workers 8
+### python oomerusd2bella.py publish.txt  ( one usd path or glob per line, # comments, paths relative to the .txt)
+
+## standard modules
+from pathlib import Path  # used for cross platform file paths
+import glob
+import multiprocessing
+import argparse
+import os
+import time
+import traceback
+
+## oomer modules
+import OomerProgress as oomProgress # no pxr import
+
+usdSuffixes = [ '.usd', '.usdc', '.usda', '.usdz']
+
+### glob or .txt list -> sorted list of unique usd file paths
+def expandInputs( _pattern):
+    patterns = []
+    listFile = Path( _pattern)
+    if listFile.suffix == '.txt' and listFile.is_file():
+        for line in listFile.read_text().splitlines():
+            line = line.strip()
+            if not line or line.startswith( '#'): continue
+            if not Path( line).is_absolute(): line = str( listFile.parent / line)
+            patterns.append( line)
+    else:
+        patterns.append( _pattern)
+    usdFiles = []
+    for pattern in patterns:
+        for match in sorted( glob.glob( pattern, recursive = True)):
+            if Path( match).suffix in usdSuffixes and Path( match).is_file() and match not in usdFiles:
+                usdFiles.append( match)
+    return usdFiles
+
+### worker process globals, set once by initWorker
+workerArgs = False
+workerOpenConverter = False
+
+def initWorker( _args):
+    global workerArgs, workerOpenConverter
+    import OomerConvert as oomConvert ### pxr + numpy import paid once per worker, not once per file
+    from pxr import Usd
+    Usd.Stage.CreateInMemory() ### registers usd file format plugins now instead of inside the first timed file
+    workerArgs = argparse.Namespace( **vars( _args))
+    workerArgs.progress = 'off' ### the parent reports per file, workers only count
+    workerOpenConverter = oomConvert.openConverter
+
+def convertOne( _usdFile):
+    startTime = time.perf_counter()
+    result = { 'file': _usdFile, 'ok': False, 'frames': 0, 'seconds': 0.0, 'error': '', 'pid': os.getpid()}
+    try:
+        converter = workerOpenConverter( _usdFile = Path( _usdFile), _args = workerArgs)
+        converter.writeFrames()
+        result.update( converter.progress.counts()) ### frames, prims, faces and bytes actually written
+        result[ 'ok'] = True
+    except Exception as error:
+        result[ 'error'] = repr( error)
+        if workerArgs.debug: traceback.print_exc()
+    result[ 'seconds'] = time.perf_counter() - startTime
+    return result
+
+def printResult( _result, _count, _total):
+    status = 'OK  ' if _result[ 'ok'] else 'FAIL'
+    line = '[' + str( _count).rjust( len( str( _total))) + '/' + str( _total) + '] ' + status + ' ' + f"{_result[ 'seconds']:8.3f}" + 's ' + _result[ 'file']
+    if not _result[ 'ok']: line += '  ' + _result[ 'error']
+    print( line, flush = True)
+
+def printSummary( _results, _seconds, _workers):
+    failed = [ result for result in _results if not result[ 'ok']]
+    convertSeconds = sum( result[ 'seconds'] for result in _results)
+    print( '---')
+    print( 'batch:', len( _results), 'files,', len( _results) - len( failed), 'converted,', len( failed), 'failed')
+    print( 'batch:', sum( result[ 'frames'] for result in _results), 'frames with', _workers, 'workers in', f'{_seconds:.3f}', 's wall,', f'{convertSeconds:.3f}', 's in converters')
+    if _results: print( 'batch:', f'{convertSeconds / len( _results):.3f}', 's per file')
+    for result in failed:
+        print( 'FAILED:', result[ 'file'], result[ 'error'])
+
+def runBatch( _usdFiles = [], 
+              _args = False,
+              _workers = -1, # -1 cpu count, 0 converts in this process
+            ):
+    if _workers < 0: _workers = min( os.cpu_count() or 1, len( _usdFiles))
+    startTime = time.perf_counter()
+    results = []
+    progress = oomProgress.Progress( _mode = getattr( _args, 'progress', 'off'), _unit = 'files', _label = getattr( _args, 'usdfile', ''))
+    progress.expect( len( _usdFiles))
+    if _workers == 0:
+        initWorker( _args)
+        for usdFile in _usdFiles:
+            results.append( convertOne( usdFile))
+            printResult( results[ -1], len( results), len( _usdFiles))
+            progress.merge( results[ -1])
+            progress.advance()
+    else:
+        with multiprocessing.Pool( processes = _workers, initializer = initWorker, initargs = ( _args,)) as pool:
+            for result in pool.imap_unordered( convertOne, _usdFiles):
+                results.append( result)
+                printResult( result, len( results), len( _usdFiles))
+                progress.merge( result)
+                progress.advance()
+    progress.finish()
+    printSummary( results, time.perf_counter() - startTime, _workers)
+    return results
@@ -30,17 +30,70 @@ from pxr import Usd
 from pxr import Gf
 from pxr import UsdGeom
 from pxr import UsdShade
-from pxr import UsdLux 
+#from pxr import UsdLux ### imported in writeLight(), only scenes with lights pay for it
 
 ## standard modules
 from pathlib import Path  # used for cross platform file paths
 import json
 import os.path 
 import io  # used for unittests, in memory file like
+import queue
+import threading
 
 ## oomer modules
 import OomerUtil as oomUtil
 
+### file like, write() collects text on the converting thread and a daemon thread drains 1MB chunks
+### to the real file, so reading and encoding the next prim overlaps the disk or network write
+### the queue is bounded, a slow sink applies back pressure instead of holding a whole frame in memory
+### one drain thread keeps chunks in order, a write error is raised on the next write() or on close()
+class BackgroundWriter:
+    def __init__( self, 
+                  _file = False,         # open text file
+                  _queueSize = 8,        # chunks in flight
+                  _chunkSize = 1 << 20,  # characters per chunk
+                ):
+        self.file = _file
+        self.chunkSize = _chunkSize
+        self.parts = []
+        self.partsSize = 0
+        self.error = False
+        self.queue = queue.Queue( maxsize = max( 1, _queueSize))
+        self.thread = threading.Thread( target = self.drain, daemon = True)
+        self.thread.start()
+
+    def drain( self):
+        while True:
+            chunk = self.queue.get()
+            if chunk is None: return
+            if self.error: continue ### keep consuming so write() never blocks on a dead sink
+            try:
+                self.file.write( chunk)
+            except BaseException as error:
+                self.error = error
+
+    def write( self, _text):
+        self.parts.append( _text)
+        self.partsSize += len( _text)
+        if self.partsSize >= self.chunkSize: self.flush()
+        return len( _text)
+
+    def flush( self):
+        if self.error: raise self.error
+        if self.parts:
+            self.queue.put( ''.join( self.parts))
+            self.parts = []
+            self.partsSize = 0
+
+    def close( self):
+        try:
+            self.flush()
+        finally:
+            self.queue.put( None)
+            self.thread.join()
+            self.file.close()
+        if self.error: raise self.error
+
 class SceneAscii:
     def __init__( self, 
                   _bsaFile = False, 
@@ -48,21 +101,41 @@ class SceneAscii:
                   _debug = False,
                   _colorDome = False,
                   _unitTest = False,
+                  _memoryFile = False,
+                  _precision = 'balanced', # OomerUtil.Precision profile name
+                  _precisionReport = False, # dict collecting error and size per attribute class, see reportPrecision()
+                  _writeQueue = 8, # BackgroundWriter chunks in flight, 0 writes on this thread
+                  _shardRoot = False, # -shard, uuid of the one top level prim this file holds
+                  _stream = False, # -serve, file like object the text goes to instead of _bsaFile, see OomerService.py
                 ):
 
         self.renderer_up_axis = 'Z'
+        self.precision = oomUtil.Precision()
+        self.precisionProfile = self.precision.profiles[ _precision]
+        self.precisionReport = _precisionReport
         self.worldNodes = []
         self.usdScene = _usdScene
         self.imageDome = False
         self.colorDome = _colorDome
         self.debug = _debug
         self.timeCode = 1
+        self.shardRoot = _shardRoot
+        self.shards = [] ### -shard master, ( top level uuid, shard .bsa) written as reference nodes
+        self.culled = set() ### uuids dropped by purpose, -cull or -frustum, parents don't list them, see Converter.frameJobs()
 
         if not _unitTest:
             if not _bsaFile.parent.exists():
                 _bsaFile.parent.mkdir()
             self.bsaFile = _bsaFile
-            self.file = open( str( _bsaFile), 'w')
+            if _memoryFile: ### -watch keeps the bsa in memory and patches it, see OomerWatch.py
+                self.file = io.StringIO()
+            elif _stream: ### _bsaFile still anchors relative texture paths
+                self.file = _stream
+                if _writeQueue > 0: self.file = BackgroundWriter( _file = self.file, _queueSize = _writeQueue)
+            else:
+                if _bsaFile.exists() and os.stat( _bsaFile).st_nlink > 1: _bsaFile.unlink() ### a deduped frame, writing through the link would change its siblings
+                self.file = open( str( _bsaFile), 'w')
+                if _writeQueue > 0: self.file = BackgroundWriter( _file = self.file, _queueSize = _writeQueue)
             self.writeHeader()
             self.writeGlobal()
             self.writeState()
@@ -96,6 +169,11 @@ class SceneAscii:
     def setTimeCode( self, _timeCode=False):
         self.timeCode = _timeCode
 
+    ### writers can be re-run by -watch, only list a world node once
+    def addWorldNode( self, _uuid):
+        if _uuid not in self.worldNodes:
+            self.worldNodes.append( _uuid)
+
     ## nice 27 space text formatting
     def nice( self, _attrib):
         return str("  ." + f'{_attrib:27}' + '= ')
@@ -193,6 +271,7 @@ class SceneAscii:
                           _type = False,
                           _nparray = False,
                           _bracket = False,
+                          _chunks = False, # -outofcore, callable returning an iterator of arrays, written in place of _nparray
                         ):
         #https://stackoverflow.com/questions/53820891/speed-of-writing-a-numpy-array-to-a-text-file
         #Assumed numpy.savetxt was performant, it is not! Saving 0020_060 Sprite fright went from 4 minutes to 1 minute
@@ -202,22 +281,64 @@ class SceneAscii:
         elif    _bracket == '(': endBracket = ')'
         elif    _bracket == '[': endBracket = ']'
         
-        npArray = _nparray.ravel() # - [ ] doc
         self.file.write( self.nice( _name) + _type)
         self.file.write( _bracket)
-        npFormat = ' '.join([ '%g'] * npArray.size) #- [ ] document npFormat
-        npFormat = '\n'.join([ npFormat])
-        data = npFormat % tuple( npArray )
-        self.file.write( data)
+        if _chunks: 
+            self.writeChunks( _chunks, self.precisionClass( _type))
+        else:
+            npArray = _nparray.ravel() # - [ ] doc
+            data = self.formatNumpy( npArray, self.precisionClass( _type)) ### precision depends on attribute class
+            self.file.write( data)
         self.file.write( endBracket)
         self.file.write( ';\n')
 
+    ### bella type -> attribute class, False for colors and other small values which keep %g
+    def precisionClass( self, _type):
+        for prefix, attribClass in self.precision.classes:
+            if _type.startswith( prefix): return attribClass
+        return False
+
+    def formatNumpy( self, _npArray, _attribClass = False, _integerDigits = False):
+        if _attribClass == 'indices': ### %g turned index 1234567 into 1.23457e+06
+            return oomUtil.formatNumpy( _npArray, ( 'int', 0))
+        data = oomUtil.formatNumpy( _npArray, self.precisionProfile.get( _attribClass, ( 'sig', 6)), _integerDigits)
+        if _attribClass and self.precisionReport is not False: 
+            self.reportPrecision( _attribClass, _npArray, data)
+        return data
+
+    ### one payload formatted a chunk at a time, same text as formatNumpy() of the concatenated chunks
+    ### 'dec' widths depend on the largest value so those classes take an extra pass over the chunks first
+    def writeChunks( self, _chunks, _attribClass = False):
+        mode, digits = self.precisionProfile.get( _attribClass, ( 'sig', 6))
+        integerDigits = False
+        if mode == 'dec' and _attribClass != 'indices':
+            integerDigits = max( [ oomUtil.integerDigits( npChunk, digits) for npChunk in _chunks()] + [ 1])
+        separator = ''
+        for npChunk in _chunks():
+            if npChunk.size == 0: continue
+            self.file.write( separator + self.formatNumpy( npChunk.ravel(), _attribClass, integerDigits))
+            separator = ' '
+
+    ### -precisionreport, compares against the old %g output, costs a second format and a parse per array
+    def reportPrecision( self, _attribClass, _npArray, _data):
+        stats = self.precisionReport.setdefault( _attribClass, { 'values': 0, 'bytes': 0, 'legacyBytes': 0, 'maxError': 0.0})
+        written = np.array( _data.split(), dtype = np.float64)
+        original = _npArray.astype( np.float64)
+        if _attribClass != 'matrix': ### f types, error is what survives the float32 read in Bella
+            written = written.astype( np.float32).astype( np.float64)
+            original = original.astype( np.float32).astype( np.float64)
+        stats[ 'values'] += _npArray.size
+        stats[ 'bytes'] += len( _data)
+        stats[ 'legacyBytes'] += len( oomUtil.formatNumpy( _npArray, ( 'sig', 6)))
+        if _npArray.size: 
+            stats[ 'maxError'] = max( stats[ 'maxError'], float( np.abs( written - original).max()))
+
 
     ###
     def writeCamera( self, 
                     _prim = False, #UsdPrim
                    ):
-        uuid = oomUtil.uuidSanitize( _prim.GetName(), _hashSeed = _prim.GetPath())
+        uuid = oomUtil.uuidSanitize( _prim.GetName(), _hashSeed = self.usdScene.stablePath( _prim))
         self.camera = uuid
 
         if _prim.GetAttribute( 'horizontalAperture').HasValue():
@@ -332,7 +453,7 @@ class SceneAscii:
                           _prim = False, #UsdPrim
                         ):
         uuidXform = _uuid + 'Xform'
-        self.worldNodes.append( uuidXform) 
+        self.addWorldNode( uuidXform) 
         self.writeNode( _type = 'xform', _uuid = uuidXform)
         self.writeAttribString( _name = 'name', _value = uuidXform)
         self.writeAttribRaw( _name = 'children[*]', _value = _uuid)
@@ -359,6 +480,8 @@ class SceneAscii:
                    _xformCache = False,     #Usd.Stage.XformCache
                    _subdivision = False,    #int
                    _colordome = False,      #bool
+                   _subsets = [],           #[ ( str, numpyuint32[])]
+                   _meshChunks = False,     #oomOutOfCore.MeshChunks, -outofcore, replaces the four numpy arrays
                   ):
         # Along with a mesh, this function inserts an xform node to
         # 1. capture usd's gprim's ability to hold a transfrom
@@ -368,14 +491,9 @@ class SceneAscii:
         if _colordome: self.colorDome=True
 
         primName = _prim.GetName()
-        uuid = oomUtil.uuidSanitize( _prim.GetName(), _hashSeed = _prim.GetPath())
+        uuid = oomUtil.uuidSanitize( _prim.GetName(), _hashSeed = self.usdScene.stablePath( _prim))
 
-        usdGeom = UsdGeom.Imageable(_prim)
-        primPurpose = usdGeom.ComputePurpose() ### TODO is compyting this expensive
-        primVisibility = usdGeom.GetVisibilityAttr().Get()
-        if primPurpose != 'default' and primPurpose != 'render':
-        #if primPurpose != 'default' and primPurpose != 'render' and primVisibility != 'invisible':
-            return # Skip write mesh if proxy
+        ### proxy and guide meshes never get here, purpose is resolved in Reader.traverseScene()
 
         ### 2024 material binding
         materialBinding =  _prim.GetRelationship('material:binding')
@@ -384,7 +502,7 @@ class SceneAscii:
             materialSdfPath = materialBinding.GetTargets()[ 0]
             matPrim = self.usdScene.stage.GetPrimAtPath( materialSdfPath)
             if matPrim: ### if null then this material may be deactivated
-                materialName = oomUtil.uuidSanitize( matPrim.GetName(), _hashSeed = matPrim.GetPath())
+                materialName = oomUtil.uuidSanitize( matPrim.GetName(), _hashSeed = self.usdScene.stablePath( matPrim))
 
         np_matrix4 = np.array( _xformCache.GetLocalTransformation( _prim)[0])
         # INSERT XFORM 
@@ -404,54 +522,61 @@ class SceneAscii:
                                _nparray = np_matrix4_1d,
                              )
 
-        subset_count = 0
-        for each_subset in UsdGeom.Subset.GetAllGeomSubsets( usdGeom):
-            subset_prim =  each_subset.GetPrim()
-            subset_indices = each_subset.GetIndicesAttr().Get()
-            subset_material_bind =  subset_prim.GetRelationship('material:binding')
-            subset_mat_prim = False
-            if subset_material_bind.GetTargets():
-                subset_material_sdfpath = subset_material_bind.GetTargets()[ 0]
-                subset_mat_prim = self.usdScene.stage.GetPrimAtPath( subset_material_sdfpath)
-                if subset_mat_prim: ### if null then this material may be deactivated
-                    subset_material_name = oomUtil.uuidSanitize( subset_mat_prim.GetName(), _hashSeed = subset_mat_prim.GetPath())
-                    self.writeAttribRaw( _name = 'materials[' + str(subset_count) + '].material', _value = subset_material_name)
-                    #self.writeAttribRaw( _name = 'materials[' + str(subset_count) + '].indices', _value = 'uint32[1]{' + str( subset_count) + '}')
-                    self.writeAttribNumpy( _name = 'materials[' + str( subset_count) + '].indices',
-                                        _type = 'uint32[' + str( len( subset_indices)) + ']',
-                                        _bracket = '{',
-                                        _nparray = np.array( subset_indices)
-                                        )
-            subset_count += 1
-       
-
+        ### GeomSubsets, face indices already remapped through triangulation by oomUsd.Reader.readSubsets()
+        for subsetCount, ( subsetMaterial, subsetIndices) in enumerate( _subsets):
+            self.writeAttribRaw( _name = 'materials[' + str( subsetCount) + '].material', _value = subsetMaterial)
+            self.writeAttribNumpy( _name = 'materials[' + str( subsetCount) + '].indices',
+                                   _type = 'uint32[' + str( len( subsetIndices)) + ']',
+                                   _bracket = '{',
+                                   _nparray = subsetIndices,
+                                 )
 
         if matPrim:
             self.writeAttribRaw( _name = 'material', _value = materialName)
 
         self.writeNode( _type = 'mesh', _uuid = uuid)
         self.writeAttribString( _name = 'name', _value = primName)
-        self.writeAttribNumpy( _name = 'polygons',
-                               _type = 'vec4u[' + str( _npVertexCount.size) + ']',
-                               _nparray = _npVertexIndices,
-                             )
+        if _meshChunks: ### streamed a face chunk at a time, sizes are known before any chunk is gathered
+            self.writeAttribNumpy( _name = 'polygons',
+                                   _type = 'vec4u[' + str( _meshChunks.numFaces) + ']',
+                                   _chunks = _meshChunks.polygonChunks,
+                                 )
+            self.writeAttribNumpy( _name = 'steps[0].points',
+                                   _type = 'pos3f[' + str( _meshChunks.numCorners) + ']',
+                                   _chunks = _meshChunks.pointChunks,
+                                 )
+            if _meshChunks.normals.size:
+                self.writeAttribNumpy( _name = 'steps[0].normals',
+                                       _type = 'vec3f[' + str( _meshChunks.numCorners) + ']',
+                                       _chunks = _meshChunks.normalChunks,
+                                     )
+        else:
+            self.writeAttribNumpy( _name = 'polygons',
+                                   _type = 'vec4u[' + str( _npVertexCount.size) + ']',
+                                   _nparray = _npVertexIndices,
+                                 )
 
-        numRows, _ = _npPoints.shape
-        self.writeAttribNumpy( _name = 'steps[0].points',
-                               _type = 'pos3f[' + str( numRows) + ']',
-                               _nparray = _npPoints,
-                             )
-        if isinstance( _npNormals, np.ndarray):
-            self.writeAttribNumpy( _name = 'steps[0].normals',
-                                   _type = 'vec3f[' + str( len( _npNormals)) + ']',
-                                   _nparray = _npNormals,
+            numRows, _ = _npPoints.shape
+            self.writeAttribNumpy( _name = 'steps[0].points',
+                                   _type = 'pos3f[' + str( numRows) + ']',
+                                   _nparray = _npPoints,
                                  )
+            if isinstance( _npNormals, np.ndarray):
+                self.writeAttribNumpy( _name = 'steps[0].normals',
+                                       _type = 'vec3f[' + str( len( _npNormals)) + ']',
+                                       _nparray = _npNormals,
+                                     )
 
-        if primVisibility == 'invisible':
+        if self.usdScene.meshes[ _prim][ 'visibility'] == 'invisible':
             self.writeAttribString( _name = 'visibility', _value = 'hidden')
        
         try:
-            if isinstance( _npTxcoords, np.ndarray): # fail on non np.ndarray
+            if _meshChunks and _meshChunks.txcoords.size:
+                self.writeAttribNumpy( _name = 'steps[0].uvs',
+                                       _type = 'vec2f[' + str( _meshChunks.numCorners) + ']',
+                                       _chunks = _meshChunks.txcoordChunks,
+                                     )
+            elif isinstance( _npTxcoords, np.ndarray): # fail on non np.ndarray
                 self.writeAttribNumpy( _name = 'steps[0].uvs',
                                        _type = 'vec2f[' + str( _npTxcoords.shape[0] ) + ']',
                                        _nparray=_npTxcoords,
@@ -474,9 +599,8 @@ class SceneAscii:
                         _instancePrim = False,  #UsdPrim
                      ):
         primName = _prim.GetName() 
-        name = oomUtil.uuidSanitize( primName, _hashSeed = _prim.GetPath()) 
-        instancePrimName = _instancePrim.GetName() 
-        instanceName = oomUtil.uuidSanitize( instancePrimName, _hashSeed = _instancePrim.GetPath()) 
+        name = oomUtil.uuidSanitize( primName, _hashSeed = self.usdScene.stablePath( _prim)) 
+        instanceName = self.usdScene.instanceUUID( _instancePrim) ### memoized per reference target
         self.writeNode( _type = 'xform', _uuid = name)
         self.writeAttribString( _name = 'name', _value = primName)
         self.writeAttribRaw( _name = 'children[*]', _value = instanceName)
@@ -490,7 +614,7 @@ class SceneAscii:
                         _prim = False,
                       ):
         primName = _prim.GetName() 
-        uuid = oomUtil.uuidSanitize( primName, _hashSeed = _prim.GetPath()) 
+        uuid = oomUtil.uuidSanitize( primName, _hashSeed = self.usdScene.stablePath( _prim)) 
         usdType = _prim.GetTypeName()
         #primType = self.usdScene.primitives[_prim][ 'type']
         np_matrix4 = np.array( self.usdScene.xform_cache.GetLocalTransformation( _prim)[0])
@@ -518,7 +642,7 @@ class SceneAscii:
             materialSdfPath = materialBinding.GetTargets()[ 0]
             matPrim = self.usdScene.stage.GetPrimAtPath( materialSdfPath)
             if matPrim: ### if null then this material may be deactivated
-                materialName = oomUtil.uuidSanitize( matPrim.GetName(), _hashSeed = matPrim.GetPath())
+                materialName = oomUtil.uuidSanitize( matPrim.GetName(), _hashSeed = self.usdScene.stablePath( matPrim))
         if matPrim:
             self.writeAttribRaw( _name = 'material', _value = materialName)
 
@@ -547,7 +671,7 @@ class SceneAscii:
                              _prim = False, #UsdPrim
                           ):
         primName = _prim.GetName() 
-        name = oomUtil.uuidSanitize( primName, _hashSeed = _prim.GetPath()) 
+        name = oomUtil.uuidSanitize( primName, _hashSeed = self.usdScene.stablePath( _prim)) 
         self.writeNode( _type = 'instancer', _uuid = name)
         self.writeAttribString( _name = 'name', _value = primName)
         ### Assume there is always scale
@@ -581,7 +705,7 @@ class SceneAscii:
         for protoSdfPath in self.usdScene.instancers[ _prim]['protoChildren'].GetTargets():
             protoPrim = self.usdScene.stage.GetPrimAtPath( protoSdfPath) ### bad stage stage naming
             if protoPrim:
-                uuid = oomUtil.uuidSanitize( protoPrim.GetName(), _hashSeed = protoPrim.GetPath()) 
+                uuid = oomUtil.uuidSanitize( protoPrim.GetName(), _hashSeed = self.usdScene.stablePath( protoPrim)) 
                 self.writeAttribRaw( _name = 'children[*]', _value = uuid)
 
         self.writeAttribNumpy( _name = 'steps[0].instances',
@@ -597,9 +721,6 @@ class SceneAscii:
                     _prim = False, 
                     _instanceUUID = False,
                   ):
-        if _prim.IsInstance():
-            protoPrim =  _prim.GetPrototype().GetChildren()
-
         ### TODO skip Camera xform because we create a new camera xform that can be orbited because it is in Bella's coord system
         # rather than Usd coord system
         for childPrim in _prim.GetChildren():
@@ -611,7 +732,7 @@ class SceneAscii:
         if _prim in self.usdScene.prototype_children: # Spelunk and try to find useful name  
             alusd_name = _prim.GetAttribute( 'alusd_originalName').Get() # [ ] GetName() gives us a useless "GEO" name, original name much more relevant
             if isinstance( alusd_name, str): prim_name = alusd_name  
-        name = oomUtil.uuidSanitize( primName, _hashSeed = _prim.GetPath()) 
+        name = oomUtil.uuidSanitize( primName, _hashSeed = self.usdScene.stablePath( _prim)) 
 
         self.usdScene.xform_cache.SetTime( self.timeCode)  ### Set xform cache to animation time
         np_matrix4 = np.array( self.usdScene.xform_cache.GetLocalTransformation( _prim)[0]) #flatten transforms to mat4
@@ -623,31 +744,18 @@ class SceneAscii:
             materialSdfPath = materialBinding.GetTargets()[ 0]
             matPrim = self.usdScene.stage.GetPrimAtPath( materialSdfPath)
             if matPrim: ### if null then this material may be deactivated
-                materialName = oomUtil.uuidSanitize( matPrim.GetName(), _hashSeed = matPrim.GetPath())
+                materialName = oomUtil.uuidSanitize( matPrim.GetName(), _hashSeed = self.usdScene.stablePath( matPrim))
 
         self.writeNode( _type = 'xform', _uuid = name)
         self.writeAttribString( _name = 'name', _value = primName)
 
-        # - [2024] document prototypes and test 
-        # - add unit tests
-        if _prim in self.usdScene.prototype_instances: 
-            # handler for top level prototype prims, ie the NS:GEO node in Animal Logic Assets
-            ### start rewriting this because it is before my understanding of UsdGeom and UsdShader
-            childPrim = self.usdScene.prototype_instances[ _prim]
-            if childPrim:
-                alusd_name = childPrim.GetAttribute( 'alusd_originalName').Get()
-                if isinstance( alusd_name, str):
-                    childName = oomUtil.uuidSanitize( alusd_name, _hashSeed = childPrim.GetPath())
-                else:
-                    childName = oomUtil.uuidSanitize( childPrim.GetName())
-                self.writeAttribRaw( _name = 'children[*]', _value = childName)
-
+        if _instanceUUID: ### instance, only child is the prototype subtree written by writePrototype()
+            self.writeAttribRaw( _name = 'children[*]', _value = _instanceUUID)
         else:  # normal workflow, including children of toplevel prototype prims
             for childPrim in _prim.GetChildren():
-                childName = oomUtil.uuidSanitize( childPrim.GetName(), _hashSeed = childPrim.GetPath())
+                childName = oomUtil.uuidSanitize( childPrim.GetName(), _hashSeed = self.usdScene.stablePath( childPrim))
+                if childName in self.culled: continue
                 self.writeAttribRaw( _name = 'children[*]', _value = childName)
-        if _instanceUUID:
-            self.writeAttribRaw( _name = 'children[*]', _value = _instanceUUID)
 
         if matPrim:
             self.writeAttribRaw( _name = 'material', _value = materialName)
@@ -668,6 +776,22 @@ class SceneAscii:
         if 'bellaemitter' in name: # hack
             self.writeAttribRaw(  _name = 'material', _value = 'emitter')
 
+    ### root of a stage.GetPrototypes() subtree, written once and shared by every instance xform
+    def writePrototype( self, 
+                        _prim = False,  #UsdPrim
+                      ):
+        self.writeNode( _type = 'xform', _uuid = self.usdScene.instanceUUID( _prim))
+        self.writeAttribString( _name = 'name', _value = self.usdScene.primName( _prim))
+        for childPrim in _prim.GetChildren():
+            childName = oomUtil.uuidSanitize( childPrim.GetName(), _hashSeed = self.usdScene.stablePath( childPrim))
+            if childName in self.culled: continue
+            self.writeAttribRaw( _name = 'children[*]', _value = childName)
+        self.writeAttribNumpy( _name = 'steps[0].xform',
+                               _type = 'mat4',
+                               _nparray = self.usdScene.mat4_identity,
+                               _bracket = '(',
+                             )
+
     def writeScope( self, 
                     _prim = False,  #UsdPrim
                   ):
@@ -682,7 +806,7 @@ class SceneAscii:
         if _prim in self.usdScene.prototype_children: # Spelunk and try to find useful name  
             alusd_name = _prim.GetAttribute( 'alusd_originalName').Get() # [ ] GetName() gives us a useless "GEO" name, original name much more relevant
             if isinstance( alusd_name, str): prim_name = alusd_name  
-        name = oomUtil.uuidSanitize( primName, _hashSeed = _prim.GetPath()) 
+        name = oomUtil.uuidSanitize( primName, _hashSeed = self.usdScene.stablePath( _prim)) 
 
         self.stage.xform_cache.SetTime( self.timeCode)  ### Set xform cache to animation time
         np_matrix4 = np.array( self.stage.xform_cache.GetLocalTransformation( _prim)[ 0]) #flatten transforms to mat4
@@ -690,22 +814,12 @@ class SceneAscii:
         self.writeNode( _type = 'xform', _uuid = name)
         self.writeAttribString( _name = 'name', _value = primName)
 
-        ### - [2024] document prototypes and test 
-        # - [ ] TODO add unit tests
-        if _prim in self.usdScene.prototype_instances: 
-            # handler for top level prototype prims, ie the NS:GEO node in Animal Logic Assets
-            childPrim = self.usdScene.prototype_instances[ _prim]
-            if childPrim:
-                alusd_name = childPrim.GetAttribute( 'alusd_originalName').Get()
-                if isinstance( alusd_name, str):
-                    childName = oomUtil.uuidSanitize( alusd_name, _hashSeed = childPrim.GetPath())
-                else:
-                    childName = oomUtil.uuidSanitize( childPrim.GetName())
-                self.writeAttribRaw( _name = 'children[*]', _value = childName)
-
+        if _prim in self.usdScene.prototype_instances: ### instanceable scope, see writePrototype()
+            self.writeAttribRaw( _name = 'children[*]', _value = self.usdScene.instanceUUID( self.usdScene.prototype_instances[ _prim]))
         else:  # normal workflow, including children of toplevel prototype prims
             for childPrim in _prim.GetChildren():
-                childName = oomUtil.uuidSanitize( childPrim.GetName(), _hashSeed = childPrim.GetPath())
+                childName = oomUtil.uuidSanitize( childPrim.GetName(), _hashSeed = self.usdScene.stablePath( childPrim))
+                if childName in self.culled: continue
                 self.writeAttribRaw( _name = 'children[*]', _value = childName)
 
         ###See writeXform for notes, this was copied from there
@@ -744,17 +858,24 @@ class SceneAscii:
     ###
     def writeOomerCamera( self): #Convenience helper to add a default camera when .usd has none
         focalLength        = 20
-        focusDistance      = 0.877 # [ ] TODO use scene extents to calc
         horizontalAperture = 36
         verticalAperture   = 24
         fstop               = 8
         cameraName         = 'oomerCamera'
+        np_matrix4, focusDistance = self.frameBound( self.usdScene.worldBound( _timeCode = self.timeCode), 
+                                                     _focalLength = focalLength,
+                                                     _aperture = min( verticalAperture, horizontalAperture * 1080 / 1920), ### 16:9 crop of the sensor
+                                                   )
         self.camera = cameraName
-        self.worldNodes.append( cameraName+'_xform') # TODO is this needed OLD?
+        self.addWorldNode( cameraName+'_xform') # TODO is this needed OLD?
         self.writeNode( _type = 'xform', _uuid = cameraName + '_xform')
         self.writeAttribString( _name = 'name', _value = cameraName + '_xform')
         self.writeAttribRaw( _name = 'children[*]', _value = cameraName)
-        self.writeAttribRaw( _name = 'steps[0].xform', _value = 'mat4(1 0 0 0 0 1 0 0 0 0 1 0 0 0 0 1)')
+        self.writeAttribNumpy( _name = 'steps[0].xform',
+                               _type = 'mat4',
+                               _nparray = np_matrix4.ravel(),
+                               _bracket = '(',
+                             )
 
         self.writeNode( _type = 'camera', _uuid = cameraName)
         self.writeAttribRaw( _name = 'lens', _value = cameraName + '_thinLens')
@@ -769,18 +890,57 @@ class SceneAscii:
         self.writeAttribFloat( _name = 'steps[0].focalLen', _value = focalLength)
         self.writeAttribFloat( _name = 'steps[0].focalDist', _value = focusDistance)
 
+    ### Bella camera matrix looking at a usd world bound from the front right and above, and its focus distance
+    ### same convention as writeCameraXform(), rows are camera axes in Bella world space, +z looks, +y points down
+    ### the bounding sphere fits the narrower field of view, empty scenes keep the old identity camera
+    def frameBound( self, 
+                    _range = False,     # Gf.Range3d in usd world space
+                    _focalLength = 20,  # mm
+                    _aperture = 24,     # mm, narrower side of the visible sensor
+                  ):
+        if not _range or _range.IsEmpty(): return self.usdScene.mat4_identity, 0.877
+        corners = np.array( [ list( _range.GetCorner( corner)) + [ 1] for corner in range( 8)], dtype='float64') @ self.np_basis_change_mat4
+        corners = corners[ :, :3]
+        centre = ( corners.min( axis = 0) + corners.max( axis = 0)) / 2
+        radius = max( np.linalg.norm( corners - centre, axis = 1).max(), 1e-6)
+        distance = 1.05 * radius / np.sin( np.arctan( _aperture / 2 / _focalLength))
+        viewDir = np.array( [ -0.6, 1.0, -0.5]) ### from front right, above, usd +z front is bella -y
+        viewDir /= np.linalg.norm( viewDir)
+        xAxis = np.cross( viewDir, [ 0, 0, 1])
+        xAxis /= np.linalg.norm( xAxis)
+        yAxis = -np.cross( xAxis, viewDir)
+        np_matrix4 = np.identity( 4)
+        np_matrix4[ 0, :3] = xAxis
+        np_matrix4[ 1, :3] = yAxis
+        np_matrix4[ 2, :3] = viewDir
+        np_matrix4[ 3, :3] = centre - viewDir * distance
+        return np_matrix4 + 0.0, distance ### + 0.0 drops -0
+
     ###
     def writeUsdRoot( self):
         uuid = oomUtil.uuidSanitize( self.usdScene.file.stem) + '_usd'
         self.writeNode( _type = 'xform', _uuid = uuid)
-        self.worldNodes.append( uuid)
-        for childuuid in self.usdScene.rootPrims:
-            self.writeAttribRaw( _name = 'children[*]', _value = childuuid)
+        self.addWorldNode( uuid)
+        if self.shards: ### -shard master, each top level prim lives in its own file
+            for childuuid, shardFile in self.shards:
+                self.writeAttribRaw( _name = 'children[*]', _value = childuuid + '_ref')
+        else:
+            for childuuid in self.usdScene.rootPrims:
+                if childuuid in self.culled: continue
+                self.writeAttribRaw( _name = 'children[*]', _value = childuuid)
         self.writeAttribNumpy( _name = 'steps[0].xform',
                                _type = 'mat4',
                                _nparray = self.np_basis_change_mat4,
                                _bracket = '(',
                              )
+        for childuuid, shardFile in self.shards:
+            self.writeReference( _uuid = childuuid + '_ref', _file = shardFile)
+
+    ### bella reference node, loads the world of another .bsa, path is relative to this .bsa
+    def writeReference( self, _uuid = False, _file = False):
+        relPath = Path( os.path.relpath( _file, self.bsaFile.parent))
+        self.writeNode( _type = 'reference', _uuid = _uuid)
+        self.writeAttribString( _name = 'file', _value = relPath.as_posix())
 
     ###
     def writeWorld(self):
@@ -794,23 +954,30 @@ class SceneAscii:
                              )
 
     ###
+    ### one node per unique texture file, see oomUsd.Reader.resolveTextures()
     def writeShaderTexture( self,
-                          _usdShader,
-                          _filePath,
-                        ):
-        uuid = oomUtil.uuidSanitize( _usdShader.GetPrim().GetName(), _hashSeed = _usdShader.GetPath())
-        relPath = Path( os.path.relpath( _filePath, self.bsaFile.parent)) ### remove absolute path
+                            _texture, # dict from usdScene.textures
+                          ):
+        uuid = _texture[ 'uuid']
+        relPath = _texture[ 'relPath'] ### precomputed once per file, not per shader per frame
         self.writeNode( _type='fileTexture', _uuid = uuid)
         self.writeAttribString( _name = 'dir', _value = str( relPath.parent))
         self.writeAttribString( _name = 'ext', _value = str( relPath.suffix))
         self.writeAttribString( _name = 'file', _value = str( relPath.stem))
 
+    ### shaders sharing a texture file connect to the same deduplicated fileTexture node
+    def textureUUID( self, _usdShader):
+        uvTexture = self.usdScene.uv_textures.get( _usdShader.GetPrim())
+        if uvTexture and 'uuid' in uvTexture:
+            return uvTexture[ 'uuid']
+        return oomUtil.uuidSanitize( _usdShader.GetPrim().GetName(), _hashSeed = self.usdScene.stablePath( _usdShader))
+
     ###
     def writeNormalTexture( self,
                             _prim,
                             _filePath,
                           ):
-        uuid = oomUtil.uuidSanitize( _prim.GetName(), _hashSeed = _prim.GetPath()) + 'normalMap'
+        uuid = oomUtil.uuidSanitize( _prim.GetName(), _hashSeed = self.usdScene.stablePath( _prim)) + 'normalMap'
         self.writeNode( _type = 'normalMap', _uuid = uuid)
         self.writeAttribString( _name = 'dir', _value = str(_filePath.parent))
         self.writeAttribString( _name = 'ext', _value = '.' + str(_filePath.suffix))
@@ -820,7 +987,7 @@ class SceneAscii:
                              _prim  = False,
                            ):
         primName = _prim.GetName()
-        uuid = oomUtil.uuidSanitize( primName, _hashSeed = _prim.GetPath())
+        uuid = oomUtil.uuidSanitize( primName, _hashSeed = self.usdScene.stablePath( _prim))
         if self.usdScene.mtlxNodes[ _prim][ 'type']  == 'ND_worleynoise3d_float':
             self.writeNode( _type = 'noise', _uuid = uuid)
         if self.usdScene.mtlxNodes[ _prim][ 'type']  == 'ND_image_color3':
@@ -846,7 +1013,7 @@ class SceneAscii:
                                         _ignoreRoughness = False,
                                       ):
         primName = _prim.GetName()
-        uuid = oomUtil.uuidSanitize( primName, _hashSeed = _prim.GetPath())
+        uuid = oomUtil.uuidSanitize( primName, _hashSeed = self.usdScene.stablePath( _prim))
         self.writeNode( _type = 'uber', _uuid = uuid)
         self.writeAttribString( _name = 'name', _value = primName)
         ### USD shaders are defined in a node network
@@ -906,7 +1073,7 @@ class SceneAscii:
                     else: outType = '.outAverage'
                     if shaderInputName == 'metallic': 
                         self.writeAttribFloat( _name = 'base.metallicRoughness', _value = 0)
-                    uuidTexture = oomUtil.uuidSanitize( naivePrimOrVal.GetPrim().GetName(), _hashSeed = naivePrimOrVal.GetPath())
+                    uuidTexture = self.textureUUID( naivePrimOrVal)
                     self.writeAttribConnected( _name = self.mtlxSurface[ shaderInputName],
                                                _value = uuidTexture + outType,
                                              )
@@ -919,7 +1086,7 @@ class SceneAscii:
                          ):
         print('uber form usdpreview')
         primName = _prim.GetName()
-        uuid = oomUtil.uuidSanitize( primName, _hashSeed = _prim.GetPath())
+        uuid = oomUtil.uuidSanitize( primName, _hashSeed = self.usdScene.stablePath( _prim))
         self.writeNode( _type = 'uber', _uuid = uuid)
         self.writeAttribString( _name = 'name', _value = primName)
         ### USD shaders are defined in a node network
@@ -990,7 +1157,7 @@ class SceneAscii:
                     else: outType = '.outAverage'
                     if shaderInputName == 'metallic': 
                         self.writeAttribFloat( _name = 'base.metallicRoughness', _value = 0)
-                    uuidTexture = oomUtil.uuidSanitize( naivePrimOrVal.GetPrim().GetName(), _hashSeed = naivePrimOrVal.GetPath())
+                    uuidTexture = self.textureUUID( naivePrimOrVal)
                     self.writeAttribConnected( _name = self.usdPreviewSurface[ shaderInputName],
                                                _value = uuidTexture + outType,
                                              )
@@ -1005,8 +1172,9 @@ class SceneAscii:
     def writeLight( self, 
                     _prim=False,
                   ): 
+        from pxr import UsdLux ### lazy, cached by python after the first light
         usdType = _prim.GetTypeName()
-        uuid = oomUtil.uuidSanitize( _prim.GetName(), _hashSeed = _prim.GetPath())
+        uuid = oomUtil.uuidSanitize( _prim.GetName(), _hashSeed = self.usdScene.stablePath( _prim))
 
         local_mat4 = np.array( [[ 1,0,0,0],[ 0,-1,0,0],[ 0,0,-1,0],[ 0,0,0,1]], dtype='float64') 
         if _prim.GetAttribute( 'xformOp:transform' ).HasValue():
@@ -1114,6 +1282,7 @@ class SceneAscii:
             sdfAssetPath = usdLux.GetTextureFileAttr().Get()
             absFilePath = sdfAssetPath.resolvedPath ### total API confusion, this attrib not documented, got by trying to use GetResolvedPath() and API suggested resolvedPath
             relFilePath = sdfAssetPath.path
+            absFilePath = self.usdScene.lights.get( _prim, {}).get( 'textureFile', absFilePath) ### .usdz domes are extracted to a cache
             ### My newbie c++ brain finally figured out that .path and .resolvedPath
             ### SDF_API SdfAssetPath ( const std::string & 	path,
             ###                        const std::string & 	resolvedPath 
@@ -1124,6 +1293,8 @@ class SceneAscii:
                 fileDome = Path( absFilePath)
             else:
                 fileDome = Path( relFilePath)
+            proxy = self.usdScene.lights.get( _prim, {}).get( 'proxy') ### -texturemax downsampled copy
+            if proxy: fileDome = Path( proxy)
             self.writeImageDome( fileDome)
             self.imageDome = uuid
 
@@ -1151,8 +1322,22 @@ class SceneAscii:
         self.writeAttribRaw( _name = 'color', _value = 'rgba(0.502886474133 0.450785845518 0.036889452487 1)')
         self.writeAttribFloat( _name = 'energy', _value = 10000)
     ###
-    def close(self, _usdScene):
+    def writeFooter( self):
         self.writeSettings()
+        if self.shardRoot: ### shard, basis change and camera stay in the master
+            if self.shardRoot not in self.culled: self.addWorldNode( self.shardRoot)
+            self.writeWorld()
+            return
         self.writeUsdRoot() # the usd scene is stored under this single xform
         self.writeWorld()
+    ###
+    def close(self, _usdScene):
+        self.writeFooter()
         self.file.close()
+
+    ### a writer raised mid frame, stop the background writer and release the file, caller sees the original error
+    def abort( self):
+        try:
+            self.file.close()
+        except Exception:
+            pass
@@ -0,0 +1,670 @@
+### Conversion driver module
+
+'''
+MIT License
+
+Copyright (c) 2023 Harvey Fong
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+## standard modules
+from pathlib import Path  # used for cross platform file paths
+import functools
+import os
+import io
+import contextlib
+import filecmp
+import shutil
+import multiprocessing
+
+## third party modules
+import numpy as np
+from pxr import Usd
+from pxr import UsdGeom
+from pxr import Gf
+
+## oomer modules
+import OomerUsd   as oomUsd   # USD read routines
+import OomerBella as oomBella # Bella write routines
+import OomerUtil  as oomUtil
+import OomerManifest as oomManifest
+import OomerProgress as oomProgress
+
+### USD can store both transform and mesh deformation animations
+### when no startFrame is defined, use frame 1
+def frameRange( _start = 0, _end = 0):
+    if _start <= 0: startFrame, endFrame, isSequence = 1, 1, False
+    else:
+        startFrame, isSequence = _start, True
+        if _end < _start: endFrame = startFrame
+        else: endFrame = _end
+    endFrame += 1 # Python range end not inclusive, requires end to be +1
+    return startFrame, endFrame, isSequence
+
+### .bsa is written next to .usd, sequences go in a subdir with 5 digit padded frames
+def bsaPath( _usdFile, _timeCode = 1, _isSequence = False):
+    if _isSequence:
+        bsaDire = _usdFile.parent.joinpath( str( _usdFile.stem) + '_bsa')  # use subdir for output, helps organize sequences
+        return bsaDire / Path( _usdFile.stem + str( _timeCode).zfill(5) + '.bsa')
+    return _usdFile.parent / Path( _usdFile.name).with_suffix( '.bsa')
+
+### -shard, one .bsa per top level prim next to the master .bsa, scene.root_1fc90f46.bsa
+### same directory as the master so texture paths relative to the master stay valid
+def shardPath( _bsaFile, _shardUUID):
+    return _bsaFile.parent / Path( _bsaFile.stem + '.' + _shardUUID + '.bsa')
+
+### an identical frame becomes a hardlink of the one before, or a copy where the filesystem has none
+### through a temp file so an existing output is replaced in one step
+def linkFrame( _sourceFile, _bsaFile):
+    tempFile = _bsaFile.with_name( _bsaFile.name + '.' + str( os.getpid()) + '.tmp')
+    tempFile.unlink( missing_ok = True)
+    try: os.link( _sourceFile, tempFile)
+    except OSError: shutil.copyfile( _sourceFile, tempFile)
+    os.replace( tempFile, _bsaFile)
+    return _bsaFile
+
+### shard worker process globals, the stage is opened and traversed once per worker, see OomerBatch.py
+shardConverter = False
+
+def initShardWorker( _usdFile, _args):
+    global shardConverter
+    with contextlib.redirect_stdout( io.StringIO()): ### missing textures were already reported by the parent
+        shardConverter = openConverter( _usdFile = _usdFile, _args = _args)
+
+def writeShardJob( _job):
+    timeCode, rootPath = _job
+    shardConverter.precisionStats.clear() ### per job, merged by the parent
+    shardConverter.progress = oomProgress.Progress() ### silent, its counts are merged by the parent
+    shardFile, changed = shardConverter.writeShard( timeCode, shardConverter.usdScene.stage.GetPrimAtPath( rootPath))
+    return shardFile, changed, shardConverter.precisionStats, shardConverter.progress.counts()
+
+### Open and traverse a usd file, ready to write frames
+def openConverter( _usdFile = False, _args = False):
+    usdScene = oomUsd.Reader( _usdFile = _usdFile, 
+                              _debug = _args.debug,
+                              _usda = _args.usda,
+                            )
+    ### USD can store both transform and mesh deformation animations
+    ### when no startFrame is defined, use frame 1
+    startFrame, endFrame, isSequence = frameRange( _args.start, _args.end)
+    usdScene.traverseScene() 
+    converter = Converter( _usdScene = usdScene, 
+                           _args = _args, 
+                           _isSequence = isSequence,
+                           _startFrame = startFrame,
+                           _endFrame = endFrame,
+                         )
+    converter.prepareTextures()
+    return converter
+
+### single file conversion, used by oomerusd2bella.py and batch workers, returns number of frames written
+def convertFile( _usdFile = False, _args = False):
+    converter = openConverter( _usdFile = Path( _usdFile), _args = _args)
+    return converter.writeFrames()
+
+### Writes one .bsa per timeCode from a traversed oomUsd.Reader
+### the per frame write order is expressed as a list of ( key, writer) jobs so that -watch
+### can re-run the writer of a single prim and patch its text into the previous output
+class Converter:
+    def __init__( self,
+                  _usdScene = False, # oomUsd.Reader, traverseScene() already called
+                  _args = False,     # argparse.Namespace from oomerusd2bella.py
+                  _isSequence = False,
+                  _startFrame = 1,
+                  _endFrame = 2,     # exclusive, python range style
+                ):
+        self.usdScene = _usdScene
+        self.args = _args
+        self.isSequence = _isSequence
+        self.startFrame = _startFrame
+        self.endFrame = _endFrame
+        self.precisionStats = {} ### -precisionreport, filled by SceneAscii.reportPrecision() across all frames
+        self.shards = {} ### -shard, top level prim -> prims written into its file, see shardPrims()
+        self.progress = oomProgress.Progress( _mode = getattr( _args, 'progress', 'off'), 
+                                              _label = getattr( _usdScene, 'file', ''),
+                                              _interval = getattr( _args, 'progressinterval', 2.0),
+                                            )
+
+    ### dedupe and stat textures, then swap in -texturemax proxies
+    def prepareTextures( self):
+        usdScene = self.usdScene
+        bsaDire = bsaPath( usdScene.file, self.startFrame, self.isSequence).parent
+        self.extractPackagedTextures()
+        for texture in usdScene.resolveTextures( _bsaDire = bsaDire):
+            print( 'MISSING texture:', texture[ 'file'], 'used by', len( texture[ 'shaders']), 'shaders')
+        textureMax = getattr( self.args, 'texturemax', 0)
+        if not textureMax or textureMax <= 0: return
+        import OomerTexture as oomTexture # Pillow only needed here
+        cacheDire = getattr( self.args, 'texturecache', False) or usdScene.file.parent / 'texture_cache'
+        proxyCache = oomTexture.ProxyCache( _cacheDire = cacheDire, _maxSize = textureMax)
+        sources = [ str( texture[ 'file']) for texture in usdScene.textures.values() if texture[ 'exists']]
+        sources += [ light[ 'textureFile'] for light in usdScene.lights.values() if light.get( 'textureFile')]
+        proxies = proxyCache.proxies( sources)
+        for texture in usdScene.textures.values():
+            proxy = proxies.get( str( texture[ 'file']))
+            if proxy: texture[ 'relPath'] = Path( os.path.relpath( proxy, bsaDire))
+        for light in usdScene.lights.values():
+            light[ 'proxy'] = proxies.get( light.get( 'textureFile'), False)
+        if usdScene.debug: print( 'texture proxies:', len( proxies), 'of', len( set( sources)), 'in', cacheDire)
+
+    ### .usdz textures resolve inside the package, copy the referenced ones out to a cache
+    def extractPackagedTextures( self):
+        usdScene = self.usdScene
+        packaged = [ str( uvTexture[ 'file']) for uvTexture in usdScene.uv_textures.values()]
+        packaged += [ light[ 'textureFile'] for light in usdScene.lights.values() if light.get( 'textureFile')]
+        packaged = [ file for file in packaged if '[' in file] ### cheap filter before asking Ar
+        if not packaged: return
+        import OomerUsdz as oomUsdz
+        cacheDire = getattr( self.args, 'usdzcache', False) or usdScene.file.parent / 'usdz_cache'
+        extracted = oomUsdz.extractTextures( _files = packaged, _cacheDire = cacheDire)
+        for uvTexture in usdScene.uv_textures.values():
+            if str( uvTexture[ 'file']) in extracted: 
+                uvTexture[ 'file'] = Path( extracted[ str( uvTexture[ 'file'])])
+        for light in usdScene.lights.values():
+            if light.get( 'textureFile') in extracted: 
+                light[ 'textureFile'] = extracted[ light[ 'textureFile']]
+        if usdScene.debug: print( 'usdz textures:', len( extracted), 'of', len( set( packaged)), 'in', cacheDire)
+
+    def openScene( self, 
+                   _timeCode = 1,
+                   _memoryFile = False,
+                   _bsaFile = False,   # defaults to bsaPath()
+                   _shardRoot = False, # -shard, uuid of the top level prim
+                   _stream = False,    # -serve, file like object written instead of the .bsa
+                 ):
+        bsa = oomBella.SceneAscii( _bsaFile = _bsaFile or bsaPath( self.usdScene.file, _timeCode, self.isSequence), 
+                                   _usdScene = self.usdScene, 
+                                   _colorDome = self.args.colordome and not _shardRoot,
+                                   _memoryFile = _memoryFile,
+                                   _precision = getattr( self.args, 'precision', 'balanced'),
+                                   _precisionReport = self.precisionStats if getattr( self.args, 'precisionreport', False) else False,
+                                   _writeQueue = getattr( self.args, 'writequeue', 8),
+                                   _shardRoot = _shardRoot,
+                                   _stream = _stream,
+                                 ) 
+        bsa.setTimeCode( _timeCode = _timeCode) 
+        return bsa
+
+    ### key is ( category, UsdPrim) for prim writers and ( category, False) for scene wide nodes
+    def frameJobs( self, 
+                   _bsa = False,
+                   _timeCode = 1,
+                 ):
+        usdScene = self.usdScene
+        args = self.args
+        jobs = []
+        _bsa.culled = set() ### rebuilt every call, -watch reuses the same SceneAscii
+        ### MESH 
+        ###=====
+        ### proxy and guide meshes are dropped before their geometry is read, their parents don't list them either
+        for prim in usdScene.meshes.keys():
+            if usdScene.meshes[ prim][ 'purpose'] in [ 'proxy', 'guide']:
+                _bsa.culled.add( oomUtil.uuidSanitize( prim.GetName(), _hashSeed = usdScene.stablePath( prim)))
+                continue
+            jobs.append( ( ( 'mesh', prim), functools.partial( self.writeMesh, _bsa, prim, _timeCode)))
+
+        ### LIGHTS 
+        ###=======
+        if not args.ignorelights:
+            jobs.append( ( ( 'renderFlags', False), _bsa.writeRenderFlags))
+            for prim in usdScene.lights.keys():
+                jobs.append( ( ( 'light', prim), functools.partial( _bsa.writeLight, _prim = prim)))
+
+        ### CAMERA
+        ###=======
+        ### without a usd camera oomerCamera frames the world bound, see SceneAscii.frameBound()
+        if not usdScene.cameras: 
+            jobs.append( ( ( 'oomerCamera', False), _bsa.writeOomerCamera))
+        for prim in usdScene.cameras.keys(): 
+            jobs.append( ( ( 'camera', prim), functools.partial( _bsa.writeCamera, prim)))
+
+        ### XFORM
+        ###======
+        for prim in usdScene.prototypes.keys():
+            jobs.append( ( ( 'prototype', prim), functools.partial( _bsa.writePrototype, _prim = prim)))
+        for prim in usdScene.xforms.keys():
+            jobs.append( ( ( 'xform', prim), functools.partial( _bsa.writeXform, 
+                                                                _prim = prim,
+                                                                _instanceUUID = usdScene.xforms[ prim][ 'instanceUUID'],
+                                                              )))
+        for prim in usdScene.scopes.keys():
+            jobs.append( ( ( 'scope', prim), functools.partial( _bsa.writeScope, _prim = prim)))
+
+        ### USDPREVIEWSURFACE
+        ###==================
+        if not args.ignorematerials:
+            for prim in usdScene.previewSurfaces.keys():  
+                jobs.append( ( ( 'previewSurface', prim), functools.partial( _bsa.writeUberMaterial, 
+                                                                             _prim = prim, 
+                                                                             _ignoreRoughness = args.ignoreroughness,
+                                                                           )))
+            for prim in usdScene.mtlxSurfaces.keys(): 
+                jobs.append( ( ( 'mtlxSurface', prim), functools.partial( _bsa.writeUberMaterialFromMaterialX, _prim = prim)))
+            for prim in usdScene.mtlxNodes.keys(): 
+                jobs.append( ( ( 'mtlxNode', prim), functools.partial( _bsa.writeMaterialXNodes, _prim = prim)))
+
+        ### USDUVTEXTURE
+        ###============= 
+        ### usd file string surrounded by @
+        ### one fileTexture per unique file, keyed by the first shader using it
+        for texture in usdScene.textures.values(): 
+            jobs.append( ( ( 'uvTexture', texture[ 'shaders'][ 0]), functools.partial( _bsa.writeShaderTexture, texture)))
+        for prim in usdScene.primitives.keys(): 
+            jobs.append( ( ( 'primitive', prim), functools.partial( _bsa.writePrimitive, _prim = prim)))
+        for prim in usdScene.instancers.keys():
+            jobs.append( ( ( 'instancer', prim), functools.partial( _bsa.writePointInstance, _prim = prim)))
+
+        # not sure how I can tell that a file is used as a normalmap
+        #for usd_prim in usdScene.uv_textures.keys(): # write out usd uv textures as bella file textures
+        #    bsa.write_normal_texture(   usd_prim, 
+        #                                str(usdScene.uv_textures[ usd_prim ][ 'file' ])[ 1:-1 ], 
+        #                            )
+        jobs.append( ( ( 'emitter', False), _bsa.writeEmitter2)) #hack
+        if getattr( args, 'cull', False) or getattr( args, 'frustum', False):
+            return self.cullJobs( _bsa, jobs, _timeCode)
+        return jobs
+
+    ### CULLING
+    ###========
+    ### -cull drops prims in invisible subtrees before any geometry is read, they are still traversed 
+    ### -frustum also drops meshes, primitives and point instancers whose world bound misses the usd camera
+    ### anything a kept prim points at ( instance targets, prototypes, materials) is kept whatever its visibility
+    ### parents skip the culled children, see SceneAscii.culled
+    def cullJobs( self, 
+                  _bsa = False,
+                  _jobs = [],
+                  _timeCode = 1,
+                ):
+        usdScene = self.usdScene
+        frustum = self.cameraFrustum( _timeCode) if getattr( self.args, 'frustum', False) else False
+        culled = {}
+        for key, writer in _jobs:
+            category, prim = key
+            if category not in [ 'mesh', 'xform', 'scope', 'primitive', 'instancer', 'light']: continue
+            if self.isInvisible( prim): 
+                culled[ prim] = 'invisible'
+            elif frustum and category in [ 'mesh', 'primitive', 'instancer'] and not prim.IsInPrototype():
+                if not frustum.Intersects( Gf.BBox3d( usdScene.worldBound( prim, _timeCode))): culled[ prim] = 'frustum'
+        keptPrims = [ key[ 1] for key, writer in _jobs if key[ 1] and key[ 1] not in culled]
+        for prim in self.primClosure( [ dependency for prim in keptPrims for dependency in self.primDependencies( prim)]):
+            culled.pop( prim, None)
+        _bsa.culled |= { oomUtil.uuidSanitize( prim.GetName(), _hashSeed = usdScene.stablePath( prim)) for prim in culled}
+        self.printCullReport( _jobs, culled, _timeCode)
+        return [ ( key, writer) for key, writer in _jobs if key[ 1] not in culled]
+
+    ### traversal flags meshes and xforms, other prims inherit from their parent
+    def isInvisible( self, _prim):
+        usdScene = self.usdScene
+        for record in [ usdScene.meshes.get( _prim), usdScene.xforms.get( _prim), usdScene.xforms.get( _prim.GetParent())]:
+            if record and record.get( 'isInvisible'): return True
+        return False
+
+    ### world space Gf.Frustum of the camera settings points at, the last one written
+    ### grown by -frustumpadding of the window on each side, clipping planes dropped since Bella ignores them
+    ### oomerCamera frames the whole world bound so there is nothing to cull without a usd camera
+    def cameraFrustum( self, _timeCode = 1):
+        if not self.usdScene.cameras: return False
+        cameraPrim = list( self.usdScene.cameras.keys())[ -1]
+        frustum = UsdGeom.Camera( cameraPrim).GetCamera( _timeCode).frustum
+        padding = getattr( self.args, 'frustumpadding', 0.1)
+        window = frustum.GetWindow()
+        frustum.SetWindow( Gf.Range2d( window.GetMin() - window.GetSize() * padding, window.GetMax() + window.GetSize() * padding))
+        frustum.SetNearFar( Gf.Range1d( 1e-6, 1e30))
+        return frustum
+
+    def printCullReport( self, _jobs, _culled, _timeCode):
+        counts = {}
+        for key, writer in _jobs:
+            category, prim = key
+            if category not in [ 'mesh', 'primitive', 'instancer']: continue
+            stats = counts.setdefault( category, { 'total': 0, 'invisible': 0, 'frustum': 0})
+            stats[ 'total'] += 1
+            if prim in _culled: stats[ _culled[ prim]] += 1
+        line = [ 'cull: frame', str( _timeCode)]
+        for category, stats in counts.items():
+            dropped = stats[ 'invisible'] + stats[ 'frustum']
+            line += [ category + ':', str( dropped), 'of', str( stats[ 'total']), 
+                      '( ' + str( round( 100.0 * dropped / max( 1, stats[ 'total']), 1)) + '%,', 
+                      str( stats[ 'invisible']), 'invisible,', str( stats[ 'frustum']), 'outside frustum)']
+        print( *line)
+
+    def writeMesh( self, 
+                   _bsa = False,
+                   _prim = False,
+                   _timeCode = 1,
+                 ):
+        usdScene = self.usdScene
+        try: 
+            meshChunks = self.readMeshChunks( _prim = _prim, _timeCode = _timeCode)
+        except:
+            if usdScene.debug: raise
+            return # same bypass as the in memory path below
+        if meshChunks:
+            try:
+                self.progress.addFaces( meshChunks.numFaces)
+                _bsa.writeMesh( _prim = _prim,
+                                _xformCache = usdScene.xform_cache,
+                                _subdivision = self.args.subdivision,
+                                _subsets = usdScene.meshes[ _prim].get( 'subsets', []),
+                                _meshChunks = meshChunks,
+                              )
+            finally:
+                meshChunks.close()
+            return
+        if usdScene.debug: 
+            print( 'usd mesh:', _prim)
+            npFaceVertexCount, \
+            npFaceVertexIndices, \
+            npPoints, \
+            npNormals, \
+            npTxcoords, \
+            subsets, \
+            = self.readMesh( _prim = _prim, _timeCode = _timeCode )
+        else:
+            try: # Bypass prims that crash with calls to pxr API 
+                npFaceVertexCount, \
+                npFaceVertexIndices, \
+                npPoints, \
+                npNormals, \
+                npTxcoords, \
+                subsets \
+                = self.readMesh( _prim = _prim, _timeCode = _timeCode)
+                if not isinstance( npFaceVertexCount, np.ndarray): 
+                    return # return var == False indicates BAD ( ie zero faces ) geometry .. skip
+            except:
+                if usdScene.debug: print( "FAIL:", _prim, 'ERROR')
+                return
+
+        ### isinstance(x,y) Python function to check if x is of object type y
+        if isinstance( npFaceVertexCount, np.ndarray): 
+            if usdScene.debug: print( '\tnpFaceVertexCount', len( npFaceVertexCount))
+        if isinstance( npFaceVertexIndices, np.ndarray):
+            if usdScene.debug: print( '\tnpFaceVertexIndices', len( npFaceVertexIndices))
+        if isinstance( npPoints, np.ndarray):
+            if usdScene.debug: print( '\tnpPoints', len( npPoints))
+        if isinstance( npNormals, np.ndarray):
+            if usdScene.debug: print( '\tnpNormals', len( npNormals))
+        if isinstance( npTxcoords, np.ndarray):
+            if usdScene.debug: print( '\tnpTxcoords', len( npTxcoords))
+
+        ### MATERIALS
+        ###==========
+        if not usdScene.meshes[ _prim][ 'instance']: ### TODO is this still appropriate to flag instances
+            self.progress.addFaces( len( npFaceVertexCount))
+            _bsa.writeMesh( _prim = _prim,
+                            _npVertexCount = npFaceVertexCount,
+                            _npVertexIndices = npFaceVertexIndices,
+                            _npPoints = npPoints,
+                            _npNormals = npNormals,
+                            _npTxcoords = npTxcoords,
+                            _xformCache = usdScene.xform_cache,
+                            _subdivision = self.args.subdivision,
+                            _subsets = subsets,
+                          )
+        else:
+            _bsa.writeInstance( _prim,
+                                usdScene.meshes[ _prim][ 'instance']
+                              )
+
+    ### -outofcore, oomOutOfCore.MeshChunks for a mesh above the face threshold, False keeps the in memory path
+    ### -lod decimates whole arrays and instances write no geometry, neither goes out of core
+    def readMeshChunks( self, 
+                        _prim = False,
+                        _timeCode = 1,
+                      ):
+        threshold = getattr( self.args, 'outofcore', 0)
+        if threshold <= 0 or getattr( self.args, 'lod', 0) > 0 or self.usdScene.meshes[ _prim][ 'instance']: return False
+        return self.usdScene.getMeshChunks( _prim = _prim, 
+                                            _timeCode = _timeCode, 
+                                            _threshold = threshold,
+                                            _chunkFaces = getattr( self.args, 'outofcorechunk', 100000),
+                                            _scratchDire = getattr( self.args, 'scratch', ''),
+                                          )
+
+    ### getMesh() arrays and GeomSubsets, decimated and cached by the Reader under -lod
+    def readMesh( self, 
+                  _prim = False,
+                  _timeCode = 1,
+                ):
+        usdScene = self.usdScene
+        lod = getattr( self.args, 'lod', 0)
+        if lod > 0: return usdScene.getMeshLod( _prim = _prim, _lod = lod, _timeCode = _timeCode)
+        npArrays = usdScene.getMesh( _prim = _prim, _timeCode = _timeCode)
+        return npArrays + ( usdScene.meshes[ _prim].get( 'subsets', []),)
+
+    ### Write bella ascii file for one frame
+    def writeFrame( self, _timeCode = 1):
+        bsa = self.openScene( _timeCode)
+        self.runJobs( bsa, self.frameJobs( bsa, _timeCode))
+        return bsa.bsaFile
+
+    ### -serve, one frame's text written into _stream, the .bsa path only anchors relative texture paths
+    def streamFrame( self, _timeCode = 1, _stream = False):
+        bsa = self.openScene( _timeCode, _stream = _stream)
+        self.runJobs( bsa, self.frameJobs( bsa, _timeCode))
+        return bsa.bsaFile
+
+    def runJobs( self, _bsa, _jobs):
+        try:
+            for key, writer in _jobs:
+                writer()
+                if key[ 1] is not False: self.progress.addPrims()
+        except BaseException:
+            _bsa.abort()
+            raise
+        _bsa.close( self.usdScene)
+
+    ### Write bella ascii file on each frame
+    ### with -resume or -manifest every written frame is recorded in the manifest, -resume skips the frames it still vouches for
+    ### -queue passes one chunk of timeCodes at a time, see OomerQueue.py
+    def writeFrames( self, _timeCodes = False):
+        manifest = self.openManifest() if getattr( self.args, 'resume', False) or getattr( self.args, 'manifest', False) else False
+        timeCodes = list( range( self.startFrame, self.endFrame, 1)) if _timeCodes is False else list( _timeCodes) # usd timecode starts on frame 1 not 0
+        frameCount = len( timeCodes)
+        if getattr( self.args, 'resume', False): 
+            timeCodes = [ timeCode for timeCode in timeCodes if not manifest.isCurrent( timeCode)]
+            print( 'resume:', frameCount - len( timeCodes), 'of', frameCount, 
+                   'frames current,', len( timeCodes), 'to write, manifest', manifest.file.name)
+        self.progress.expect( len( timeCodes))
+        if getattr( self.args, 'shard', False): 
+            self.writeShardedFrames( _timeCodes = timeCodes, _manifest = manifest)
+        else:
+            ### held poses and static stretches, a frame whose time varying inputs match the frame before is linked, not written
+            dedupe = self.isSequence and not getattr( self.args, 'nodedupe', False)
+            previous = ( False, False) ### ( fingerprint, bsa file)
+            deduped = 0
+            for timeCode in timeCodes:
+                fingerprint = oomManifest.frameFingerprint( self.usdScene, timeCode) if dedupe else False
+                if fingerprint and fingerprint == previous[ 0]:
+                    bsaFile = linkFrame( previous[ 1], bsaPath( self.usdScene.file, timeCode, self.isSequence))
+                    deduped += 1
+                else:
+                    bsaFile = self.writeFrame( timeCode)
+                    self.progress.addBytes( os.stat( bsaFile).st_size)
+                previous = ( fingerprint, bsaFile)
+                if manifest: manifest.record( timeCode, [ bsaFile])
+                self.progress.advance( timeCode)
+            if dedupe and len( timeCodes) > 1: 
+                print( 'dedupe:', deduped, 'of', len( timeCodes), 'frames identical to the frame before, linked instead of written')
+        if _timeCodes is False: self.progress.finish()
+        if self.precisionStats: self.printPrecisionReport()
+        return frameCount
+
+    def openManifest( self):
+        return oomManifest.Manifest( _file = oomManifest.manifestPath( self.usdScene.file, self.isSequence),
+                                     _stage = oomManifest.stageFingerprint( self.usdScene),
+                                     _options = oomManifest.outputOptions( self.args),
+                                     _compact = not getattr( self.args, 'queue', ''),
+                                   )
+
+    ### SHARDS
+    ###=======
+    ### -shard writes each top level prim of writeUsdRoot() into its own .bsa with a pool of worker processes
+    ### the master .bsa keeps settings, cameras, domes and the world, and references the shards
+    ### a shard is rewritten only when its text changes, unchanged shards keep their mtime for caching and transfer
+
+    ### top level prim -> set of prims its shard must contain, the same in the parent and every worker
+    ### a shard is self contained, bound materials, instance targets and prototypes are written into each shard using them
+    def shardPrims( self):
+        if self.shards: return self.shards
+        usdScene = self.usdScene
+        for rootPrim in usdScene.stage.GetPseudoRoot().GetChildren():
+            if oomUtil.uuidSanitize( rootPrim.GetName(), _hashSeed = usdScene.stablePath( rootPrim)) not in usdScene.rootPrims: continue
+            self.shards[ rootPrim] = self.primClosure( [ rootPrim])
+        return self.shards
+
+    ### subtrees of _prims plus everything they depend on, recursively
+    def primClosure( self, _prims):
+        prims = set()
+        pending = list( _prims)
+        while pending:
+            prim = pending.pop()
+            if prim in prims: continue
+            for subtreePrim in Usd.PrimRange( prim):
+                prims.add( subtreePrim)
+                pending += self.primDependencies( subtreePrim)
+        return prims
+
+    ### prims written outside of this prim's subtree that its Bella nodes point at
+    def primDependencies( self, _prim):
+        usdScene = self.usdScene
+        dependencies = []
+        if _prim.HasRelationship( 'material:binding'):
+            dependencies += [ usdScene.stage.GetPrimAtPath( sdfPath) for sdfPath in _prim.GetRelationship( 'material:binding').GetTargets()]
+        if _prim in usdScene.meshes and usdScene.meshes[ _prim][ 'instance']:
+            dependencies.append( usdScene.meshes[ _prim][ 'instance'])
+        if _prim in usdScene.prototype_instances:
+            dependencies.append( usdScene.prototype_instances[ _prim])
+        if _prim in usdScene.instancers:
+            dependencies += [ usdScene.stage.GetPrimAtPath( sdfPath) for sdfPath in usdScene.instancers[ _prim][ 'protoChildren'].GetTargets()]
+        return [ prim for prim in dependencies if prim]
+
+    ### settings references these, they can only live in the master
+    def isMasterJob( self, _key):
+        category, prim = _key
+        if category in [ 'camera', 'oomerCamera']: return True
+        return category == 'light' and prim.GetTypeName() == 'DomeLight'
+
+    ### a texture job is keyed by its first shader, any shader using the file pulls it into a shard
+    def jobPrims( self, _key):
+        category, prim = _key
+        if category == 'uvTexture':
+            for texture in self.usdScene.textures.values():
+                if texture[ 'shaders'][ 0] == prim: return texture[ 'shaders']
+        return [ prim]
+
+    ### scene wide nodes like renderFlags are small and written into every shard that may point at them
+    def shardJobs( self, _bsa, _timeCode, _prims):
+        return [ ( key, writer) for key, writer in self.frameJobs( _bsa, _timeCode) 
+                 if not self.isMasterJob( key) and ( not key[ 1] or any( prim in _prims for prim in self.jobPrims( key)))]
+
+    ### master keeps scene wide nodes and every prim no shard claimed, ie cameras and invisible top level prims
+    def masterJobs( self, _bsa, _timeCode):
+        claimed = set().union( *self.shardPrims().values())
+        return [ ( key, writer) for key, writer in self.frameJobs( _bsa, _timeCode) 
+                 if self.isMasterJob( key) or not key[ 1] or not any( prim in claimed for prim in self.jobPrims( key))]
+
+    ### returns ( shard .bsa, changed), written to a temp file and swapped in only when its text differs
+    def writeShard( self, _timeCode = 1, _rootPrim = False):
+        rootUUID = oomUtil.uuidSanitize( _rootPrim.GetName(), _hashSeed = self.usdScene.stablePath( _rootPrim))
+        shardFile = shardPath( bsaPath( self.usdScene.file, _timeCode, self.isSequence), rootUUID)
+        tempFile = shardFile.with_name( shardFile.name + '.' + str( os.getpid()) + '.tmp')
+        bsa = self.openScene( _timeCode, _bsaFile = tempFile, _shardRoot = rootUUID)
+        try:
+            self.runJobs( bsa, self.shardJobs( bsa, _timeCode, self.shardPrims()[ _rootPrim]))
+        except BaseException:
+            tempFile.unlink( missing_ok = True)
+            raise
+        changed = not shardFile.exists() or not filecmp.cmp( tempFile, shardFile, shallow = False)
+        if changed: 
+            self.progress.addBytes( os.stat( tempFile).st_size)
+            os.replace( tempFile, shardFile)
+        else: tempFile.unlink()
+        return str( shardFile), changed
+
+    def writeMaster( self, _timeCode = 1):
+        bsa = self.openScene( _timeCode)
+        for rootPrim in self.shardPrims():
+            rootUUID = oomUtil.uuidSanitize( rootPrim.GetName(), _hashSeed = self.usdScene.stablePath( rootPrim))
+            bsa.shards.append( ( rootUUID, shardPath( bsa.bsaFile, rootUUID)))
+        self.runJobs( bsa, self.masterJobs( bsa, _timeCode))
+        self.progress.addBytes( os.stat( bsa.bsaFile).st_size)
+        return bsa.bsaFile
+
+    ### shards of every frame go to one pool, masters are written here while the workers run
+    ### masters are written first, a frame goes in the manifest and the progress stream once its last shard is on disk
+    def writeShardedFrames( self, 
+                            _timeCodes = False, # defaults to every frame
+                            _manifest = False,  # oomManifest.Manifest
+                          ):
+        timeCodes = range( self.startFrame, self.endFrame) if _timeCodes is False else _timeCodes
+        shardJobs = [ ( timeCode, str( rootPrim.GetPath())) for timeCode in timeCodes for rootPrim in self.shardPrims()]
+        workers = getattr( self.args, 'workers', -1)
+        if workers < 0: workers = min( os.cpu_count() or 1, len( shardJobs))
+        pending = { timeCode: 0 for timeCode in timeCodes}
+        for timeCode, rootPath in shardJobs: pending[ timeCode] += 1
+        frameFiles = {}
+        results = []
+        def frameWritten( _timeCode, _shardFile = False):
+            if _shardFile:
+                frameFiles[ _timeCode].append( _shardFile)
+                pending[ _timeCode] -= 1
+            if pending[ _timeCode] > 0: return
+            if _manifest: _manifest.record( _timeCode, frameFiles[ _timeCode])
+            self.progress.advance( _timeCode)
+        if multiprocessing.current_process().daemon: workers = 0 ### batch pool workers can't fork children, shards are written in this process
+        if workers == 0 or len( shardJobs) < 2:
+            for timeCode in timeCodes: frameFiles[ timeCode] = [ self.writeMaster( timeCode)]
+            for timeCode in timeCodes: 
+                if not pending[ timeCode]: frameWritten( timeCode)
+            for timeCode, rootPath in shardJobs:
+                results.append( self.writeShard( timeCode, self.usdScene.stage.GetPrimAtPath( rootPath)))
+                frameWritten( timeCode, results[ -1][ 0])
+        else:
+            with multiprocessing.Pool( processes = workers, initializer = initShardWorker, initargs = ( self.usdScene.file, self.args)) as pool:
+                shardResults = pool.imap( writeShardJob, shardJobs) ### dispatched now, in job order, the masters below overlap the workers
+                for timeCode in timeCodes: frameFiles[ timeCode] = [ self.writeMaster( timeCode)]
+                for timeCode in timeCodes: 
+                    if not pending[ timeCode]: frameWritten( timeCode)
+                for ( timeCode, rootPath), ( shardFile, changed, precisionStats, counts) in zip( shardJobs, shardResults): ### re-raises the first worker error
+                    results.append( ( shardFile, changed))
+                    self.mergePrecisionStats( precisionStats)
+                    self.progress.merge( counts)
+                    frameWritten( timeCode, shardFile)
+        print( 'shards:', sum( changed for shardFile, changed in results), 'written,', 
+               sum( not changed for shardFile, changed in results), 'unchanged,', workers, 'workers')
+        return results
+
+    def mergePrecisionStats( self, _precisionStats):
+        for attribClass, stats in _precisionStats.items():
+            merged = self.precisionStats.setdefault( attribClass, { 'values': 0, 'bytes': 0, 'legacyBytes': 0, 'maxError': 0.0})
+            for count in [ 'values', 'bytes', 'legacyBytes']: merged[ count] += stats[ count]
+            merged[ 'maxError'] = max( merged[ 'maxError'], stats[ 'maxError'])
+
+    ### max error and bytes per attribute class against the old 6 significant digit output
+    def printPrecisionReport( self):
+        print( 'precision:', getattr( self.args, 'precision', 'balanced'))
+        for attribClass, stats in sorted( self.precisionStats.items()):
+            saving = 100.0 * ( stats[ 'legacyBytes'] - stats[ 'bytes']) / max( 1, stats[ 'legacyBytes'])
+            print( '  ' + f'{attribClass:10}', 
+                   str( stats[ 'values']), 'values',
+                   str( stats[ 'bytes']), 'bytes',
+                   '( ' + str( round( saving, 1)) + '% saved vs %g)',
+                   'max error', '%.3g' % stats[ 'maxError'])
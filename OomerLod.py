@@ -0,0 +1,134 @@
+### Mesh level of detail module
+'''
+MIT License
+
+Copyright (c) 2023 Harvey Fong
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+
+### -lod N writes decimated preview meshes, layout and lighting don't need every polygon
+### vertex clustering: snap every corner to a grid sized from the prim's extent and merge each cell to one point
+### corners in a cell are only merged when their uvs and normals also agree, so uv and hard normal seams survive
+### fully vectorized, one np.unique over the corner keys, no python loops over faces
+# - [x] triangles and quads from oomUsd.Reader.getMesh(), output is all triangles
+# - [x] GeomSubset face indices follow the surviving triangles
+# - [ ] quadric error placement of the cell point, the mean is good enough for previews
+
+## third party modules
+import numpy as np
+
+### grid cells along the longest axis of the extent, halved for each level
+def gridCells( _lod = 1):
+    return max( 1, 256 >> _lod)
+
+### cell edge length from a ( min, max) extent, degenerate extents fall back to one cell
+def cellSize( _extent, _lod = 1):
+    size = float( np.max( np.asarray( _extent[ 1], dtype = np.float64) - np.asarray( _extent[ 0], dtype = np.float64)))
+    if not size > 0: return 1.0
+    return size / gridCells( _lod)
+
+### corners of a cell are binned by their distance to the cell mean, a continuous uv or normal field
+### stays in bin 0 while the far side of a seam rounds to another bin
+def seamKeys( _npAttrib, _cellIds, _cellCounts, _binSize):
+    numCells = len( _cellCounts)
+    cellMean = np.stack( [ np.bincount( _cellIds, _npAttrib[ :, axis], numCells) for axis in range( _npAttrib.shape[ 1])], axis = 1) / _cellCounts[ :, None]
+    return np.round( ( _npAttrib - cellMean[ _cellIds]) / _binSize).astype( np.int64)
+
+### getMesh() arrays -> decimated arrays plus remapped subsets
+### points, normals and uvs are per corner ( unshared), polygons are vec4u with triangles as [ a b c c]
+def decimate( npVertexCount,       # int[] 3 or 4 per face
+              npVertexIndices,     # int[] 4 per face, into the corner arrays
+              npPoints,            # float64[ corners, 3]
+              npNormals = False,   # float64[ corners, 3] or False
+              npTxcoords = False,  # float64[ corners, 2] or False
+              _cellSize = 1.0,
+              _subsets = [],       # [ ( material uuid, uint32[] face indices)]
+            ):
+    npPoints = np.asarray( npPoints, dtype = np.float64)
+    faces = np.asarray( npVertexIndices, dtype = np.int64).reshape( -1, 4)
+    isQuad = np.asarray( npVertexCount) == 4
+    ### quads split along a c, remember the source face for subsets
+    triangles = np.concatenate( ( faces[ :, [ 0, 1, 2]], faces[ isQuad][ :, [ 0, 2, 3]]))
+    triangleFace = np.concatenate( ( np.arange( len( faces)), np.flatnonzero( isQuad)))
+
+    ### CLUSTER
+    ###========
+    gridCoords = np.floor( ( npPoints - npPoints.min( axis = 0)) / _cellSize).astype( np.int64)
+    gridDims = gridCoords.max( axis = 0) + 1
+    _, cellIds = np.unique( ( gridCoords[ :, 0] * gridDims[ 1] + gridCoords[ :, 1]) * gridDims[ 2] + gridCoords[ :, 2], return_inverse = True)
+    cellIds = cellIds.reshape( -1)
+    numCells = int( cellIds.max()) + 1
+    cellCounts = np.bincount( cellIds, minlength = numCells)
+    cellPoints = np.stack( [ np.bincount( cellIds, npPoints[ :, axis], numCells) for axis in range( 3)], axis = 1) / cellCounts[ :, None]
+
+    keys = [ cellIds[ :, None]]
+    hasTxcoords = isinstance( npTxcoords, np.ndarray) and len( npTxcoords) == len( npPoints)
+    hasNormals = isinstance( npNormals, np.ndarray) and len( npNormals) == len( npPoints)
+    if hasTxcoords:
+        npTxcoords = np.asarray( npTxcoords, dtype = np.float64)
+        uvRange = float( np.max( npTxcoords.max( axis = 0) - npTxcoords.min( axis = 0))) or 1.0
+        keys.append( seamKeys( npTxcoords, cellIds, cellCounts, 2.0 * uvRange / gridDims.max())) ### twice the uv span of a cell on an even layout
+    if hasNormals:
+        npNormals = np.asarray( npNormals, dtype = np.float64)
+        keys.append( seamKeys( npNormals, cellIds, cellCounts, 0.5)) ### hard edges past roughly 30 degrees stay split
+    _, clusterIds = np.unique( np.concatenate( keys, axis = 1), axis = 0, return_inverse = True)
+    clusterIds = clusterIds.reshape( -1)
+
+    ### FACES
+    ###======
+    ### a triangle survives when its corners land in three different cells, exact duplicates are written once
+    triangleCells = cellIds[ triangles]
+    keep = ( triangleCells[ :, 0] != triangleCells[ :, 1]) & ( triangleCells[ :, 1] != triangleCells[ :, 2]) & ( triangleCells[ :, 0] != triangleCells[ :, 2])
+    triangleClusters = clusterIds[ triangles[ keep]]
+    triangleFace = triangleFace[ keep]
+    if len( triangleClusters):
+        _, firstIndex = np.unique( np.sort( triangleClusters, axis = 1), axis = 0, return_index = True)
+        firstIndex.sort() ### keep authored order
+        triangleClusters = triangleClusters[ firstIndex]
+        triangleFace = triangleFace[ firstIndex]
+
+    ### only clusters used by a surviving triangle become points, shared between triangles
+    usedClusters, newCorners = np.unique( triangleClusters, return_inverse = True)
+    newCorners = newCorners.reshape( -1, 3)
+    remap = np.full( int( clusterIds.max()) + 1, -1, dtype = np.int64)
+    remap[ usedClusters] = np.arange( len( usedClusters))
+    cornerCluster = remap[ clusterIds] ### -1 for corners whose cluster was dropped
+    inUse = cornerCluster >= 0
+    cornerCluster = cornerCluster[ inUse]
+    clusterCounts = np.bincount( cornerCluster, minlength = len( usedClusters))
+    clusterCell = np.zeros( len( usedClusters), dtype = np.int64)
+    clusterCell[ cornerCluster] = cellIds[ inUse]
+    def clusterMean( _npAttrib):
+        return np.stack( [ np.bincount( cornerCluster, _npAttrib[ inUse, axis], len( usedClusters)) for axis in range( _npAttrib.shape[ 1])], axis = 1) / clusterCounts[ :, None]
+
+    outPoints = cellPoints[ clusterCell] ### every cluster of a cell shares its point, seams don't crack
+    outTxcoords = clusterMean( npTxcoords) if hasTxcoords else False
+    outNormals = False
+    if hasNormals:
+        outNormals = clusterMean( npNormals)
+        lengths = np.linalg.norm( outNormals, axis = 1)
+        outNormals /= np.where( lengths > 0, lengths, 1.0)[ :, None]
+
+    outVertexCount = np.full( len( newCorners), 3, dtype = np.int32)
+    outVertexIndices = np.concatenate( ( newCorners, newCorners[ :, 2:]), axis = 1).ravel()
+    outSubsets = [ ( material, np.flatnonzero( np.isin( triangleFace, np.asarray( indices, dtype = np.int64))).astype( np.uint32)) 
+                   for material, indices in _subsets]
+    return outVertexCount, outVertexIndices, outPoints, outNormals, outTxcoords, outSubsets
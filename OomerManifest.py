@@ -0,0 +1,160 @@
+### Output manifest module
+
+
+'''
+MIT License
+
+Copyright (c) 2023 Harvey Fong
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+### Records what each frame of an export was made from so -resume can skip frames that are still current
+### one json line per written frame, appended as soon as the frame is closed, the last line for a frame wins
+### a run that dies mid sequence leaves every finished frame recorded and at most one torn line, which is ignored
+### loading rewrites the file with one line per frame when reruns have stacked up superseded or torn lines
+### only written with -resume or -manifest, a plain export pays for neither the stage fingerprint nor the checksums
+###   { "frame": 1400, "stage": "<sha1>", "options": { ... }, "files": [ { "file": "scene_bsa/scene01400.bsa", "size": 123, "sha1": "<sha1>"}]}
+
+## standard modules
+from pathlib import Path  # used for cross platform file paths
+import hashlib
+import json
+import os
+
+### argparse options that don't change the .bsa text, -resume must not redo frames when only these differ
+transientOptions = [ 'usdfile', 'start', 'end', 'debug', 'watch', 'watchinterval', 'workers', 'writequeue', 'resume', 'precisionreport', 
+                     'queue', 'chunk', 'heartbeat', 'progress', 'progressinterval', 'outofcore', 'outofcorechunk', 'scratch', 'nodedupe',
+                     'serve', 'servememory', 'service', 'manifest']
+
+### scene.manifest.jsonl next to scene.bsa, scene_bsa.manifest.jsonl next to the scene_bsa sequence folder
+def manifestPath( _usdFile, _isSequence = False):
+    if _isSequence: return _usdFile.parent / Path( _usdFile.stem + '_bsa.manifest.jsonl')
+    return _usdFile.parent / Path( _usdFile.stem + '.manifest.jsonl')
+
+def fileChecksum( _file, _chunkSize = 1 << 20):
+    sha1 = hashlib.sha1()
+    with open( _file, 'rb') as file:
+        for chunk in iter( lambda: file.read( _chunkSize), b''): sha1.update( chunk)
+    return sha1.hexdigest()
+
+### every layer the stage composes plus every texture it resolved, by path, size and mtime
+### anonymous layers have no file, their text is hashed instead
+def stageFingerprint( _usdScene):
+    sha1 = hashlib.sha1()
+    for layer in sorted( _usdScene.stage.GetUsedLayers(), key = lambda layer: layer.identifier):
+        if layer.anonymous or not layer.realPath: 
+            sha1.update( layer.ExportToString().encode( 'utf-8'))
+            continue
+        try:
+            layerStat = os.stat( layer.realPath)
+            sha1.update( ( layer.realPath + ' ' + str( layerStat.st_size) + ' ' + str( layerStat.st_mtime_ns)).encode( 'utf-8'))
+        except OSError: ### layer opened from a path that is gone, never current
+            sha1.update( ( layer.realPath + ' missing').encode( 'utf-8'))
+    for texture in sorted( _usdScene.textures.values(), key = lambda texture: str( texture[ 'file'])):
+        sha1.update( ( str( texture[ 'file']) + ' ' + str( texture[ 'size']) + ' ' + str( texture[ 'mtime'])).encode( 'utf-8'))
+    return sha1.hexdigest()
+
+### values of every time varying attribute at _timeCode, equal fingerprints give equal .bsa text within one run
+### arrays, vectors and matrices are hashed through their buffers, other values through repr() which keeps full float precision
+def frameFingerprint( _usdScene, _timeCode = 1):
+    sha1 = hashlib.sha1()
+    for attribute in _usdScene.timeVaryingAttributes():
+        value = attribute.Get( time = _timeCode)
+        sha1.update( str( attribute.GetPath()).encode( 'utf-8'))
+        try: sha1.update( memoryview( value))
+        except TypeError: sha1.update( repr( value).encode( 'utf-8'))
+    return sha1.hexdigest()
+
+### converter options that shape the output, json types only so they compare equal after a round trip
+def outputOptions( _args):
+    return { key: value for key, value in sorted( vars( _args).items()) if key not in transientOptions and isinstance( value, ( str, int, float, bool, type( None)))}
+
+class Manifest:
+    def __init__( self, 
+                  _file = False,   # Path, see manifestPath()
+                  _stage = '',     # stageFingerprint()
+                  _options = {},   # outputOptions()
+                  _compact = True, # False while other -queue workers may be appending to the same file
+                ):
+        self.file = Path( _file)
+        self.stage = _stage
+        self.options = _options
+        self.checksums = {} ### ( device, inode, size, mtime) to sha1, a hardlinked frame is hashed once
+        self.entries = self.load()
+        if _compact: self.compact()
+
+    def load( self):
+        entries = {}
+        self.lineCount = 0
+        if not self.file.is_file(): return entries
+        for line in self.file.read_text().splitlines():
+            self.lineCount += 1
+            try:
+                entry = json.loads( line)
+                entries[ entry[ 'frame']] = entry
+            except ( ValueError, KeyError, TypeError): ### torn last line of an interrupted run
+                continue
+        return entries
+
+    ### the last line of each frame, through a temp file so a crash mid rewrite keeps the old manifest
+    def compact( self):
+        if self.lineCount == len( self.entries): return False
+        tempFile = self.file.with_name( self.file.name + '.' + str( os.getpid()) + '.tmp')
+        with open( tempFile, 'w') as file:
+            for timeCode in sorted( self.entries): file.write( json.dumps( self.entries[ timeCode], sort_keys = True) + '\n')
+        os.replace( tempFile, self.file)
+        self.lineCount = len( self.entries)
+        return True
+
+    def checksum( self, _file):
+        fileStat = os.stat( _file)
+        key = ( fileStat.st_dev, fileStat.st_ino, fileStat.st_size, fileStat.st_mtime_ns)
+        if key not in self.checksums: self.checksums[ key] = fileChecksum( _file)
+        return self.checksums[ key]
+
+    ### same stage, same options and every file still on disk with the recorded size and checksum
+    def isCurrent( self, _timeCode):
+        entry = self.entries.get( _timeCode)
+        if not entry or entry.get( 'stage') != self.stage or entry.get( 'options') != self.options: return False
+        for record in entry.get( 'files', []):
+            outputFile = self.file.parent / record[ 'file']
+            try:
+                if os.stat( outputFile).st_size != record[ 'size']: return False ### cheap check before hashing
+            except OSError:
+                return False
+            if fileChecksum( outputFile) != record[ 'sha1']: return False
+        return bool( entry.get( 'files'))
+
+    def record( self, _timeCode, _files = []):
+        files = []
+        for outputFile in _files:
+            files.append( { 'file': Path( os.path.relpath( outputFile, self.file.parent)).as_posix(),
+                            'size': os.stat( outputFile).st_size,
+                            'sha1': self.checksum( outputFile),
+                          })
+        entry = { 'frame': _timeCode, 'stage': self.stage, 'options': self.options, 'files': files}
+        self.entries[ _timeCode] = entry
+        with open( self.file, 'a+b') as file: 
+            if file.tell() > 0: ### a torn line from an interrupted run gets its own line so the new entry parses
+                file.seek( -1, os.SEEK_END)
+                if file.read( 1) != b'\n': file.write( b'\n')
+            file.write( ( json.dumps( entry, sort_keys = True) + '\n').encode( 'utf-8'))
+        self.lineCount += 1
+        return entry
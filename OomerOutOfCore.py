@@ -0,0 +1,139 @@
+### Out-of-core mesh module
+
+
+'''
+MIT License
+
+Copyright (c) 2023 Harvey Fong
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+
+### -outofcore, meshes above a face threshold are written a face chunk at a time
+### photogrammetry and terrain meshes run to hundreds of millions of faces, getMesh()'s unshared arrays and the
+### formatted text of each payload are several times the authored data and do not fit in memory
+###   triangulation runs once per chunk, its corner map and face counts spill to memory mapped scratch files
+###   polygons, points, normals and uvs are then gathered and formatted a chunk at a time straight into the .bsa
+### peak memory is the authored VtArrays plus one chunk, the scratch pages are file backed and the OS evicts them freely
+# - [x] output is identical to getMesh() + SceneAscii.writeMesh(), -outofcore only changes memory use
+# - [x] scratch files are unlinked once mapped on posix, a killed worker leaves nothing behind
+# - [ ] authored arrays still come whole from USD, pxr has no ranged attribute reads
+# - [ ] -lod decimates whole arrays, lod levels of a mesh above the threshold stay in memory
+
+## standard modules
+import os
+import tempfile
+
+## third party modules
+import numpy as np
+
+## oomer modules
+import OomerUtil as oomUtil
+
+### np.memmap of _shape in a new file under _scratchDire, system temp dir when empty
+def scratchArray( _scratchDire = '', _dtype = np.int64, _shape = 1, _suffix = '.scratch'):
+    handle, scratchFile = tempfile.mkstemp( prefix = 'oomer_', suffix = _suffix, dir = _scratchDire or None)
+    os.close( handle)
+    npArray = np.memmap( scratchFile, dtype = _dtype, mode = 'w+', shape = _shape)
+    try: os.remove( scratchFile) ### the mapping keeps the pages, windows refuses and close() retries
+    except OSError: return npArray, scratchFile
+    return npArray, False
+
+class MeshChunks:
+    def __init__( self,
+                  _faceVertexCounts = False,       # authored, numpy views from oomUsd.npView()
+                  _faceVertexIndices = False,
+                  _points = False,
+                  _txcoords = False,
+                  _txcoordIndices = False,
+                  _normals = False,
+                  _normalIndices = False,
+                  _chunkFaces = 100000,            # authored faces per chunk, its formatted text dominates peak memory
+                  _scratchDire = '',
+                ):
+        self.faceVertexIndices = _faceVertexIndices
+        self.points = _points
+        self.txcoords = _txcoords
+        self.txcoordIndices = _txcoordIndices
+        self.normals = _normals
+        self.normalIndices = _normalIndices
+        self.scratchFiles = []
+
+        ### sizes first, the scratch files are allocated whole
+        authoredSpans = [ ( faceStart, min( faceStart + max( 1, _chunkFaces), _faceVertexCounts.size)) for faceStart in range( 0, _faceVertexCounts.size, max( 1, _chunkFaces))]
+        self.numFaces = 0
+        self.numCorners = 0
+        for faceStart, faceEnd in authoredSpans:
+            npCounts = _faceVertexCounts[ faceStart:faceEnd].astype( np.int64)
+            self.numFaces += int( np.where( npCounts > 4, npCounts - 2, 1).sum())
+            self.numCorners += int( np.where( npCounts > 4, 3 * ( npCounts - 2), npCounts).sum())
+
+        self.cornerMap, scratchFile = scratchArray( _scratchDire, np.int64, max( 1, self.numCorners), '.corners')
+        self.scratchFiles.append( scratchFile)
+        self.faceCounts, scratchFile = scratchArray( _scratchDire, np.int8, max( 1, self.numFaces), '.counts')
+        self.scratchFiles.append( scratchFile)
+
+        ### ( faceStart, faceEnd, cornerStart, cornerEnd) of every chunk, after triangulation
+        self.spans = []
+        authoredCorner = faceStart = cornerStart = 0
+        for authoredStart, authoredEnd in authoredSpans:
+            npCounts = _faceVertexCounts[ authoredStart:authoredEnd]
+            newVertexCounts, cornerMap = oomUtil.triangulatedCorners( npCounts, _cornerStart = authoredCorner)
+            self.faceCounts[ faceStart:faceStart + newVertexCounts.size] = newVertexCounts
+            self.cornerMap[ cornerStart:cornerStart + cornerMap.size] = cornerMap
+            self.spans.append( ( faceStart, faceStart + newVertexCounts.size, cornerStart, cornerStart + cornerMap.size))
+            authoredCorner += int( npCounts.sum( dtype = np.int64))
+            faceStart += newVertexCounts.size
+            cornerStart += cornerMap.size
+
+    ### Bella vec4u polygons, tris [a,b,c,c] and quads [a,b,c,d] over unshared corners, see oomUsd.Reader.getMesh()
+    def polygonChunks( self):
+        for faceStart, faceEnd, cornerStart, cornerEnd in self.spans:
+            npCounts = self.faceCounts[ faceStart:faceEnd].astype( np.int64)
+            npStarts = cornerStart + np.concatenate( ( [ 0], np.cumsum( npCounts)[ :-1]))
+            npPolygons = npStarts[ :, None] + np.array( [ 0, 1, 2, 2])
+            npPolygons[ :, 3] += npCounts == 4
+            yield npPolygons
+
+    def vertexIndices( self, _cornerStart, _cornerEnd):
+        return self.faceVertexIndices[ self.cornerMap[ _cornerStart:_cornerEnd]]
+
+    def pointChunks( self):
+        for faceStart, faceEnd, cornerStart, cornerEnd in self.spans:
+            yield self.points[ self.vertexIndices( cornerStart, cornerEnd)]
+
+    ### same three cases as getMesh(), explicit indices, one value per corner, or one value per point
+    def attributeChunks( self, _values, _explicitIndices):
+        for faceStart, faceEnd, cornerStart, cornerEnd in self.spans:
+            if _explicitIndices.size: 
+                yield _values[ _explicitIndices[ self.cornerMap[ cornerStart:cornerEnd]]]
+            elif len( _values) == self.numCorners:
+                yield _values[ cornerStart:cornerEnd]
+            else:
+                yield _values[ self.vertexIndices( cornerStart, cornerEnd)]
+
+    def normalChunks( self): return self.attributeChunks( self.normals, self.normalIndices)
+    def txcoordChunks( self): return self.attributeChunks( self.txcoords, self.txcoordIndices)
+
+    def close( self):
+        self.cornerMap = self.faceCounts = False ### drops the mappings
+        for scratchFile in self.scratchFiles:
+            if scratchFile and os.path.exists( scratchFile): os.remove( scratchFile)
+        self.scratchFiles = []
@@ -0,0 +1,146 @@
+### Progress reporting module
+
+
+'''
+MIT License
+
+Copyright (c) 2023 Harvey Fong
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+
+### -progress human|json streams frames done, prims, faces per second, MB written per second and ETA to stderr
+### stdout keeps the regular messages, so a farm dashboard can read the json lines from stderr alone
+### a line goes out for every finished unit ( frame, or file in batch mode) and at most every -progressinterval seconds in between,
+### a worker that stops producing lines has stalled
+###   {"event": "frame", "unit": "frames", "done": 12, "total": 40, "frame": 12, "prims": 1234, "faces": 2100000, "bytes": 45300000,
+###    "elapsed": 10.2, "facesPerSecond": 205882.4, "mbPerSecond": 4.44, "eta": 23.8, "worker": "host.pid", "file": "shot.usd"}
+### counters run whatever the mode, shard and batch workers return theirs to the parent with counts() and it merge()s them
+
+## standard modules
+import json
+import os
+import socket
+import sys
+import time
+
+class Progress:
+    def __init__( self,
+                  _mode = 'off',     # off, human or json
+                  _unit = 'frames',  # what done and total count, files in batch mode
+                  _label = '',       # usd file, in every json line
+                  _interval = 2.0,   # seconds between tick lines inside a long unit
+                  _stream = False,   # defaults to sys.stderr
+                ):
+        self.mode = _mode
+        self.unit = _unit
+        self.label = _label
+        self.interval = _interval
+        self.stream = _stream or sys.stderr
+        self.worker = socket.gethostname() + '.' + str( os.getpid())
+        self.startTime = time.perf_counter()
+        self.lastReport = self.startTime
+        self.total = 0
+        self.done = 0
+        self.frames = 0
+        self.prims = 0
+        self.faces = 0
+        self.bytes = 0
+
+    ### units are announced as they are planned, -resume and -queue add theirs chunk by chunk
+    def expect( self, _units = 0):
+        self.total += _units
+
+    def addPrims( self, _prims = 1):
+        self.prims += _prims
+        self.tick()
+
+    def addFaces( self, _faces = 0):
+        self.faces += _faces
+
+    def addBytes( self, _bytes = 0):
+        self.bytes += _bytes
+
+    def counts( self):
+        return { 'frames': self.frames, 'prims': self.prims, 'faces': self.faces, 'bytes': self.bytes}
+
+    def merge( self, _counts = {}):
+        self.frames += _counts.get( 'frames', 0)
+        self.prims += _counts.get( 'prims', 0)
+        self.faces += _counts.get( 'faces', 0)
+        self.bytes += _counts.get( 'bytes', 0)
+
+    ### one frame, or one batch file, is on disk
+    def advance( self, _frame = False, _units = 1):
+        self.done += _units
+        if self.unit == 'frames': self.frames += _units
+        self.report( 'frame' if self.unit == 'frames' else 'file', _frame)
+
+    def tick( self):
+        if self.mode == 'off' or time.perf_counter() - self.lastReport < self.interval: return
+        self.report( 'tick')
+
+    def finish( self):
+        self.report( 'done')
+
+    def snapshot( self, _event = 'tick', _frame = False):
+        elapsed = time.perf_counter() - self.startTime
+        eta = elapsed / self.done * max( 0, self.total - self.done) if self.done else None
+        state = { 'event': _event, 'unit': self.unit, 'done': self.done, 'total': self.total}
+        if _frame is not False: state[ 'frame'] = _frame
+        state.update( self.counts())
+        state.update( { 'elapsed': round( elapsed, 3), 
+                        'facesPerSecond': round( self.faces / max( elapsed, 1e-9), 1),
+                        'mbPerSecond': round( self.bytes / 1e6 / max( elapsed, 1e-9), 3),
+                        'eta': None if eta is None else round( eta, 1),
+                        'worker': self.worker,
+                        'file': str( self.label),
+                      })
+        return state
+
+    def report( self, _event = 'tick', _frame = False):
+        self.lastReport = time.perf_counter()
+        if self.mode == 'off': return
+        state = self.snapshot( _event, _frame)
+        if self.mode == 'json': line = json.dumps( state)
+        else: line = self.humanLine( state)
+        print( line, file = self.stream, flush = True)
+
+    def humanLine( self, _state):
+        line = 'progress: ' + str( _state[ 'done']) + '/' + str( _state[ 'total']) + ' ' + _state[ 'unit']
+        if _state[ 'total']: line += f" {100.0 * _state[ 'done'] / _state[ 'total']:5.1f}%"
+        line += ' ' + str( _state[ 'prims']) + ' prims'
+        line += ' ' + formatCount( _state[ 'facesPerSecond']) + f" faces/s {_state[ 'mbPerSecond']:.1f} MB/s"
+        line += ' eta ' + ( '?' if _state[ 'eta'] is None else formatSeconds( _state[ 'eta']))
+        if _state[ 'event'] == 'tick': line += ' ( in progress)'
+        if _state[ 'event'] == 'done': line += ' ( done in ' + formatSeconds( _state[ 'elapsed']) + ')'
+        return line
+
+def formatCount( _count):
+    if _count >= 1e6: return f'{_count / 1e6:.2f}M'
+    if _count >= 1e3: return f'{_count / 1e3:.1f}k'
+    return str( int( round( _count)))
+
+def formatSeconds( _seconds):
+    minutes, seconds = divmod( int( round( _seconds)), 60)
+    hours, minutes = divmod( minutes, 60)
+    if hours: return str( hours) + 'h' + str( minutes).zfill( 2) + 'm' + str( seconds).zfill( 2) + 's'
+    if minutes: return str( minutes) + 'm' + str( seconds).zfill( 2) + 's'
+    return str( seconds) + 's'
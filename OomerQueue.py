@@ -0,0 +1,173 @@
+### Shared filesystem work queue module
+
+
+'''
+MIT License
+
+Copyright (c) 2023 Harvey Fong
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+
+### -queue spreads one frame range over any number of oomerusd2bella processes on machines sharing a job directory
+### no scheduler or service, the directory is the queue
+###   f00001-00010.lock   claimed, created with O_EXCL so exactly one worker wins, touched every heartbeat / 4 seconds
+###   f00001-00010.done   all frames of the chunk are on disk, written after the frames and before the lock is removed
+### a lock not touched for -heartbeat seconds belongs to a dead worker, it is renamed away ( atomic, one reclaimer wins) and reclaimed
+### lock age is measured against the job directory's own clock so nodes with skewed clocks agree
+# - [x] every worker derives the same chunk names from -start, -end and -chunk
+# - [x] a stalled worker that wakes after its chunk was reclaimed only removes a lock it still owns
+# - [ ] per chunk manifest, appends from many nodes to one manifest rely on the filesystem's O_APPEND
+
+## standard modules
+from pathlib import Path  # used for cross platform file paths
+import os
+import socket
+import threading
+import time
+
+### [ ( 'f00001-00010', [ 1, 2, .. 10]), ..], _endFrame exclusive like Converter.endFrame
+def frameChunks( _startFrame = 1, _endFrame = 2, _chunkSize = 10):
+    chunks = []
+    for chunkStart in range( _startFrame, _endFrame, max( 1, _chunkSize)):
+        timeCodes = list( range( chunkStart, min( chunkStart + max( 1, _chunkSize), _endFrame)))
+        chunks.append( ( 'f' + str( timeCodes[ 0]).zfill( 5) + '-' + str( timeCodes[ -1]).zfill( 5), timeCodes))
+    return chunks
+
+class WorkQueue:
+    def __init__( self,
+                  _jobDire = False,    # shared directory, created if missing
+                  _chunks = [],        # frameChunks()
+                  _heartbeat = 60.0,   # seconds without a touch before a lock is reclaimed
+                  _workerName = False, # defaults to host.pid
+                ):
+        self.jobDire = Path( _jobDire)
+        self.jobDire.mkdir( parents = True, exist_ok = True)
+        self.chunks = _chunks
+        self.heartbeat = _heartbeat
+        self.interval = max( 0.01, _heartbeat / 4) ### touch and poll period
+        self.workerName = _workerName or socket.gethostname() + '.' + str( os.getpid())
+        self.written = []   ### chunk names this worker completed
+        self.reclaimed = [] ### chunk names this worker took from a dead one
+        self.beating = {}   ### chunk name -> threading.Event that stops its heartbeat thread
+
+    def lockFile( self, _chunkName): return self.jobDire / ( _chunkName + '.lock')
+    def doneFile( self, _chunkName): return self.jobDire / ( _chunkName + '.done')
+
+    ### mtime the shared filesystem gives a file touched now, lock ages are compared against it rather than time.time()
+    def directoryTime( self):
+        clockFile = self.jobDire / ( '.clock.' + self.workerName)
+        clockFile.touch()
+        return os.stat( clockFile).st_mtime
+
+    def pending( self):
+        return [ ( chunkName, timeCodes) for chunkName, timeCodes in self.chunks if not self.doneFile( chunkName).exists()]
+
+    def claim( self, _chunkName):
+        for attempt in range( 2): ### second attempt only after a stale lock was moved away
+            try:
+                lockHandle = os.open( self.lockFile( _chunkName), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if attempt == 0 and self.reclaim( _chunkName): continue
+                return False
+            with os.fdopen( lockHandle, 'w') as lockFile: lockFile.write( self.workerName + '\n')
+            if self.doneFile( _chunkName).exists(): ### finished by the previous holder between pending() and here
+                self.release( _chunkName)
+                return False
+            self.startHeartbeat( _chunkName)
+            return True
+        return False
+
+    def reclaim( self, _chunkName):
+        lockFile = self.lockFile( _chunkName)
+        try:
+            if self.directoryTime() - os.stat( lockFile).st_mtime < self.heartbeat: return False
+        except FileNotFoundError: ### released since the O_EXCL failed, free to claim
+            return True
+        staleFile = lockFile.with_name( lockFile.name + '.' + self.workerName + '.stale')
+        try:
+            os.rename( lockFile, staleFile)
+        except FileNotFoundError: ### another worker reclaimed it first
+            return False
+        if self.directoryTime() - os.stat( staleFile).st_mtime < self.heartbeat: ### a fresh lock replaced the stale one after our check, put it back
+            try:
+                os.link( staleFile, lockFile)
+            except FileExistsError:
+                pass
+            staleFile.unlink()
+            return False
+        print( 'queue: reclaimed', _chunkName, 'from', staleFile.read_text().strip(), flush = True)
+        staleFile.unlink()
+        self.reclaimed.append( _chunkName)
+        return True
+
+    def startHeartbeat( self, _chunkName):
+        stopEvent = threading.Event()
+        self.beating[ _chunkName] = stopEvent
+        def beat():
+            while not stopEvent.wait( self.interval):
+                try:
+                    os.utime( self.lockFile( _chunkName))
+                except FileNotFoundError:
+                    return
+        threading.Thread( target = beat, name = 'heartbeat-' + _chunkName, daemon = True).start()
+
+    ### the lock is only removed if it is still ours, a reclaimer may own it by now
+    def release( self, _chunkName):
+        stopEvent = self.beating.pop( _chunkName, False)
+        if stopEvent: stopEvent.set()
+        lockFile = self.lockFile( _chunkName)
+        try:
+            if lockFile.read_text().strip() == self.workerName: lockFile.unlink()
+        except FileNotFoundError:
+            pass
+
+    def complete( self, _chunkName, _timeCodes = []):
+        doneFile = self.doneFile( _chunkName)
+        tempFile = doneFile.with_name( doneFile.name + '.' + self.workerName + '.tmp')
+        tempFile.write_text( self.workerName + ' ' + ' '.join( str( timeCode) for timeCode in _timeCodes) + '\n')
+        os.replace( tempFile, doneFile)
+        self.written.append( _chunkName)
+        self.release( _chunkName)
+
+    ### claim, write and complete chunks until every chunk is done
+    ### when everything left is held by live workers, wait, one of them may die
+    def run( self, _writeChunk = False): # callable taking a list of timeCodes
+        while True:
+            pending = self.pending()
+            if not pending: break
+            for chunkName, timeCodes in pending:
+                if not self.claim( chunkName): continue
+                try:
+                    _writeChunk( timeCodes)
+                except BaseException:
+                    self.release( chunkName)
+                    raise
+                self.complete( chunkName, timeCodes)
+                break
+            else:
+                time.sleep( self.interval)
+        ( self.jobDire / ( '.clock.' + self.workerName)).unlink( missing_ok = True)
+        return self.written
+
+    def printSummary( self):
+        frames = sum( len( timeCodes) for chunkName, timeCodes in self.chunks if chunkName in self.written)
+        print( 'queue:', self.workerName, 'wrote', len( self.written), 'of', len( self.chunks), 'chunks (', frames, 'frames),', 
+               len( self.reclaimed), 'reclaimed from dead workers')
@@ -0,0 +1,310 @@
+### Local conversion service module
+
+
+'''
+MIT License
+
+Copyright (c) 2023 Harvey Fong
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+
+### -serve keeps one process running on localhost so pipeline tools stop paying for interpreter startup, the pxr import,
+### Usd.Stage.Open and traversal on every conversion
+###   POST /convert   { "usdfile": "/abs/shot.usd", "frame": 1, "start": 0, "end": 0, "options": { "precision": "compact"}}
+###                   streams the .bsa text back chunked, X-Oomer-Bsa is its path relative to the usd file, X-Oomer-Cache hit, miss or reload
+###   GET /status     cached stages, their estimated size and hits, request counts
+### traversed converters are kept per usd file, sequence flag and output options, least recently used first
+### their stages live in a Usd.StageCache, converters with different options share one stage
+### entries are evicted oldest first once their estimated memory passes -servememory, a stage leaves the cache with its last entry
+### a request whose layers or textures changed on disk reloads the stage and traverses it again, see oomManifest.stageFingerprint()
+### requests are served one at a time, pxr stages and the converters are not shared between threads
+### the client half, -service URL, imports no pxr so a pipeline call costs little more than the request
+# - [x] a failure mid frame drops the connection without the last chunk, clients never mistake a partial .bsa for a whole one
+# - [ ] unix socket transport, http.server only binds tcp
+# - [ ] -shard, -queue and -resume are handled client side by local conversions only
+
+## standard modules
+from pathlib import Path  # used for cross platform file paths
+import argparse
+import collections
+import gc
+import http.client
+import http.server
+import json
+import os
+import shutil
+import time
+import traceback
+import urllib.error
+import urllib.request
+
+## oomer modules
+import OomerManifest as oomManifest # no pxr import
+
+### server globals, set by Service() so the client never imports pxr
+Usd = False
+oomConvert = False
+
+### 'host:port' or 'port', localhost unless a host is given
+def parseAddress( _address = ''):
+    host, _, port = str( _address).rpartition( ':')
+    return host or '127.0.0.1', int( port or 8765)
+
+### resident set size of this process, False where /proc is missing and callers fall back to layer sizes
+def residentBytes():
+    try:
+        with open( '/proc/self/statm') as statm: return int( statm.read().split()[ 1]) * os.sysconf( 'SC_PAGE_SIZE')
+    except ( OSError, ValueError, AttributeError): return False
+
+### text in, http/1.1 chunks of _chunkSize bytes out, the terminating chunk is the handler's to send
+class ChunkedStream:
+    def __init__( self, 
+                  _wfile = False,        # socket file of the request handler
+                  _chunkSize = 1 << 20,
+                ):
+        self.wfile = _wfile
+        self.chunkSize = _chunkSize
+        self.parts = []
+        self.partsSize = 0
+        self.bytes = 0
+
+    def write( self, _text):
+        data = _text.encode( 'utf-8')
+        self.parts.append( data)
+        self.partsSize += len( data)
+        if self.partsSize >= self.chunkSize: self.flush()
+        return len( _text)
+
+    def flush( self):
+        if not self.parts: return
+        data = b''.join( self.parts)
+        self.wfile.write( b'%x\r\n' % len( data) + data + b'\r\n')
+        self.bytes += len( data)
+        self.parts = []
+        self.partsSize = 0
+
+    def close( self): self.flush()
+
+class Service:
+    def __init__( self, 
+                  _args = False,       # argparse.Namespace of the -serve command, defaults for every request
+                  _memoryBudget = 2048, # MB of cached stages and traversals
+                ):
+        global Usd, oomConvert
+        import OomerConvert as oomConvert ### pxr + numpy import paid once for the life of the service
+        from pxr import Usd
+        self.args = _args
+        self.memoryBudget = _memoryBudget * ( 1 << 20)
+        self.stageCache = Usd.StageCache()
+        self.entries = collections.OrderedDict() ### key -> { 'file', 'converter', 'fingerprint', 'bytes', 'hits'}, least recently used first
+        self.stats = { 'requests': 0, 'hit': 0, 'miss': 0, 'reload': 0, 'evictions': 0, 'failed': 0}
+
+    ### the service's own args with the request's usd file, frame range and output options, transient options are ignored
+    def requestArgs( self, _request):
+        args = argparse.Namespace( **vars( self.args))
+        options = _request.get( 'options', {})
+        unknown = [ key for key in options if not hasattr( args, key)]
+        if unknown: raise ValueError( 'unknown options ' + ', '.join( sorted( unknown)))
+        for key, value in oomManifest.outputOptions( argparse.Namespace( **options)).items(): setattr( args, key, value)
+        args.usdfile = str( Path( _request[ 'usdfile']).resolve())
+        args.start = int( _request.get( 'start', 0))
+        args.end = int( _request.get( 'end', 0))
+        args.shard = False ### one frame, one stream
+        args.progress = 'off'
+        usdFile = Path( args.usdfile)
+        if not usdFile.is_file(): raise FileNotFoundError( args.usdfile + ' does not exist')
+        if not usdFile.suffix in [ '.usd', '.usdc', '.usda', '.usdz']: raise ValueError( args.usdfile + ' is not a .usd, .usdc, .usda or .usdz file')
+        return args
+
+    ### cached converter for _args, ( converter, 'hit' | 'miss' | 'reload')
+    def converter( self, _args):
+        startFrame, endFrame, isSequence = oomConvert.frameRange( _args.start, _args.end)
+        key = json.dumps( [ _args.usdfile, isSequence, oomManifest.outputOptions( _args)], sort_keys = True)
+        status = 'miss'
+        entry = self.entries.get( key)
+        if entry:
+            if oomManifest.stageFingerprint( entry[ 'converter'].usdScene) == entry[ 'fingerprint']:
+                self.entries.move_to_end( key)
+                entry[ 'hits'] += 1
+                return entry[ 'converter'], 'hit'
+            stage = entry[ 'converter'].usdScene.stage
+            stage.Reload() ### layers saved since, every converter on this stage traverses again
+            for staleKey in [ staleKey for staleKey, staleEntry in self.entries.items() if staleEntry[ 'converter'].usdScene.stage == stage]:
+                del self.entries[ staleKey]
+            status = 'reload'
+        residentBefore = residentBytes()
+        with Usd.StageCacheContext( self.stageCache): ### Usd.Stage.Open() in the Reader finds or fills the cache
+            converter = oomConvert.openConverter( _usdFile = Path( _args.usdfile), _args = _args)
+        residentAfter = residentBytes()
+        layerBytes = sum( os.path.getsize( layer.realPath) for layer in converter.usdScene.stage.GetUsedLayers() if layer.realPath and os.path.isfile( layer.realPath))
+        self.entries[ key] = { 'file': _args.usdfile,
+                               'converter': converter,
+                               'fingerprint': oomManifest.stageFingerprint( converter.usdScene),
+                               'bytes': max( layerBytes, residentAfter - residentBefore if residentBefore and residentAfter else 0),
+                               'hits': 0,
+                               'residentBefore': residentBefore, ### until settle(), the first frame's caches count too
+                             }
+        self.evict()
+        return converter, status
+
+    ### after a converter's first frame, its estimate grows to everything the process kept since it was opened
+    def settle( self, _converter):
+        for entry in self.entries.values():
+            if entry[ 'converter'] is not _converter or 'residentBefore' not in entry: continue
+            residentBefore = entry.pop( 'residentBefore')
+            residentAfter = residentBytes()
+            if residentBefore and residentAfter: entry[ 'bytes'] = max( entry[ 'bytes'], residentAfter - residentBefore)
+        self.evict()
+
+    ### least recently used first until the estimate fits, the entry just opened always stays
+    def evict( self):
+        evicted = False
+        while len( self.entries) > 1 and sum( entry[ 'bytes'] for entry in self.entries.values()) > self.memoryBudget:
+            key, entry = self.entries.popitem( last = False)
+            stage = entry[ 'converter'].usdScene.stage
+            if not any( other[ 'converter'].usdScene.stage == stage for other in self.entries.values()):
+                self.stageCache.Erase( stage)
+            self.stats[ 'evictions'] += 1
+            evicted = True
+            print( 'serve: evict', entry[ 'file'], round( entry[ 'bytes'] / ( 1 << 20), 1), 'MB', flush = True)
+        if evicted: gc.collect()
+
+    def status( self):
+        return { 'entries': [ { 'file': entry[ 'file'], 'hits': entry[ 'hits'], 'mb': round( entry[ 'bytes'] / ( 1 << 20), 1)} for entry in self.entries.values()],
+                 'stages': self.stageCache.Size(),
+                 'mb': round( sum( entry[ 'bytes'] for entry in self.entries.values()) / ( 1 << 20), 1),
+                 'budgetMb': round( self.memoryBudget / ( 1 << 20), 1),
+                 'rssMb': round( ( residentBytes() or 0) / ( 1 << 20), 1),
+                 'stats': self.stats,
+               }
+
+class Handler( http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' ### chunked responses, connections stay open between requests
+
+    def log_message( self, _format, *_args): pass ### one line per conversion is printed by do_POST()
+
+    def sendJson( self, _code, _data):
+        body = json.dumps( _data).encode( 'utf-8')
+        self.send_response( _code)
+        self.send_header( 'Content-Type', 'application/json')
+        self.send_header( 'Content-Length', str( len( body)))
+        self.send_header( 'Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        self.wfile.write( body)
+
+    def do_GET( self):
+        if self.path.rstrip( '/') == '/status': self.sendJson( 200, self.server.service.status())
+        else: self.sendJson( 404, { 'error': 'unknown path ' + self.path})
+
+    def do_POST( self):
+        service = self.server.service
+        startTime = time.perf_counter()
+        body = self.rfile.read( int( self.headers.get( 'Content-Length', 0)))
+        if self.path.rstrip( '/') != '/convert': 
+            self.sendJson( 404, { 'error': 'unknown path ' + self.path})
+            return
+        service.stats[ 'requests'] += 1
+        try:
+            request = json.loads( body)
+            args = service.requestArgs( request)
+            converter, cacheStatus = service.converter( args)
+            timeCode = int( request.get( 'frame', converter.startFrame))
+        except ( ValueError, KeyError, TypeError, AttributeError, FileNotFoundError) as error:
+            service.stats[ 'failed'] += 1
+            self.sendJson( 404 if isinstance( error, FileNotFoundError) else 400, { 'error': str( error)})
+            return
+        except Exception as error:
+            service.stats[ 'failed'] += 1
+            traceback.print_exc()
+            self.sendJson( 500, { 'error': repr( error)})
+            return
+        service.stats[ cacheStatus] += 1
+        bsaFile = oomConvert.bsaPath( converter.usdScene.file, timeCode, converter.isSequence)
+        self.send_response( 200)
+        self.send_header( 'Content-Type', 'text/plain; charset=utf-8')
+        self.send_header( 'Transfer-Encoding', 'chunked')
+        self.send_header( 'X-Oomer-Bsa', bsaFile.relative_to( converter.usdScene.file.parent).as_posix())
+        self.send_header( 'X-Oomer-Cache', cacheStatus)
+        self.send_header( 'Connection', 'close') ### one request per connection, a kept alive client would hold the only thread
+        self.end_headers()
+        self.close_connection = True
+        stream = ChunkedStream( _wfile = self.wfile)
+        try:
+            converter.streamFrame( timeCode, stream)
+        except Exception:
+            service.stats[ 'failed'] += 1
+            traceback.print_exc()
+            self.close_connection = True ### no terminating chunk, the client sees a truncated response
+            service.settle( converter)
+            return
+        self.wfile.write( b'0\r\n\r\n')
+        service.settle( converter)
+        print( 'serve:', cacheStatus, bsaFile.name, str( round( stream.bytes / ( 1 << 20), 2)) + 'MB', 
+               f'{time.perf_counter() - startTime:.3f}s', flush = True)
+
+### http.server bound to _address with a Service attached, serve_forever() is the caller's
+def openServer( _address = '127.0.0.1:8765', _args = False, _memoryBudget = 2048):
+    server = http.server.HTTPServer( parseAddress( _address), Handler)
+    server.service = Service( _args = _args, _memoryBudget = _memoryBudget)
+    return server
+
+def serve( _address = '127.0.0.1:8765', _args = False, _memoryBudget = 2048):
+    server = openServer( _address, _args, _memoryBudget)
+    host, port = server.server_address[ :2]
+    print( 'serve: http://' + host + ':' + str( port), 'stage cache', _memoryBudget, 'MB, ctrl-c stops', flush = True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+### -service URL, every frame of _args converted by a running -serve and written where a local conversion would put it
+### written through a temp file, a failed or truncated response leaves the previous .bsa alone
+def convertRemote( _url = 'http://127.0.0.1:8765', _usdFile = False, _args = False):
+    usdFile = Path( _usdFile).resolve()
+    timeCodes = [ 1] if _args.start <= 0 else list( range( _args.start, max( _args.start, _args.end) + 1)) ### same frames as oomConvert.frameRange()
+    for timeCode in timeCodes:
+        startTime = time.perf_counter()
+        body = json.dumps( { 'usdfile': str( usdFile), 'frame': timeCode, 'start': _args.start, 'end': _args.end, 'options': oomManifest.outputOptions( _args)})
+        request = urllib.request.Request( _url.rstrip( '/') + '/convert', data = body.encode( 'utf-8'), headers = { 'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen( request) as response:
+                bsaFile = usdFile.parent / response.headers[ 'X-Oomer-Bsa']
+                bsaFile.parent.mkdir( parents = True, exist_ok = True)
+                tempFile = bsaFile.with_name( bsaFile.name + '.' + str( os.getpid()) + '.tmp')
+                try:
+                    with open( tempFile, 'wb') as file:
+                        shutil.copyfileobj( response, file, 1 << 20)
+                        expected = response.headers[ 'Content-Length'] ### chunked bodies raise IncompleteRead themselves, sized ones just stop short
+                        if expected and file.tell() != int( expected): raise http.client.IncompleteRead( b'', int( expected) - file.tell())
+                    os.replace( tempFile, bsaFile)
+                finally:
+                    if tempFile.exists(): tempFile.unlink()
+                cacheStatus = response.headers[ 'X-Oomer-Cache']
+        except urllib.error.HTTPError as error:
+            print( 'service:', error.code, json.loads( error.read() or b'{}').get( 'error', ''))
+            return False
+        except ( urllib.error.URLError, http.client.HTTPException, OSError) as error: ### unreachable service, dropped connection or truncated body, the temp file is already gone
+            print( 'service:', getattr( error, 'reason', False) or error)
+            return False
+        print( 'service:', cacheStatus, bsaFile.name, f'{time.perf_counter() - startTime:.3f}s')
+    return len( timeCodes)
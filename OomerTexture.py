@@ -0,0 +1,122 @@
+### Texture proxy module
+
+'''
+MIT License
+
+Copyright (c) 2023 Harvey Fong
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+### -texturemax 1024 writes downsampled copies of every unique texture and image dome
+### into a content addressed cache, the .bsa then points at the proxies
+### cache file name = sha1 of the source bytes + max size, so proxies are shared by any asset
+### using the same image and reused across runs
+### index.json remembers the sha1 of ( path, size, mtime) so unchanged sources are not re-hashed
+# - [x] Pillow formats ( png, jpg, tif, tga ...)
+# - [ ] exr / hdr domes are left at full resolution, Pillow can't read them
+# Pillow is optional, only -texturemax needs it
+# >pip install pillow
+
+## standard modules
+from pathlib import Path  # used for cross platform file paths
+import concurrent.futures
+import hashlib
+import json
+import multiprocessing
+import os
+
+### sha1 of file contents, streamed so 8K textures are not loaded whole
+def hashFile( _file):
+    sha1 = hashlib.sha1()
+    with open( _file, 'rb') as file:
+        for chunk in iter( lambda: file.read( 1 << 20), b''):
+            sha1.update( chunk)
+    return sha1.hexdigest()
+
+### runs in a worker process, returns ( source, sha1, proxy path or False)
+def makeProxy( _job):
+    source, sha1, maxSize, cacheDire = _job
+    try:
+        if not sha1: sha1 = hashFile( source)
+        suffix = Path( source).suffix.lower()
+        if suffix not in ( '.png', '.jpg', '.jpeg', '.tif', '.tiff', '.tga', '.bmp', '.webp'):
+            return source, sha1, False ### format Pillow does not read, keep original
+        proxy = Path( cacheDire) / ( sha1[ :16] + '_' + str( maxSize) + suffix)
+        if proxy.exists(): 
+            return source, sha1, str( proxy)
+        from PIL import Image
+        with Image.open( source) as image:
+            if max( image.size) <= maxSize: 
+                return source, sha1, False ### already small enough
+            image.thumbnail( ( maxSize, maxSize), Image.LANCZOS) ### keeps aspect ratio
+            tmpProxy = proxy.with_name( proxy.name + '.' + str( os.getpid()) + '.tmp' + suffix)
+            image.save( str( tmpProxy))
+        os.replace( str( tmpProxy), str( proxy)) ### concurrent runs never see a half written proxy
+        return source, sha1, str( proxy)
+    except Exception as error:
+        print( 'FAIL texture proxy:', source, repr( error))
+        return source, sha1, False
+
+class ProxyCache:
+    def __init__( self,
+                  _cacheDire = False,
+                  _maxSize = 1024,
+                ):
+        self.cacheDire = Path( _cacheDire)
+        self.maxSize = _maxSize
+        self.indexFile = self.cacheDire / 'index.json'
+        self.index = {} ### "path|size|mtime" -> sha1
+        if not self.cacheDire.exists():
+            self.cacheDire.mkdir( parents = True)
+        if self.indexFile.exists():
+            try:
+                self.index = json.loads( self.indexFile.read_text())
+            except ValueError:
+                self.index = {}
+
+    def indexKey( self, _file):
+        fileStat = os.stat( _file)
+        return str( _file) + '|' + str( fileStat.st_size) + '|' + str( fileStat.st_mtime)
+
+    ### source files -> { source: proxy path}, sources without a proxy are left out
+    def proxies( self, _files = []):
+        try:
+            import PIL
+        except ImportError:
+            print( '-texturemax requires Pillow, >pip install pillow, using original textures')
+            return {}
+        jobs = []
+        for file in sorted( set( _files)):
+            if not os.path.isfile( file): continue
+            jobs.append( ( file, self.index.get( self.indexKey( file), False), self.maxSize, str( self.cacheDire)))
+        if not jobs: return {}
+        if multiprocessing.current_process().daemon or len( jobs) == 1: ### batch pool workers can't fork children
+            results = list( map( makeProxy, jobs))
+        else:
+            with concurrent.futures.ProcessPoolExecutor( max_workers = min( len( jobs), os.cpu_count() or 1)) as pool:
+                results = list( pool.map( makeProxy, jobs))
+        proxies = {}
+        for source, sha1, proxy in results:
+            self.index[ self.indexKey( source)] = sha1
+            if proxy: proxies[ source] = proxy
+        tmpIndex = self.indexFile.with_suffix( '.' + str( os.getpid()) + '.tmp')
+        tmpIndex.write_text( json.dumps( self.index, indent = 1))
+        os.replace( str( tmpIndex), str( self.indexFile))
+        return proxies
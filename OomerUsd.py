@@ -26,6 +26,9 @@ SOFTWARE.
 
 ## standard modules
 from pathlib import Path  # used for cross platform file paths
+import concurrent.futures
+import functools
+import os
 import os.path
 
 ## third party modules
@@ -38,6 +41,30 @@ import numpy as np
 
 ## oomer modules
 import OomerUtil as oomUtil
+import OomerLod  as oomLod
+import OomerOutOfCore as oomOutOfCore
+
+### existence, size and .bsa relative path of one texture file, runs in Reader.resolveTextures thread pool
+def statTexture( _file, _bsaDire = False):
+    try:
+        fileStat = os.stat( _file)
+        exists, size, mtime = True, fileStat.st_size, fileStat.st_mtime
+    except OSError:
+        exists, size, mtime = False, 0, 0
+    relPath = Path( _file)
+    if _bsaDire and relPath.is_absolute(): ### unresolved assets keep their authored path
+        try:
+            relPath = Path( os.path.relpath( _file, _bsaDire)) ### remove absolute path
+        except ValueError: ### windows, texture on another drive
+            pass
+    return { 'exists': exists, 'size': size, 'mtime': mtime, 'relPath': relPath}
+
+### zero-copy numpy view of a VtArray through its buffer protocol, read only, memory stays owned by the VtArray
+### np.asarray() only copies when _dtype differs from the stored type, ie int[] is already int32
+### None ( unauthored attribute) and False ( unittest default) come back empty, validity is a .size check, never a walk of the array
+def npView( _vtArray, _dtype = None):
+    if _vtArray is None or _vtArray is False: return np.empty( 0, dtype = _dtype)
+    return np.asarray( _vtArray, dtype = _dtype)
 
 class NodeGraph:
     def __init__(  self,
@@ -65,25 +92,14 @@ class Reader:
         else: # TODO switch to slipstream method above
             self.stage = Usd.Stage.CreateInMemory( _usdFile)
 
-        self.meshes = {}
-        self.primitives = {} ### sphere, cube ( bella supports box), cylinder ( no capsule, cone )
-        self.lights = {}
-        self.xforms = {}
-        self.instancers = {} ### point instancing
-        self.scopes = {} ### TODO is a scope a grouping method?
-        self.cameras = {}
-        self.previewSurfaces = {}
-        self.mtlxSurfaces = {}
-        self.mtlxNodes = {}
-        self.references = {}
-        self.uv_textures = {}
-        self.prototype_instances = {}
-        self.prototype_children = []
-        self.rootPrims = []
+        self.resetTraversal()
         oomerUtility = oomUtil.Mappings()
         oomerMaterialX = oomUtil.MaterialX()
         self.usdPreviewSurface = oomerUtility.usdPreviewSurface
         self.mtlxSurface = oomerMaterialX.surface
+        self.shaderMappings = { 'UsdPreviewSurface': self.usdPreviewSurface, 
+                                'ND_standard_surface_surfaceshader': self.mtlxSurface,
+                              }
         ###self.udim_indices = { *() } # This defines a Python set, sets can only store a value once
         self.timeCode = False
         ### GLOBALS
@@ -139,6 +155,35 @@ class Reader:
 
         self.mat4_identity = np.array( [[1,0,0,0],[0,1,0,0],[0,0,1,0],[0,0,0,1]], dtype='float64')
         self.xform_cache = UsdGeom.XformCache()
+        ### one bound cache for the whole stage, proxy and guide geometry is never written so it never frames anything
+        ### bounds are memoized per prim inside it until the time changes, see worldBound()
+        self.bbox_cache = UsdGeom.BBoxCache( Usd.TimeCode( 1), [ UsdGeom.Tokens.default_, UsdGeom.Tokens.render], useExtentsHint = True)
+
+    ### traversal dictionaries, emptied again when -watch has to re-traverse a resynced stage
+    def resetTraversal( self):
+        self.meshes = {}
+        self.primitives = {} ### sphere, cube ( bella supports box), cylinder ( no capsule, cone )
+        self.lights = {}
+        self.xforms = {}
+        self.instancers = {} ### point instancing
+        self.scopes = {} ### TODO is a scope a grouping method?
+        self.cameras = {}
+        self.previewSurfaces = {}
+        self.mtlxSurfaces = {}
+        self.mtlxNodes = {}
+        self.references = {}
+        self.uv_textures = {}
+        self.shaderNodes = {} ### UsdPrim -> { id, inputs}, see readShader()
+        self.textures = {} ### unique texture files, see resolveTextures()
+        self.missingTextures = []
+        self.prototypes = {} ### stage.GetPrototypes() -> { seed, name}, one Bella subtree each, see prototypeSources()
+        self.prototype_instances = {} ### instance prim -> prototype prim
+        self.prototype_children = []
+        self.rootPrims = []
+        self.compositionCache = {} ### ( layer, reference target) -> prim, see resolveInstance()
+        self.compositionStats = { 'hits': 0, 'misses': 0}
+        self.instanceUUIDs = {} ### resolved prim -> uuid
+        self.timeVarying = False ### see timeVaryingAttributes()
 
     '''
     def GetAttribute( self, attribute): # UNUSED here for future use
@@ -151,6 +196,15 @@ class Reader:
             return attribute.Get()
     '''
 
+    ### attributes of every prim and prototype whose value might change over time, gathered once per traversal
+    ### the camera, bounds and every written value of a frame derive from these, see oomManifest.frameFingerprint()
+    def timeVaryingAttributes( self):
+        if self.timeVarying is False:
+            prims = list( self.stage.Traverse())
+            for prototype in self.stage.GetPrototypes(): prims += list( Usd.PrimRange( prototype))
+            self.timeVarying = [ attribute for prim in prims for attribute in prim.GetAttributes() if attribute.ValueMightBeTimeVarying()]
+        return self.timeVarying
+
     ### rewrite of traverse_scene 2023
     ### due to usd complexity, the naive earlier approach of using PrimRange to traverse all prims
     ### leads to lack of inherited ( from parent or grandparent ) knowledge like kind, visibility, etc
@@ -173,24 +227,28 @@ class Reader:
 
         ancestInvisiblePrim = False
         ancestGroupPrim     = False
+        purposeStack        = [] ### ( prim, purpose) for each ancestor authoring a purpose that differs from its parent's
         usdPrototypes = self.stage.GetPrototypes() # prototypes contain a common hierarchy referenced by instances
         ### currently instancer.hiplc creates BOTH a /hidden/sphere and a /Instances/Prototypes/hidden/sphere, the latter instance referencing to
         ### the former, on top of this the actual instances point to the Prototype, which begs the question, why have two degrees of separation?
-        ### to be continued
+        ### each prototype subtree is read once here and written once as a Bella xform tree, instances only point at it
+        ### nested instances inside a prototype are instances of another entry in usdPrototypes
+        self.prototypeSources( usdPrototypes)
         for eachPrototype in usdPrototypes:
-            children = self.prototype_children + list( eachPrototype.GetChildren())
-            listPrototypePrims =  list( iter( Usd.PrimRange( eachPrototype)))
+            self.prototype_children += list( eachPrototype.GetChildren())
+            prototypePurpose = { eachPrototype: 'default'} ### pre visit only, parents are resolved before their children
+            for prototypePrim in Usd.PrimRange( eachPrototype):
+                if prototypePrim != eachPrototype: 
+                    prototypePurpose[ prototypePrim] = self.resolvePurpose( prototypePrim, prototypePurpose[ prototypePrim.GetParent()])
+                    self.readPrim( prototypePrim, _ignorePrim = ignorePrim, _purpose = prototypePurpose[ prototypePrim])
 
         ### TODO unittest for fragile complex invisibility and group tracking system 
         for prim in primIter:
             primGeom    = UsdGeom.Mesh( prim)
             primKind    = Usd.ModelAPI( prim).GetKind()
-            primPurpose = primGeom.GetPurposeAttr().Get()
-            #primPurpose = primGeom.ComputePurpose() ### compute may be expensive on large scenes according to API docs, 
-            # our stack based traversal method is appropriate to gather this info as we walk through each prim
             primType    = prim.GetTypeName()
             primName    = prim.GetName()
-            primUUID = oomUtil.uuidSanitize( prim.GetName(), _hashSeed = prim.GetPath()) 
+            primUUID = oomUtil.uuidSanitize( prim.GetName(), _hashSeed = self.stablePath( prim)) 
 
             if prim == self.stage.GetPseudoRoot(): 
                 subtreeCounter = 0
@@ -204,6 +262,7 @@ class Reader:
             ### on PrimRange() post visit turn off ancestral flags
             if prim == ancestInvisiblePrim: subtreeInvisible  = False
             if prim == ancestGroupPrim:     subtreeGroup  = False
+            if postVisit and purposeStack and purposeStack[ -1][ 0] == prim: purposeStack.pop()
 
             if not postVisit and not subtreeCounter == 0: ### a PrimRange() post visit is 2nd pass
                 ### Track ancestral flags 
@@ -215,6 +274,11 @@ class Reader:
                     if subtreeGroup == False: # first discovered group ancestor
                         ancestGroupPrim = prim ### track ancestor prim
                     subtreeGroup = True ### subtree one time switch, assumption all children are in group
+                ### purpose, unlike invisibility, can be overridden lower down so it is a stack rather than a switch
+                # the nearest authored purpose wins, matching UsdGeom.Imageable.ComputePurpose() without its per prim ancestor walk
+                inheritedPurpose = purposeStack[ -1][ 1] if purposeStack else 'default'
+                primPurpose = self.resolvePurpose( prim, inheritedPurpose)
+                if primPurpose != inheritedPurpose: purposeStack.append( ( prim, primPurpose))
 
                 ### add toplevel to render list
                 eachParent = prim.GetParent()
@@ -230,208 +294,301 @@ class Reader:
                 #print( subtreeCounter, 'group:', subtreeGroup, 'invisible:', subtreeInvisible, subtreeCounter, 'purpose:', primPurpose, prim.GetPrimPath())
                 #print( subtreeCounter, 'purpose:', primPurpose, prim.GetPrimPath(), 'ins', prim.IsInstanceable(), prim.IsInstance())
 
-                if primType == 'Xform' or primType == 'Scope':
-                    hasAuthoredReferences = prim.HasAuthoredReferences()
-                    self.xforms[ prim ]  = {}
-                    self.xforms[ prim][ 'hasAuthoredReferences'] = hasAuthoredReferences
-                    self.xforms[ prim][ 'isInvisible'] = subtreeInvisible
-                    self.xforms[ prim][ 'instanceUUID'] = False
-
-                    if prim.IsInstance():
-                        instancePrim = self.resolveInstance( prim)
-                        instanceUUID = oomUtil.uuidSanitize( instancePrim.GetName(), _hashSeed = instancePrim.GetPath()) 
-                        self.xforms[ prim][ 'instanceUUID'] = instanceUUID
-                        self.prototype_instances[ prim] =  self.resolveInstance( prim)
-                ### 
-                if primType == 'Mesh':
-                    instancePrim = False
-                    if prim.HasAuthoredReferences(): ### Referencing is used for both local and file instancing
-                        instancePrim = self.resolveInstance( prim)
-
-                    self.meshes[ prim ]  = {}
-                    self.meshes[ prim][ 'instance'] = instancePrim
-                    self.meshes[ prim][ 'isInvisible'] = subtreeInvisible
-
-                # - [ ] Treat UsdPreviewSurface as a equivalent to a Bella PBR material
-                if primType == 'Material' and prim not in ignorePrim: 
-                    self.previewSurfaces[ prim] = {} # [ ] one UsdPreviewSurface becomes 1 bella quickMaterial
-                    self.mtlxSurfaces[ prim] = {} # [ ] one UsdPreviewSurface becomes 1 bella quickMaterial
-                    # A material probably holds a unique surface shader and then instances of UsdUVTextures
-                    # to ingest the material, we populate 
-
-                    # Once a Material prim is found, we kinda mass haul-in all file textures
-                    # Could do a proper traversal of actually used shader connections instead
-                    # to avoid proxy textures
-                    ### PrimRange will traverse tree starting at prim and descending all children subtrees
-                    ### 
-                    for shaderNetworkPrim in Usd.PrimRange( prim): ## ( subtree traversal depth first), it this the same as gathering all the nodes of a shader network
-                        usdShader = UsdShade.Shader( shaderNetworkPrim)
-                        idAttr = usdShader.GetIdAttr()
-                        if idAttr:
-                            infoId = idAttr.Get()
-                            usdShader = UsdShade.Shader( shaderNetworkPrim)
-                            #print( infoId)
-
-                            if 'ND_' == infoId[:3] or 'mtlx' == infoId[:4]:
-                                self.mtlxNodes[ prim] = {}
-                                self.mtlxNodes[ prim]['type'] = infoId
-                                print('found', infoId)
-
-
-
-
-
-                            if infoId == 'ND_standard_surface_surfaceshader':
-                                self.mtlxSurfaces[ prim][ 'shader'] = shaderNetworkPrim 
-                                for shaderAttributeName in self.mtlxSurface.keys(): # loop over this dictionary mapping usdpreviewsurface to bella uber
-                                    shaderAttribute = usdShader.GetInput( shaderAttributeName)
-                                    if shaderAttribute and shaderAttributeName != 'normal':
-                                        attribValue = shaderAttribute.Get()
-                                        connectedPrimTuple = shaderAttribute.GetConnectedSource()
-                                        if connectedPrimTuple: # Is input connected to another node
-                                            connectableAPI = connectedPrimTuple[0]
-                                            shaderPrim = UsdShade.Shader( connectableAPI.GetPrim())
-                                            infoId2 = shaderPrim.GetIdAttr().Get()
-                                            if infoId2 == 'UsdUVTexture':
-                                                ### file paths are relative to .usd file where they are defined
-                                                ### ./main.usd
-                                                ### ./textureDir/cat.png
-                                                ### ./geomDir/cat.usd
-                                                # -- ./geomdir/cat.usd is referenced is ./main.usd
-                                                # -- cat.usd uses texture with a locator string "../textureDir/cat.png"
-                                                # -- during scene composition, all prims appear under one scenegraph
-                                                # -- but "../textureDir/cat.png" 
-                                                #maybe flattewn
-
-                                                ### This is how NOT to get an attrib
-                                                ### file = Usd.Prim.GetAttribute( each.GetAttribute( 'inputs:file'))
-                                                ### this gets a raw string and is inappropriate because we need
-                                                ### sdfAssetPath.resolvedPath because the raw string will either be relative OR absolute
-
-                                                sdfAssetPath = shaderPrim.GetInput( 'file').Get() ### shader <- input <- sdfAssetPath
-                                                absFilePath = sdfAssetPath.resolvedPath ### total API confusion, this attrib not documented, got by trying to use GetResolvedPath() and API suggested resolvedPath
-                                                relFilePath = sdfAssetPath.path
-                                                ### My newbie c++ brain finally figured out that .path and .resolvedPath
-                                                ### SDF_API SdfAssetPath ( const std::string & 	path,
-                                                ###                        const std::string & 	resolvedPath 
-                                                ###                      )	
-                                                if ( self.file.parent != Path( absFilePath)): ### Use relative path unless in same dir
-                                                    ### pathlib relative_to files
-                                                    ### ValueError: '/Users/harvey/oomerusd2bella/tv_retro/0/tv_retro_body_bc.png' is not in the subpath of '/Users/harvey/oomerusd2bella/houdini' OR one path is relative and the other is absolute. 
-                                                    #file = Path(os.path.relpath( absFilePath, self.file.parent.resolve()))
-                                                    file = Path( absFilePath)
-                                                    #file = Path( absFilePath).relative_to( self.file.parent.resolve()) ### calculate texture relative to -usdfile path
-                                                else:
-                                                    file = Path( relFilePath)
-                                                sourceColorSpace = usdShader.GetInput( 'sourceColorSpace').Get()
-                                                wrapS = shaderPrim.GetInput( 'wrapS').Get()
-                                                wrapT = shaderPrim.GetInput( 'wrapT').Get()
-                                                self.uv_textures[ shaderPrim] = {} # [ ] one UsdUvTexture becomes 1 bella fileTexture
-                                                self.uv_textures[ shaderPrim][ 'file'] = file
-                                                self.uv_textures[ shaderPrim][ 'wrapS'] = wrapS
-                                                self.uv_textures[ shaderPrim][ 'wrapT'] = wrapT
-                                                self.uv_textures[ shaderPrim][ '_bellatype'] = 'fileTexture'
-                                            #if infoId == 'UsdPrimvarReader_float2':
-                                            #    print( 'hello', usdShade3.GetInput('varname').Get())
-                                            self.mtlxSurfaces[ prim][ shaderAttributeName] = shaderPrim
-                                        else: # store local value
-                                            self.mtlxSurfaces[ prim][ shaderAttributeName] = attribValue
-
-                            if infoId == 'UsdPreviewSurface':
-                                self.previewSurfaces[ prim][ 'shader'] = shaderNetworkPrim # TODO is 'shader' referenced
-                                # - [ ] when a diffuseColor is found, this is good enough to claim
-                                # - [ ] this prim can be converted to a PBR material
-                                # _input.GetConnections()[0] # - [x] why more than one, in a node architecture, each attribute is designed to allow more than one input although max is usually one
-                                # - [ 2024 ] a rich node based architecture allows lots of diff type of inputs from procedurals to files to constants
-                                # - [ 2024 ] right now I am assuming the use of inputs:file rather than say a checkerboard procedural
-                                # - [ 2024 ] when I embark on MaterialX, these assumptions will be revisited
-                                for shaderAttributeName in self.usdPreviewSurface.keys(): # loop over this dictionary mapping usdpreviewsurface to bella uber
-                                    shaderAttribute = usdShader.GetInput( shaderAttributeName)
-                                    if shaderAttribute and shaderAttributeName != 'normal':
-                                        attribValue = shaderAttribute.Get()
-                                        connectedPrimTuple = shaderAttribute.GetConnectedSource()
-                                        if connectedPrimTuple: # Is input connected to another node
-                                            connectableAPI = connectedPrimTuple[0]
-                                            shaderPrim = UsdShade.Shader( connectableAPI.GetPrim())
-                                            infoId2 = shaderPrim.GetIdAttr().Get()
-                                            if infoId2 == 'UsdUVTexture':
-                                                ### file paths are relative to .usd file where they are defined
-                                                ### ./main.usd
-                                                ### ./textureDir/cat.png
-                                                ### ./geomDir/cat.usd
-                                                # -- ./geomdir/cat.usd is referenced is ./main.usd
-                                                # -- cat.usd uses texture with a locator string "../textureDir/cat.png"
-                                                # -- during scene composition, all prims appear under one scenegraph
-                                                # -- but "../textureDir/cat.png" 
-                                                #maybe flattewn
-
-                                                ### This is how NOT to get an attrib
-                                                ### file = Usd.Prim.GetAttribute( each.GetAttribute( 'inputs:file'))
-                                                ### this gets a raw string and is inappropriate because we need
-                                                ### sdfAssetPath.resolvedPath because the raw string will either be relative OR absolute
-
-                                                sdfAssetPath = shaderPrim.GetInput( 'file').Get() ### shader <- input <- sdfAssetPath
-                                                absFilePath = sdfAssetPath.resolvedPath ### total API confusion, this attrib not documented, got by trying to use GetResolvedPath() and API suggested resolvedPath
-                                                relFilePath = sdfAssetPath.path
-                                                ### My newbie c++ brain finally figured out that .path and .resolvedPath
-                                                ### SDF_API SdfAssetPath ( const std::string & 	path,
-                                                ###                        const std::string & 	resolvedPath 
-                                                ###                      )	
-                                                if ( self.file.parent != Path( absFilePath)): ### Use relative path unless in same dir
-                                                    ### pathlib relative_to files
-                                                    ### ValueError: '/Users/harvey/oomerusd2bella/tv_retro/0/tv_retro_body_bc.png' is not in the subpath of '/Users/harvey/oomerusd2bella/houdini' OR one path is relative and the other is absolute. 
-                                                    #file = Path(os.path.relpath( absFilePath, self.file.parent.resolve()))
-                                                    file = Path( absFilePath)
-                                                    #file = Path( absFilePath).relative_to( self.file.parent.resolve()) ### calculate texture relative to -usdfile path
-                                                else:
-                                                    file = Path( relFilePath)
-                                                sourceColorSpace = usdShader.GetInput( 'sourceColorSpace').Get()
-                                                wrapS = shaderPrim.GetInput( 'wrapS').Get()
-                                                wrapT = shaderPrim.GetInput( 'wrapT').Get()
-                                                self.uv_textures[ shaderPrim] = {} # [ ] one UsdUvTexture becomes 1 bella fileTexture
-                                                self.uv_textures[ shaderPrim][ 'file'] = file
-                                                self.uv_textures[ shaderPrim][ 'wrapS'] = wrapS
-                                                self.uv_textures[ shaderPrim][ 'wrapT'] = wrapT
-                                                self.uv_textures[ shaderPrim][ '_bellatype'] = 'fileTexture'
-                                            #if infoId == 'UsdPrimvarReader_float2':
-                                            #    print( 'hello', usdShade3.GetInput('varname').Get())
-                                            self.previewSurfaces[ prim][ shaderAttributeName] = shaderPrim
-                                        else: # store local value
-                                            self.previewSurfaces[ prim][ shaderAttributeName] = attribValue
-
-                if primType == 'Camera':
-                    self.cameras[ prim]  = {}
-
-                ### Lights TODO downgrade from dict to array
-                if primType in [ 'SphereLight', 'DistantLight', 'RectLight', 'DiskLight', 'DomeLight']:
-                    self.lights[ prim] = {}
-
-                ### Primitives
-                if primType in [ 'Sphere', 'Cube', 'Cylinder']:
-                    self.primitives[ prim] = {}
-
-                if primType == 'PointInstancer':
-                    ### loop point instances
-                    ### - [ ] separate out each prototype index
-                    ### - [x] merge Usd's quat, point, scale into 4x4 matrix
-                    ### - [ ] store 4x4 matrix per protoIndex
-                    ### - [x] move _timeCode out of this function, since we don't want to traverse each frame
-                    ### rationale behind Usd's decision to separate out orientation, translation and scale
-                    ### is saving of memory when dealing with billions of instances, Bella only uses mat4f
-                    primPointInstancer = UsdGeom.PointInstancer( prim)
-                    positionBuf = primPointInstancer.GetPositionsAttr()
-                    orientationBuf = primPointInstancer.GetOrientationsAttr()
-                    scaleBuf = primPointInstancer.GetScalesAttr()
-                    if positionBuf: ### TODO is this check required
-                        self.instancers[ prim] = {}
-                        self.instancers[ prim][ 'orientationsAttr'] = orientationBuf
-                        self.instancers[ prim][ 'positionsAttr'] = positionBuf
-                        self.instancers[ prim][ 'scalesAttr'] = scaleBuf
-                        protoBinding = prim.GetRelationship( 'prototypes')
-                        self.instancers[ prim][ 'protoChildren'] = protoBinding
+                self.readPrim( prim, _subtreeInvisible = subtreeInvisible, _ignorePrim = ignorePrim, _purpose = primPurpose)
+        if self.debug: self.printCompositionStats()
+
+    ### authored purpose or the one inherited from the parent, one attribute lookup per prim during traversal
+    def resolvePurpose( self, prim, _inherited = 'default'):
+        purposeAttr = UsdGeom.Imageable( prim).GetPurposeAttr()
+        if purposeAttr and purposeAttr.HasAuthoredValue(): return purposeAttr.Get()
+        return _inherited
+
+    ### -watch, a mesh's traversal record read again after an edit, the invisible flag comes from the mesh and its ancestors like traverseScene()
+    ### True when visibility, purpose or the invisible flag changed, otherwise the old record and its cached subsets and lods are kept
+    def refreshMesh( self, _prim):
+        subtreeInvisible = False
+        ancestor = _prim
+        while ancestor and not ancestor.IsPseudoRoot():
+            if UsdGeom.Imageable( ancestor).GetVisibilityAttr().Get() == 'invisible' or ancestor.GetName() == 'hidden': subtreeInvisible = True
+            ancestor = ancestor.GetParent()
+        previous = self.meshes[ _prim]
+        self.readPrim( _prim, _subtreeInvisible = subtreeInvisible, _purpose = UsdGeom.Imageable( _prim).ComputePurpose())
+        if all( previous.get( key) == self.meshes[ _prim][ key] for key in [ 'isInvisible', 'purpose', 'visibility']):
+            self.meshes[ _prim] = previous
+            return False
+        return True
+
+    ### sort one prim into the scene dictionaries, used for the stage and for each prototype subtree
+    def readPrim( self, prim, _subtreeInvisible = False, _ignorePrim = [], _purpose = 'default'):
+        primType = prim.GetTypeName()
+        subtreeInvisible = _subtreeInvisible
+        ignorePrim = _ignorePrim
+        if primType == 'Xform' or primType == 'Scope':
+            hasAuthoredReferences = prim.HasAuthoredReferences()
+            self.xforms[ prim ]  = {}
+            self.xforms[ prim][ 'hasAuthoredReferences'] = hasAuthoredReferences
+            self.xforms[ prim][ 'isInvisible'] = subtreeInvisible
+            self.xforms[ prim][ 'instanceUUID'] = False
+
+            if prim.IsInstance(): ### native instancing, xform + child reference to the prototype written once
+                prototypePrim = prim.GetPrototype()
+                self.xforms[ prim][ 'instanceUUID'] = self.instanceUUID( prototypePrim)
+                self.prototype_instances[ prim] = prototypePrim
+        ### 
+        if primType == 'Mesh':
+            instancePrim = False
+            if prim.HasAuthoredReferences(): ### Referencing is used for both local and file instancing
+                instancePrim = self.resolveInstance( prim)
+
+            self.meshes[ prim ]  = {}
+            self.meshes[ prim][ 'instance'] = instancePrim
+            self.meshes[ prim][ 'isInvisible'] = subtreeInvisible
+            self.meshes[ prim][ 'purpose'] = _purpose ### resolved in traverseScene(), proxy and guide meshes are never read
+            self.meshes[ prim][ 'visibility'] = UsdGeom.Imageable( prim).GetVisibilityAttr().Get() ### authored on the mesh itself, read once
+
+        # - [ ] Treat UsdPreviewSurface as a equivalent to a Bella PBR material
+        if primType == 'Material' and prim not in ignorePrim: 
+            self.traverseMaterial( prim)
+
+        if primType == 'Camera':
+            self.cameras[ prim]  = {}
+
+        ### Lights TODO downgrade from dict to array
+        if primType in [ 'SphereLight', 'DistantLight', 'RectLight', 'DiskLight', 'DomeLight']:
+            self.lights[ prim] = {}
+            if primType == 'DomeLight': ### dome image is a texture too, -texturemax proxies it
+                textureFile = prim.GetAttribute( 'inputs:texture:file').Get()
+                if textureFile and textureFile.resolvedPath:
+                    self.lights[ prim][ 'textureFile'] = textureFile.resolvedPath
+
+        ### Primitives
+        if primType in [ 'Sphere', 'Cube', 'Cylinder']:
+            self.primitives[ prim] = {}
+
+        if primType == 'PointInstancer':
+            ### loop point instances
+            ### - [ ] separate out each prototype index
+            ### - [x] merge Usd's quat, point, scale into 4x4 matrix
+            ### - [ ] store 4x4 matrix per protoIndex
+            ### - [x] move _timeCode out of this function, since we don't want to traverse each frame
+            ### rationale behind Usd's decision to separate out orientation, translation and scale
+            ### is saving of memory when dealing with billions of instances, Bella only uses mat4f
+            primPointInstancer = UsdGeom.PointInstancer( prim)
+            positionBuf = primPointInstancer.GetPositionsAttr()
+            orientationBuf = primPointInstancer.GetOrientationsAttr()
+            scaleBuf = primPointInstancer.GetScalesAttr()
+            if positionBuf: ### TODO is this check required
+                self.instancers[ prim] = {}
+                self.instancers[ prim][ 'orientationsAttr'] = orientationBuf
+                self.instancers[ prim][ 'positionsAttr'] = positionBuf
+                self.instancers[ prim][ 'scalesAttr'] = scaleBuf
+                protoBinding = prim.GetRelationship( 'prototypes')
+                self.instancers[ prim][ 'protoChildren'] = protoBinding
+
+    def printCompositionStats( self):
+        lookups = self.compositionStats[ 'hits'] + self.compositionStats[ 'misses']
+        if not lookups: return
+        print( 'composition cache:', self.compositionStats[ 'hits'], 'hits', 
+               self.compositionStats[ 'misses'], 'misses', 
+               str( round( 100.0 * self.compositionStats[ 'hits'] / lookups, 1)) + '% hit rate',
+               len( self.compositionCache), 'targets')
+
+    ### Material subtree, also called by -watch when a shader input under the Material is edited
+    def traverseMaterial( self, prim, _refresh = False):
+        if _refresh: ### -watch, forget cached nodes below this Material so edits are read again
+            for shaderNetworkPrim in Usd.PrimRange( prim):
+                self.shaderNodes.pop( shaderNetworkPrim, None)
+                self.uv_textures.pop( shaderNetworkPrim, None)
+        self.previewSurfaces.pop( prim, None)
+        self.mtlxSurfaces.pop( prim, None)
+        # A material probably holds a unique surface shader and then instances of UsdUVTextures
+        # to ingest the material, we populate 
+
+        # Once a Material prim is found, we kinda mass haul-in all file textures
+        # Could do a proper traversal of actually used shader connections instead
+        # to avoid proxy textures
+        ### PrimRange will traverse tree starting at prim and descending all children subtrees
+        ### 
+        for shaderNetworkPrim in Usd.PrimRange( prim): ## ( subtree traversal depth first), it this the same as gathering all the nodes of a shader network
+            shaderNode = self.readShader( shaderNetworkPrim)
+            infoId = shaderNode[ 'id']
+            if not infoId: continue
+            if 'ND_' == infoId[:3] or 'mtlx' == infoId[:4]:
+                self.mtlxNodes[ prim] = {}
+                self.mtlxNodes[ prim]['type'] = infoId
+                if self.debug: print('found', infoId)
+            # - [ ] when a diffuseColor is found, this is good enough to claim
+            # - [ ] this prim can be converted to a PBR material
+            if infoId == 'UsdPreviewSurface':
+                self.previewSurfaces[ prim] = dict( shaderNode[ 'inputs'], shader = shaderNetworkPrim)
+            elif infoId == 'ND_standard_surface_surfaceshader':
+                self.mtlxSurfaces[ prim] = dict( shaderNode[ 'inputs'], shader = shaderNetworkPrim)
+        ### one bella uber per Material, UsdPreviewSurface wins when a Material carries both render contexts
+        ### a Material without a known surface still gets an empty uber so mesh bindings resolve
+        if prim in self.previewSurfaces: self.mtlxSurfaces.pop( prim, None)
+        elif prim not in self.mtlxSurfaces: self.previewSurfaces[ prim] = {}
+
+    ### one entry per shader prim on the stage, memoized so nodes shared by many Materials are read once
+    ### surface shaders keep their mapped inputs ( OomerUtil.Mappings / OomerUtil.MaterialX) as local values
+    ### or as the connected UsdShade.Shader, whose UsdUVTexture is resolved once by readUVTexture()
+    def readShader( self, shaderNetworkPrim):
+        if shaderNetworkPrim in self.shaderNodes: return self.shaderNodes[ shaderNetworkPrim]
+        usdShader = UsdShade.Shader( shaderNetworkPrim)
+        idAttr = usdShader.GetIdAttr()
+        shaderNode = { 'id': idAttr.Get() if idAttr else False, 'inputs': {}}
+        self.shaderNodes[ shaderNetworkPrim] = shaderNode
+        # _input.GetConnections()[0] # - [x] why more than one, in a node architecture, each attribute is designed to allow more than one input although max is usually one
+        # - [ 2024 ] a rich node based architecture allows lots of diff type of inputs from procedurals to files to constants
+        # - [ 2024 ] right now I am assuming the use of inputs:file rather than say a checkerboard procedural
+        for shaderAttributeName in self.shaderMappings.get( shaderNode[ 'id'], {}): # loop over the mapping to bella uber
+            shaderAttribute = usdShader.GetInput( shaderAttributeName)
+            if shaderAttribute and shaderAttributeName != 'normal':
+                connectedPrimTuple = shaderAttribute.GetConnectedSource()
+                if connectedPrimTuple: # Is input connected to another node
+                    sourcePrim = connectedPrimTuple[0].GetPrim()
+                    if self.readShader( sourcePrim)[ 'id'] == 'UsdUVTexture':
+                        self.readUVTexture( UsdShade.Shader( sourcePrim))
+                    shaderNode[ 'inputs'][ shaderAttributeName] = UsdShade.Shader( sourcePrim)
+                else: # store local value
+                    shaderNode[ 'inputs'][ shaderAttributeName] = shaderAttribute.Get()
+        return shaderNode
+
+    ### one UsdUVTexture shader -> one uv_textures entry keyed by UsdPrim
+    ### a texture node shared by many materials or inputs is read and resolved once
+    def readUVTexture( self, shaderPrim):
+        if shaderPrim.GetPrim() in self.uv_textures: return
+        ### file paths are relative to .usd file where they are defined
+        ### ./main.usd
+        ### ./textureDir/cat.png
+        ### ./geomDir/cat.usd
+        # -- ./geomdir/cat.usd is referenced is ./main.usd
+        # -- cat.usd uses texture with a locator string "../textureDir/cat.png"
+        # -- during scene composition, all prims appear under one scenegraph
+        # -- but "../textureDir/cat.png" 
+        #maybe flattewn
+
+        ### This is how NOT to get an attrib
+        ### file = Usd.Prim.GetAttribute( each.GetAttribute( 'inputs:file'))
+        ### this gets a raw string and is inappropriate because we need
+        ### sdfAssetPath.resolvedPath because the raw string will either be relative OR absolute
+
+        sdfAssetPath = shaderPrim.GetInput( 'file').Get() ### shader <- input <- sdfAssetPath
+        absFilePath = sdfAssetPath.resolvedPath ### total API confusion, this attrib not documented, got by trying to use GetResolvedPath() and API suggested resolvedPath
+        relFilePath = sdfAssetPath.path
+        ### My newbie c++ brain finally figured out that .path and .resolvedPath
+        ### SDF_API SdfAssetPath ( const std::string & 	path,
+        ###                        const std::string & 	resolvedPath 
+        ###                      )	
+        ### absolute path here, made relative to the .bsa once per unique file in resolveTextures()
+        ### pathlib relative_to files
+        ### ValueError: '/Users/harvey/oomerusd2bella/tv_retro/0/tv_retro_body_bc.png' is not in the subpath of '/Users/harvey/oomerusd2bella/houdini' OR one path is relative and the other is absolute. 
+        if absFilePath:
+            file = Path( absFilePath)
+        else: ### unresolved asset, keep authored path for the missing report
+            file = Path( relFilePath)
+        sourceColorSpace = shaderPrim.GetInput( 'sourceColorSpace')
+        wrapS = shaderPrim.GetInput( 'wrapS').Get()
+        wrapT = shaderPrim.GetInput( 'wrapT').Get()
+        uvTexture = {} # [ ] one UsdUvTexture becomes 1 bella fileTexture
+        uvTexture[ 'file'] = file
+        uvTexture[ 'resolved'] = bool( absFilePath)
+        uvTexture[ 'wrapS'] = wrapS
+        uvTexture[ 'wrapT'] = wrapT
+        uvTexture[ 'sourceColorSpace'] = sourceColorSpace.Get() if sourceColorSpace else False
+        uvTexture[ '_bellatype'] = 'fileTexture'
+        self.uv_textures[ shaderPrim.GetPrim()] = uvTexture
+
+    ### uv_textures is per shader, textures is per unique ( file, wrapS, wrapT) -> one bella fileTexture node each
+    ### existence, stat and relative path are computed once per unique file in a thread pool
+    ### since on network storage each stat is a round trip
+    def resolveTextures( self, _bsaDire = False):
+        self.textures = {}
+        for shaderPrim, uvTexture in self.uv_textures.items():
+            textureKey = ( str( uvTexture[ 'file']), uvTexture[ 'wrapS'], uvTexture[ 'wrapT'])
+            if textureKey not in self.textures:
+                self.textures[ textureKey] = { 'file': uvTexture[ 'file'],
+                                               'wrapS': uvTexture[ 'wrapS'],
+                                               'wrapT': uvTexture[ 'wrapT'],
+                                               'uuid': oomUtil.uuidSanitize( uvTexture[ 'file'].stem, _hashSeed = textureKey),
+                                               'shaders': [],
+                                             }
+            self.textures[ textureKey][ 'shaders'].append( shaderPrim)
+            uvTexture[ 'uuid'] = self.textures[ textureKey][ 'uuid']
+
+        uniqueFiles = list( { str( texture[ 'file']) for texture in self.textures.values()})
+        with concurrent.futures.ThreadPoolExecutor( max_workers = max( 1, min( 32, len( uniqueFiles)))) as pool:
+            fileStats = dict( zip( uniqueFiles, pool.map( functools.partial( statTexture, _bsaDire = _bsaDire), uniqueFiles)))
+        self.missingTextures = []
+        for texture in self.textures.values():
+            texture.update( fileStats[ str( texture[ 'file'])])
+            if not texture[ 'exists']: self.missingTextures.append( texture)
+        return self.missingTextures
+
+    ### key shared by every prim whose strongest authored reference points at the same target from the same layer
+    ### reading prim specs is cheap compared to building a Usd.PrimCompositionQuery
+    def compositionKey( self, _prim):
+        for primSpec in _prim.GetPrimStack():
+            if not primSpec.hasReferences: continue
+            references = primSpec.referenceList.GetAddedOrExplicitItems()
+            if references:
+                return ( primSpec.layer.identifier, references[ 0].assetPath, str( references[ 0].primPath))
+        return False
+
+    ### memoized, thousands of prims usually reference a handful of targets
+    def resolveInstance( self, _prim):
+        compositionKey = self.compositionKey( _prim)
+        if compositionKey in self.compositionCache:
+            self.compositionStats[ 'hits'] += 1
+            return self.compositionCache[ compositionKey]
+        self.compositionStats[ 'misses'] += 1
+        instancePrim = self.queryInstance( _prim)
+        if compositionKey: self.compositionCache[ compositionKey] = instancePrim
+        return instancePrim
+
+    def instanceUUID( self, _instancePrim):
+        if _instancePrim not in self.instanceUUIDs:
+            self.instanceUUIDs[ _instancePrim] = oomUtil.uuidSanitize( self.primName( _instancePrim), _hashSeed = self.stablePath( _instancePrim))
+        return self.instanceUUIDs[ _instancePrim]
+
+    ### usd numbers /__Prototype_N in discovery order, so an unrelated instanced asset renumbers every prototype
+    ### each prototype is named after what its instances reference instead, the compositionKey() target without the layer
+    ### prototypes of one target with different overrides or variants are told apart by their first instance's path
+    def prototypeSources( self, _prototypes = []):
+        sources = {}
+        for eachPrototype in _prototypes:
+            instancePrims = sorted( eachPrototype.GetInstances(), key = lambda instancePrim: instancePrim.GetPath())
+            compositionKeys = [ self.compositionKey( instancePrim) for instancePrim in instancePrims]
+            compositionKeys = sorted( compositionKey for compositionKey in compositionKeys if compositionKey)
+            if compositionKeys:
+                assetPath, primPath = compositionKeys[ 0][ 1:]
+                name = primPath.split( '/')[ -1] if primPath else Path( assetPath).stem
+                seed = '<' + assetPath + '>' + primPath
+            else: ### instanceable without a reference, ie inherits or payloads
+                name = instancePrims[ 0].GetName() if instancePrims else eachPrototype.GetName()
+                seed = str( instancePrims[ 0].GetPath()) if instancePrims else str( eachPrototype.GetPath())
+            self.prototypes[ eachPrototype] = { 'seed': seed, 'name': name or eachPrototype.GetName()}
+            sources.setdefault( seed, []).append( ( str( instancePrims[ 0].GetPath()) if instancePrims else '', eachPrototype))
+        for seed, prototypes in sources.items():
+            if len( prototypes) < 2: continue
+            for firstInstance, eachPrototype in prototypes: self.prototypes[ eachPrototype][ 'seed'] = seed + ' ' + firstInstance
+        return self.prototypes
+
+    ### uuid hash seed, the prim path with a prototype root swapped for its seed from prototypeSources()
+    def stablePath( self, _prim):
+        primPath = _prim.GetPath()
+        if not _prim.IsInPrototype(): return primPath
+        rootPath = primPath.GetPrefixes()[ 0]
+        prototype = self.prototypes.get( self.stage.GetPrimAtPath( rootPath))
+        if not prototype: return primPath
+        return prototype[ 'seed'] + str( primPath)[ len( str( rootPath)):]
+
+    ### written .name, prototype roots are named after their source like their uuid
+    def primName( self, _prim):
+        if _prim in self.prototypes: return self.prototypes[ _prim][ 'name']
+        return _prim.GetName()
 
     ###
-    def resolveInstance(self, _prim ):
+    def queryInstance(self, _prim ):
         # The powerful layering system allowing usd to compose the scene from many sources
         # leads to roundabout ways to find the prim that introduces a mesh
         # There seems to be an instance method but Blender exports a <prepend references>
@@ -458,78 +615,201 @@ class Reader:
         # in this case we take the 4th polygon and triangulate to 3,3,3
         # og_vertex_indices [ 0,1,2, 0,2,3, 3,4,5,6, 7,8,9,10,11, 12,13,14,15, 16,17,19 ] faceVertexIndices
         # -> [ 0,1,2, 0,2,3, 3,4,5,6, 7,8,9, 7,9,10, 7,10,11, 12,13,14,15, 16,17,19]
-        ### TODO - [ ] add support for subset indices since triangulate ngons changes indices
+        ### subset indices are remapped separately by remapSubsets() since triangulate ngons changes face indices
         ### take faceVertexCount ie [ 5,5,4,4,4,4] which becomes [ 3,3,3,3,3,3,4,4,4,4]
         ### subsindices was [ 1,2,3,5] and [ 0,4] becomes [ 3,4,5,6,7,9] [ 0,1,2,8]
 
-        npFaceVertexIndices  = np.array( _faceVertexIndices)  #convert to nparray so we can use slicing
-        if _txcoordIndices:
-            npTxcoordIndices  = np.array( _txcoordIndices)  #convert to nparray so we can use slicing
-            newTxcoordIndices = []
-        if _normalIndices:
-            npNormalIndices = np.array( _normalIndices)  #convert to nparray so we can use slicing
-
-        ogVertCount = 0 
-        newVertCount = 0
-        newVertexCounts = []    ### int[] faceVertexCount
-        newVertexIndices = []   ### int[] faceVertexIndices
-        newTxcoordIndices = []  ### int[] faceVertexIndices
-        newNormalIndices = []   ### int[] faceVertexIndices
-        ngonVertexLimit = 5
-
         # steps to triangulate a polygon
         # ngons triangulates to (numfaceverts - 2) triangles, ie a pentagon produces 5 (verts) - 2 = 3 triangles
         # _faceVertexCounts is a 1D array equal in size to total number of polygons, each array element stores number of vertices per face
         # _faceVertexIndices is a 1D array equal in size the sum of array elements in usdFaceVertexCounts
         #    where each element is an index that points to usd points list
-        # usd_point_list is a 2D array of points in a mesh (faceVertexIndices stores indices to this list allowing multiple faces to share point data)
-        # point data is XYZ location
-
-        for face in range( 0, len( _faceVertexCounts)):
-            numVertsPerFace = _faceVertexCounts[ face] 
-            if numVertsPerFace < ngonVertexLimit: # default triangle and quad processing
-                newVertexCounts.append( numVertsPerFace)
-                newVertexIndices += list( npFaceVertexIndices[ ogVertCount :ogVertCount + int( numVertsPerFace)])
-                ### 2024
-                if _txcoordIndices: # optional explict indices
-                    newTxcoordIndices += list( npTxcoordIndices[ ogVertCount :ogVertCount + int( numVertsPerFace)])
-                if _normalIndices: # optional explict indices
-                    newNormalIndices += list( npNormalIndices[ ogVertCount :ogVertCount + int( numVertsPerFace)])
-                ogVertCount += numVertsPerFace
-                newVertCount += numVertsPerFace
-            else: # ngon triangulation 
-                # [x] triangulation by slipstreaming modified faceVertexCounts and faceVertexIndices
-                # [x] single ngon face converts to numVerts-2 triangle faces, 5 verts = 3 tris
-                # [x] actual attribs will be recalculated after indices are modified
-                #     a return new to old mapping array is required after this operation
-                ngonVertexOffset = 0
-                for each_new_triangle in range( 0, numVertsPerFace - 2): # [x] decimating ngons results in this number of triangles 
-
-                    # append new triangles
-                    newVertexCounts.append( 3)
-                    newVertexIndices.append( int( npFaceVertexIndices[ ogVertCount + 0 ] ))
-                    newVertexIndices.append( int( npFaceVertexIndices[ ogVertCount + ngonVertexOffset + 1]))
-                    newVertexIndices.append( int( npFaceVertexIndices[ ogVertCount + ngonVertexOffset + 2]))
-                    if _txcoordIndices:
-                        newTxcoordIndices.append( int( npTxcoordIndices[ ogVertCount + 0]))
-                        newTxcoordIndices.append( int( npTxcoordIndices[ ogVertCount + ngonVertexOffset + 1]))
-                        newTxcoordIndices.append( int( npTxcoordIndices[ ogVertCount + ngonVertexOffset + 2]))
-                    if _normalIndices:
-                        newNormalIndices.append( int( npNormalIndices[ ogVertCount + 0]))
-                        newNormalIndices.append( int( npNormalIndices[ ogVertCount + ngonVertexOffset + 1]))
-                        newNormalIndices.append( int( npNormalIndices[ ogVertCount + ngonVertexOffset + 2]))
-                    ngonVertexOffset += 1
-                    newVertCount += 3
-                ogVertCount += numVertsPerFace
-        print(_faceVertexCounts,newVertexCounts)
-
-        if _txcoordIndices and _normalIndices:
+        # explicit txcoord and normal indices run parallel to _faceVertexIndices so all three are gathered through the same corner map
+        ### vectorized, every output corner is an offset into its authored face, see oomUtil.triangulatedCorners()
+        newVertexCounts, cornerMap = oomUtil.triangulatedCorners( npView( _faceVertexCounts, np.int64))
+
+        newVertexIndices = npView( _faceVertexIndices, np.int32)[ cornerMap]
+        newTxcoordIndices = npView( _txcoordIndices, np.int32)
+        newNormalIndices = npView( _normalIndices, np.int32)
+        if newTxcoordIndices.size: newTxcoordIndices = newTxcoordIndices[ cornerMap]
+        if newNormalIndices.size: newNormalIndices = newNormalIndices[ cornerMap]
+
+        if newTxcoordIndices.size and newNormalIndices.size:
             return newVertexCounts, newVertexIndices, newTxcoordIndices, newNormalIndices
-        elif _txcoordIndices:
+        elif newTxcoordIndices.size:
             return newVertexCounts, newVertexIndices, newTxcoordIndices
         else:
             return newVertexCounts, newVertexIndices
 
+    ### new face -> authored face, ngons become numVerts-2 triangles in place
+    ### [ 5,4,5] -> [ 0,0,0,1,2,2,2]
+    def triangulatedFaceMap( self, _faceVertexCounts):
+        npCounts = np.asarray( _faceVertexCounts, dtype=np.int64)
+        return np.repeat( np.arange( npCounts.size, dtype=np.int64), np.where( npCounts > 4, npCounts - 2, 1))
+
+    ### subset face indices -> triangulated face indices, one uint32 array per subset
+    ### each face is tagged with its subset, then gathered through the face map and split by a stable sort
+    ### so cost is linear in faces regardless of subset count ( fender_stratocaster has thousands)
+    def remapSubsets( self, 
+                      _subsetIndices = [],     # int[][]
+                      _faceVertexCounts = [],  # int[] authored, before triangulateNgons()
+                    ):
+        numFaces = len( _faceVertexCounts)
+        npSubsets = [ np.asarray( indices, dtype=np.int64) for indices in _subsetIndices]
+        npSubsets = [ indices[ ( indices >= 0) & ( indices < numFaces)] for indices in npSubsets] ### drop out of range faces
+        if not npSubsets: return []
+        faceMap = self.triangulatedFaceMap( _faceVertexCounts)
+        if faceMap.size == numFaces: ### no ngons, indices pass through
+            return [ indices.astype( np.uint32) for indices in npSubsets]
+        faceSubset = np.full( numFaces, -1, dtype=np.int64)
+        allIndices = np.concatenate( npSubsets)
+        faceSubset[ allIndices] = np.repeat( np.arange( len( npSubsets)), [ indices.size for indices in npSubsets])
+        if np.count_nonzero( faceSubset >= 0) != allIndices.size: ### overlapping subsets, familyType unrestricted
+            return [ np.flatnonzero( np.isin( faceMap, indices)).astype( np.uint32) for indices in npSubsets]
+        newFaceSubset = faceSubset[ faceMap]
+        order = np.argsort( newFaceSubset, kind = 'stable')
+        counts = np.bincount( newFaceSubset + 1, minlength = len( npSubsets) + 1) ### slot 0 = faces in no subset
+        order = order[ counts[ 0]:].astype( np.uint32)
+        return np.split( order, np.cumsum( counts[ 1:])[ :-1])
+
+    ### [ ( material uuid, uint32[] triangulated face indices)] for GeomSubsets with a bound material
+    def readSubsets( self, _prim, _faceVertexCounts):
+        materialUUIDs = []
+        subsetIndices = []
+        for geomSubset in UsdGeom.Subset.GetAllGeomSubsets( UsdGeom.Imageable( _prim)):
+            materialBinding = geomSubset.GetPrim().GetRelationship( 'material:binding')
+            if not materialBinding or not materialBinding.GetTargets(): continue
+            materialPrim = self.stage.GetPrimAtPath( materialBinding.GetTargets()[ 0])
+            if not materialPrim: continue ### if null then this material may be deactivated
+            materialUUIDs.append( oomUtil.uuidSanitize( materialPrim.GetName(), _hashSeed = self.stablePath( materialPrim)))
+            subsetIndices.append( geomSubset.GetIndicesAttr().Get())
+        return list( zip( materialUUIDs, self.remapSubsets( subsetIndices, _faceVertexCounts)))
+
+    ### world space Gf.Range3d, the pseudo root gives the whole scene and fills the cache for every prim below it
+    ### SetTime() is a no-op for the current time, so a frame's bounds are computed once however many callers ask
+    def worldBound( self, _prim = False, _timeCode = 1):
+        self.bbox_cache.SetTime( _timeCode)
+        return self.bbox_cache.ComputeWorldBound( _prim or self.stage.GetPseudoRoot()).ComputeAlignedRange()
+
+    ### bound in the prim's own space, before its transform
+    def localBound( self, _prim = False, _timeCode = 1):
+        self.bbox_cache.SetTime( _timeCode)
+        return self.bbox_cache.ComputeUntransformedBound( _prim).ComputeAlignedRange()
+
+    ### -lod, getMesh() arrays decimated with a grid from the prim's extent, plus the subsets remapped to the new triangles
+    ### memoized in meshes[ prim][ 'lods'] per level, static meshes are decimated once for the whole sequence
+    ### deforming meshes keep only the current frame, older frames are never asked for again
+    def getMeshLod( self, 
+                    _prim = False,  #UsdPrim
+                    _lod = 1,
+                    _timeCode = 1,
+                  ):
+        lods = self.meshes[ _prim].setdefault( 'lods', {})
+        key = ( _lod, _timeCode) if _prim.GetAttribute( 'points').ValueMightBeTimeVarying() else ( _lod,)
+        if key not in lods:
+            for staleKey in [ each for each in lods if len( each) > 1]: del lods[ staleKey]
+            npArrays = self.getMesh( _prim = _prim, _timeCode = _timeCode)
+            if not isinstance( npArrays[ 0], np.ndarray): return npArrays ### zero faces, see getMesh()
+            extent = self.localBound( _prim, _timeCode)
+            extent = ( extent.GetMin(), extent.GetMax()) if not extent.IsEmpty() else ( npArrays[ 2].min( axis = 0), npArrays[ 2].max( axis = 0))
+            lods[ key] = oomLod.decimate( *npArrays, 
+                                          _cellSize = oomLod.cellSize( extent, _lod), 
+                                          _subsets = self.meshes[ _prim].get( 'subsets', []),
+                                        )
+        return lods[ key]
+
+    ### authored vertex indices, points, texcoords and normals of a mesh prim, plus explicit texcoord and normal indices
+    ### raw VtArrays, False when not authored, shared by getMesh() and the -outofcore getMeshChunks()
+    def readMeshArrays( self, 
+                        _prim = False, #UsdPrim
+                        _timeCode = 1,
+                      ):
+        usdPoints = _prim.GetAttribute( 'points').Get( time = _timeCode ) # array of points and their positions
+        faceVertexIndices = UsdGeom.Mesh( _prim).GetFaceVertexIndicesAttr().Get( time = _timeCode)
+
+        # TEXCOORDS
+        # =========
+        # [x] Use primvar relationship in USD to determine attribute name for texcoords
+        # [ 2024 ] found Scales_baby.usda output with multiple UV texcoords2f primvars:body primvars:head
+        # [ 2024 ] Blender USD export supports one texture, multiple UV channels ( useful to increase texel density as needed)
+        #           Required a mix node for image texture and 2 uvmap nodes
+        dynTxcoordString = 'st' ### fallback 
+        if _prim.HasRelationship( 'material:binding'): ### Is there a material bound to this prim?
+            materialRelationship = _prim.GetRelationship( 'material:binding')
+            materialSdfPath = materialRelationship.GetTargets()[ 0]
+            materialPrim = self.stage.GetPrimAtPath( materialSdfPath)
+            for materialShaderPrims in Usd.PrimRange( materialPrim): ## local traversal
+                infoId = UsdShade.Shader( materialShaderPrims).GetIdAttr().Get()
+                if infoId == 'UsdPrimvarReader_float2':
+                    usdShadeInput = UsdShade.Shader( materialShaderPrims).GetInput( 'varname') ## resolve to input name
+                    ### Get sdfPath to another prim where value is stored
+                    ### - [ ] Could this be connected to another node, do I need a reursive loop?
+                    connect2 = usdShadeInput.GetAttr().GetConnections()
+                    ### Returns list of input connections
+                    if len(connect2) == 1: # input
+                        sdfPath2 = usdShadeInput.GetAttr().GetConnections()[ 0] # naive assumption that connections to only one leaf node, otherwise we need a full tree search
+                        matPrim2 = self.stage.GetPrimAtPath( sdfPath2.GetPrimPath()) ### Get UsdPrima that at end of this connection
+                        dynTxcoordString = matPrim2.GetAttribute( sdfPath2.name).Get() ### UsdPrim.GetAttribute(  ) 
+                    else: # local value stored on input
+                        dynTxcoordString = usdShadeInput.Get()
+
+        ### 2024 material binding
+        ###materialBinding =  _prim.GetRelationship('material:binding')
+        ###if materialBinding.GetTargets():
+        ###    materialSdfPath = materialBinding.GetTargets()[ 0]
+        ###    materialPrim = self.stage.GetPrimAtPath( materialSdfPath)
+
+        ### Look for txccords with explicit indices
+        explicitTxcoordIndices = False  
+        usdTxcoords = False
+        if _prim.GetAttribute( 'primvars:' + dynTxcoordString).IsValid():  # houdini, blender, maya
+            usdTxcoords = _prim.GetAttribute( 'primvars:' + dynTxcoordString).Get( time = _timeCode)
+            if _prim.GetAttribute( 'primvars:' + dynTxcoordString + ':indices').IsValid(): # maya stores explicit indices
+                # Maya writes usd with explicit texcoord indices while Blender and Houdini use implicit texcoords indexing
+                # - [ ] document implicit versus explicit
+                explicitTxcoordIndices = _prim.GetAttribute( 'primvars:' + dynTxcoordString + ':indices').Get( time = _timeCode)
+ 
+        ### NORMALS
+        ###======== tv_retro.usda = normals t51-helmet.usda = primvars:normals : - [ ] why two string tokens?
+        explicitNormalIndices = False
+        usdNormals = False
+        if _prim.GetAttribute( 'primvars:normals').IsValid(): # TODO Shouldn't access raw attrib, need pxr wrapper: same reason why texcoords was switched, may not apply in this case
+            usdNormals = _prim.GetAttribute( 'primvars:normals').Get( time = _timeCode)
+            if _prim.GetAttribute( 'primvars:normals:indices').IsValid(): 
+                explicitNormalIndices = _prim.GetAttribute( 'primvars:normals:indices').Get( time = _timeCode)
+        elif _prim.GetAttribute( 'normals').IsValid(): # TODO Shouldn't access raw attrib, need pxr wrapper
+            usdNormals = UsdGeom.Mesh( _prim).GetNormalsAttr().Get( time = _timeCode)
+            if _prim.GetAttribute( 'normals:indices').IsValid(): 
+                explicitNormalIndices = _prim.GetAttribute( 'normals:indices').Get( time = _timeCode)
+        return faceVertexIndices, usdPoints, usdTxcoords, explicitTxcoordIndices, usdNormals, explicitNormalIndices
+
+    ### -outofcore, a mesh with more than _threshold authored faces wrapped for chunked writing, False otherwise
+    ### the face counts are read first so meshes below the threshold cost one small read before getMesh()
+    def getMeshChunks( self, 
+                       _prim = False,  #UsdPrim
+                       _timeCode = 1,
+                       _threshold = 0,
+                       _chunkFaces = 100000,
+                       _scratchDire = '',
+                     ):
+        faceVertexCounts = UsdGeom.Mesh( _prim).GetFaceVertexCountsAttr().Get( time = _timeCode)
+        npFaceVertexCounts = npView( faceVertexCounts, np.int32)
+        if _threshold <= 0 or npFaceVertexCounts.size <= _threshold: return False
+        faceVertexIndices, usdPoints, usdTxcoords, explicitTxcoordIndices, usdNormals, explicitNormalIndices \
+        = self.readMeshArrays( _prim = _prim, _timeCode = _timeCode)
+        if _prim in self.meshes and 'subsets' not in self.meshes[ _prim]:
+            self.meshes[ _prim][ 'subsets'] = self.readSubsets( _prim, faceVertexCounts)
+        return oomOutOfCore.MeshChunks( _faceVertexCounts = npFaceVertexCounts,
+                                        _faceVertexIndices = npView( faceVertexIndices, np.int32),
+                                        _points = npView( usdPoints),
+                                        _txcoords = npView( usdTxcoords),
+                                        _txcoordIndices = npView( explicitTxcoordIndices, np.int32),
+                                        _normals = npView( usdNormals),
+                                        _normalIndices = npView( explicitNormalIndices, np.int32),
+                                        _chunkFaces = _chunkFaces,
+                                        _scratchDire = _scratchDire,
+                                      )
+
     ##
     def getMesh( self, 
                  _prim = False,              #UsdPrim
@@ -553,138 +833,59 @@ class Reader:
             faceVertexCounts = usdGeom.GetFaceVertexCountsAttr().Get( time = _timeCode)
         else: ## unittest
             faceVertexCounts = _faceVertexCounts
+        ### every usd array below is read through npView(), no copies until vertices are split
+        npFaceVertexCounts = npView( faceVertexCounts, np.int32)
 
-        if len( faceVertexCounts) == 0: # Return False when no polygons found
+        if npFaceVertexCounts.size == 0: # Return False when no polygons found
             if self.debug: print( 'FAIL:', _prim, 'zero faces')
             return False, False, False, False, False, False
 
         if _prim:
-            usdPoints = _prim.GetAttribute( 'points').Get( time = _timeCode ) # array of points and their positions
-            faceVertexIndices = usdGeom.GetFaceVertexIndicesAttr().Get( time = _timeCode)
+            faceVertexIndices, usdPoints, usdTxcoords, explicitTxcoordIndices, usdNormals, explicitNormalIndices \
+            = self.readMeshArrays( _prim = _prim, _timeCode = _timeCode)
         else: ## unittest
-            usdPoints = _usdPoints
-            faceVertexIndices = _faceVertexIndices
-
-        ### Need to gather subset dictionary for mesh in case we need to triangulate
-        ### maybe do this after checking if there are ngons
-        subset_count = 0
-        for each_subset in UsdGeom.Subset.GetAllGeomSubsets( usdGeom):
-            subset_prim =  each_subset.GetPrim()
-            subset_indices = each_subset.GetIndicesAttr().Get( time =  _timeCode)
-            subset_material_bind =  subset_prim.GetRelationship('material:binding')
-            subset_mat_prim = False
-            if subset_material_bind.GetTargets():
-                subset_material_sdfpath = subset_material_bind.GetTargets()[ 0]
-                subset_mat_prim = self.usdScene.stage.GetPrimAtPath( subset_material_sdfpath)
-                if subset_mat_prim: ### if null then this material may be deactivated
-                    subset_material_name = oomUtil.uuidSanitize( subset_mat_prim.GetName(), _hashSeed = subset_mat_prim.GetPath())
-                    self.writeAttribRaw( _name = 'materials[' + str(subset_count) + '].material', _value = subset_material_name)
-                    #self.writeAttribRaw( _name = 'materials[' + str(subset_count) + '].indices', _value = 'uint32[1]{' + str( subset_count) + '}')
-                    self.writeAttribNumpy( _name = 'materials[' + str( subset_count) + '].indices',
-                                        _type = 'uint32[' + str( len( subset_indices)) + ']',
-                                        _bracket = '{',
-                                        _nparray = np.array( subset_indices)
-                                        )
-            subset_count += 1
+            faceVertexIndices, usdPoints, usdTxcoords, explicitTxcoordIndices, usdNormals, explicitNormalIndices \
+            = _faceVertexIndices, _usdPoints, _usdTxcoords, False, _usdNormals, False
 
+        ### GeomSubsets index the authored faces, remember the counts before ngons are split
+        ogFaceVertexCounts = faceVertexCounts
 
-        # TEXCOORDS
-        # =========
-        # [x] Use primvar relationship in USD to determine attribute name for texcoords
-        # [ 2024 ] found Scales_baby.usda output with multiple UV texcoords2f primvars:body primvars:head
-        # [ 2024 ] Blender USD export supports one texture, multiple UV channels ( useful to increase texel density as needed)
-        #           Required a mix node for image texture and 2 uvmap nodes
-        if _prim:
-            dynTxcoordString = 'st' ### fallback 
-            if _prim.HasRelationship( 'material:binding'): ### Is there a material bound to this prim?
-                materialRelationship = _prim.GetRelationship( 'material:binding')
-                materialSdfPath = materialRelationship.GetTargets()[ 0]
-                materialPrim = self.stage.GetPrimAtPath( materialSdfPath)
-                for materialShaderPrims in Usd.PrimRange( materialPrim): ## local traversal
-                    infoId = UsdShade.Shader( materialShaderPrims).GetIdAttr().Get()
-                    if infoId == 'UsdPrimvarReader_float2':
-                        usdShadeInput = UsdShade.Shader( materialShaderPrims).GetInput( 'varname') ## resolve to input name
-                        ### Get sdfPath to another prim where value is stored
-                        ### - [ ] Could this be connected to another node, do I need a reursive loop?
-                        connect2 = usdShadeInput.GetAttr().GetConnections()
-                        ### Returns list of input connections
-                        if len(connect2) == 1: # input
-                            sdfPath2 = usdShadeInput.GetAttr().GetConnections()[ 0] # naive assumption that connections to only one leaf node, otherwise we need a full tree search
-                            matPrim2 = self.stage.GetPrimAtPath( sdfPath2.GetPrimPath()) ### Get UsdPrima that at end of this connection
-                            dynTxcoordString = matPrim2.GetAttribute( sdfPath2.name).Get() ### UsdPrim.GetAttribute(  ) 
-                        else: # local value stored on input
-                            dynTxcoordString = usdShadeInput.Get()
-
-            ### 2024 material binding
-            ###materialBinding =  _prim.GetRelationship('material:binding')
-            ###if materialBinding.GetTargets():
-            ###    materialSdfPath = materialBinding.GetTargets()[ 0]
-            ###    materialPrim = self.stage.GetPrimAtPath( materialSdfPath)
-
-        ### Look for txccords with explicit indices
-        explicitTxcoordIndices = False  
-        usdTxcoords = False
-        if _prim: 
-            if _prim.GetAttribute( 'primvars:' + dynTxcoordString).IsValid():  # houdini, blender, maya
-                usdTxcoords = _prim.GetAttribute( 'primvars:' + dynTxcoordString).Get( time = _timeCode)
-                if _prim.GetAttribute( 'primvars:' + dynTxcoordString + ':indices').IsValid(): # maya stores explicit indices
-                    # Maya writes usd with explicit texcoord indices while Blender and Houdini use implicit texcoords indexing
-                    # - [ ] document implicit versus explicit
-                    explicitTxcoordIndices = _prim.GetAttribute( 'primvars:' + dynTxcoordString + ':indices').Get( time = _timeCode)
-        else: ## unittest
-            usdTxcoords = _usdTxcoords
- 
-        ### NORMALS
-        ###======== tv_retro.usda = normals t51-helmet.usda = primvars:normals : - [ ] why two string tokens?
-        explicitNormalIndices = False
-        usdNormals = False
-        if _prim:
-            if _prim.GetAttribute( 'primvars:normals').IsValid(): # TODO Shouldn't access raw attrib, need pxr wrapper: same reason why texcoords was switched, may not apply in this case
-                usdNormals = _prim.GetAttribute( 'primvars:normals').Get( time = _timeCode)
-                if _prim.GetAttribute( 'primvars:normals:indices').IsValid(): 
-                    explicitNormalIndices = _prim.GetAttribute( 'primvars:normals:indices').Get( time = _timeCode)
-            elif _prim.GetAttribute( 'normals').IsValid(): # TODO Shouldn't access raw attrib, need pxr wrapper
-                usdNormals = UsdGeom.Mesh( _prim).GetNormalsAttr().Get( time = _timeCode)
-                if _prim.GetAttribute( 'normals:indices').IsValid(): 
-                    explicitNormalIndices = _prim.GetAttribute( 'normals:indices').Get( time = _timeCode)
-            else:
-                usdNormals = _usdNormals
-        else:
-            usdNormals = _usdNormals
+        npFaceVertexIndices = npView( faceVertexIndices, np.int32)
+        npPoints = npView( usdPoints)
+        npUsdTxcoords = npView( usdTxcoords)
+        npUsdNormals = npView( usdNormals)
+        npExplicitTxcoordIndices = npView( explicitTxcoordIndices, np.int32)
+        npExplicitNormalIndices = npView( explicitNormalIndices, np.int32)
 
         ### NGONS
         ###======
         # - [x] triangulate ngons by restructuring counts and indices
-        npFaceVertexCounts = np.array( faceVertexCounts, dtype=np.int32)  ## need numpy array here to test for ngons
-        if npFaceVertexCounts[ npFaceVertexCounts > 4].size > 0:
-            if explicitTxcoordIndices: ### example tv_retro.usdz
-                if explicitNormalIndices:
-                    faceVertexCounts, faceVertexIndices, explicitTxcoordIndices, explicitNormalIndices \
-                    = self.triangulateNgons( faceVertexCounts,          #int[]
-                                             faceVertexIndices,         #int[] 
-                                             explicitTxcoordIndices,    #int[]
-                                             explicitNormalIndices,     #int[]
+        if ( npFaceVertexCounts > 4).any():
+            if npExplicitTxcoordIndices.size: ### example tv_retro.usdz
+                if npExplicitNormalIndices.size:
+                    npFaceVertexCounts, npFaceVertexIndices, npExplicitTxcoordIndices, npExplicitNormalIndices \
+                    = self.triangulateNgons( npFaceVertexCounts,          #int[]
+                                             npFaceVertexIndices,         #int[] 
+                                             npExplicitTxcoordIndices,    #int[]
+                                             npExplicitNormalIndices,     #int[]
                                            )
                 else:
-                    faceVertexCounts, faceVertexIndices, explicitTxcoordIndices \
-                    = self.triangulateNgons( faceVertexCounts,          #int[]
-                                              faceVertexIndices,        #int[]
-                                              explicitTxcoordIndices,   #int[]
-                                            )
+                    npFaceVertexCounts, npFaceVertexIndices, npExplicitTxcoordIndices \
+                    = self.triangulateNgons( npFaceVertexCounts,          #int[]
+                                             npFaceVertexIndices,         #int[]
+                                             npExplicitTxcoordIndices,    #int[]
+                                           )
             else:
-                faceVertexCounts, faceVertexIndices = self.triangulateNgons( faceVertexCounts, faceVertexIndices)
-            npFaceVertexCounts = np.array( faceVertexCounts, dtype=np.int32) # redata nparray with triangulated version
+                npFaceVertexCounts, npFaceVertexIndices = self.triangulateNgons( npFaceVertexCounts, npFaceVertexIndices)
+
+        ### SUBSETS
+        ###========
+        ### read once per mesh, topology is a frame 1 snapshot anyway
+        if _prim and _prim in self.meshes and 'subsets' not in self.meshes[ _prim]:
+            self.meshes[ _prim][ 'subsets'] = self.readSubsets( _prim, ogFaceVertexCounts)
 
-        ### numpy-ify
-        ###==========
         numFaces = npFaceVertexCounts.size 
-        npFaceVertexIndices = np.array( faceVertexIndices, dtype=np.int32)  
-        npPoints = np.array( usdPoints, dtype='float64') 
-        if explicitTxcoordIndices: ### 
-            npExplicitTxcoordIndices = np.array( explicitTxcoordIndices, dtype=np.int32)   
-        if explicitNormalIndices: ### 
-            npExplicitNormalIndices = np.array( explicitNormalIndices, dtype=np.int32)   
-            
+
         # convert USD mixed tri/vert shared verts -> Bella unshared verts
         # A usda triangle/quad/triangle might look like this 
         # int[] faceVertexCounts = [3, 4, 3]
@@ -719,33 +920,33 @@ class Reader:
 
         ### since npFaceVertexIndices repeats itself when you have shared verts we automatically duplicate values 
         ### thus shared verts -> unshared verts in one step
-        npPoints = npPoints[ ( npFaceVertexIndices)]
-
-        if usdTxcoords: 
-            if explicitTxcoordIndices: # Maya tends to export explicitly indexed vertex buffers
-                npTxcoords = np.array( usdTxcoords, dtype='float64')[ ( npExplicitTxcoordIndices)] # nparray reindexed using explicit indices
-            elif len(usdTxcoords) == len(npFaceVertexIndices): ##  if vertices were split these won't match
-                npTxcoords = np.array( usdTxcoords, dtype='float64') ## pass through 
+        ### the gather is the one copy of each array, float32 stays float32, the writers format it at the same precision
+        npPoints = npPoints[ npFaceVertexIndices]
+
+        if npUsdTxcoords.size: 
+            if npExplicitTxcoordIndices.size: # Maya tends to export explicitly indexed vertex buffers
+                npTxcoords = npUsdTxcoords[ npExplicitTxcoordIndices] # nparray reindexed using explicit indices
+            elif len( npUsdTxcoords) == len( npFaceVertexIndices): ##  if vertices were split these won't match
+                npTxcoords = npUsdTxcoords ## pass through, still a read only view of the VtArray
             else: ### Magic sauce using numpy to split vertices in a single vectorized operation
                 ### - [ ] TODO document the magic sauce
-                npTxcoords = np.array( usdTxcoords, dtype='float64')[ ( npFaceVertexIndices)]
+                npTxcoords = npUsdTxcoords[ npFaceVertexIndices]
         else: # no txcoords
             npTxcoords = False
 
         # - [ ] TODO need to verify normals
         # - [ ] TODO add a unit test for normals
         npNormals = False
-        if usdNormals: 
-            if explicitNormalIndices: ## Maya tends to export explicitly indexed vertex buffers
-                npNormals = np.array( usdNormals, dtype='float64')[ ( npExplicitNormalIndices)]  
-            elif len(usdNormals) == len(npFaceVertexIndices): ##  if vertices were split these won't match
-                npNormals = np.array( usdNormals, dtype='float64')
+        if npUsdNormals.size: 
+            if npExplicitNormalIndices.size: ## Maya tends to export explicitly indexed vertex buffers
+                npNormals = npUsdNormals[ npExplicitNormalIndices]  
+            elif len( npUsdNormals) == len( npFaceVertexIndices): ##  if vertices were split these won't match
+                npNormals = npUsdNormals
             else: ### Magic sauce using numpy to split vertices in a single vectorized operation
                 ### - [ ] document the magic sauce
-                npNormals = np.array( usdNormals, dtype='float64')[ ( npFaceVertexIndices)]  # - [ ] split verts if needed magic sauce
+                npNormals = npUsdNormals[ npFaceVertexIndices]  # - [ ] split verts if needed magic sauce
         else: ### - no normals at all TODO maybe switch to bool
             npNormals = False
-            #npNormals = np.zeros( [0,3], dtype='float64')
 
         return  npFaceVertexCounts, \
                 npIndicesInC4DStyle, \
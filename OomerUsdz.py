@@ -0,0 +1,119 @@
+### oomer usdz module
+
+'''
+MIT License
+
+Copyright (c) 2023 Harvey Fong
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+
+### .usdz is an uncompressed zip whose members are 64 byte aligned, USD resolves assets
+### inside it to package relative paths like /dir/tv_retro.usdz[0/tv_retro_body_bc.png]
+### Bella needs real files, so only the referenced textures are copied out of the package
+### straight from an mmap of the .usdz, no zip decompression and no intermediate buffers
+### extracted files are cached per package version ( path, size, mtime) and reused across runs
+# - [x] stored ( uncompressed) members, mmap slice -> file
+# - [x] nested packages and compressed members fall back to a copy through Sdf.ZipFile / zipfile
+
+## standard modules
+from pathlib import Path  # used for cross platform file paths
+import hashlib
+import mmap
+import os
+import zipfile
+
+## third party modules
+from pxr import Ar, Sdf
+
+def isPackagePath( _file):
+    return bool( _file) and Ar.IsPackageRelativePath( str( _file))
+
+### one cache subdir per package version, an edited .usdz never reuses stale textures
+def packageDire( _package, _cacheDire):
+    fileStat = os.stat( _package)
+    version = str( Path( _package).resolve()) + '|' + str( fileStat.st_size) + '|' + str( fileStat.st_mtime)
+    return Path( _cacheDire).absolute() / ( Path( _package).stem + '_' + hashlib.sha1( version.encode( 'utf-8')).hexdigest()[ :8])
+
+### write member bytes to a temp file then rename, concurrent batch workers never see partial textures
+def writeMember( _target, _data):
+    _target.parent.mkdir( parents = True, exist_ok = True)
+    tmpTarget = _target.with_name( _target.name + '.' + str( os.getpid()) + '.tmp')
+    with open( tmpTarget, 'wb') as file:
+        file.write( _data)
+    os.replace( str( tmpTarget), str( _target))
+
+### package relative paths -> { package relative path: extracted file}, unreadable members are left out
+def extractTextures( _files = [], _cacheDire = False):
+    packages = {}
+    for file in set( str( file) for file in _files if isPackagePath( file)):
+        package, member = Ar.SplitPackageRelativePathInner( file)
+        packages.setdefault( package, []).append( ( file, member))
+
+    extracted = {}
+    for package, members in packages.items():
+        outerPackage = Ar.SplitPackageRelativePathOuter( package)[ 0] if isPackagePath( package) else package
+        if not os.path.isfile( outerPackage):
+            print( 'MISSING usdz:', package)
+            continue
+        zipFile = Sdf.ZipFile.Open( package)
+        if not zipFile:
+            print( 'FAIL usdz open:', package)
+            continue
+        targetDire = packageDire( outerPackage, _cacheDire)
+        if isPackagePath( package): ### nested .usdz, offsets are relative to the inner package
+            targetDire = targetDire / hashlib.sha1( package.encode( 'utf-8')).hexdigest()[ :8]
+        memberNames = set( zipFile.GetFileNames())
+        pending = []
+        for file, member in members:
+            if member not in memberNames:
+                print( 'MISSING usdz member:', file)
+                continue
+            if Path( member).is_absolute() or '..' in Path( member).parts: ### stay inside the cache
+                print( 'FAIL usdz member path:', file)
+                continue
+            fileInfo = zipFile.GetFileInfo( member)
+            target = targetDire / member
+            if target.is_file() and target.stat().st_size == fileInfo.uncompressedSize: 
+                extracted[ file] = str( target) ### cache hit
+                continue
+            pending.append( ( file, member, fileInfo, target))
+        if not pending: continue
+
+        if isPackagePath( package):
+            for file, member, fileInfo, target in pending:
+                writeMember( target, zipFile.GetFile( member))
+                extracted[ file] = str( target)
+            continue
+        with open( outerPackage, 'rb') as packageFile:
+            packageMap = mmap.mmap( packageFile.fileno(), 0, access = mmap.ACCESS_READ)
+            packageView = memoryview( packageMap)
+            try:
+                for file, member, fileInfo, target in pending:
+                    if fileInfo.compressionMethod == 0: ### usdz spec, stored members
+                        writeMember( target, packageView[ fileInfo.dataOffset: fileInfo.dataOffset + fileInfo.size])
+                    else: ### not a conforming usdz, let zipfile inflate it
+                        with zipfile.ZipFile( outerPackage) as packageZip:
+                            writeMember( target, packageZip.read( member))
+                    extracted[ file] = str( target)
+            finally:
+                packageView.release()
+                packageMap.close()
+    return extracted
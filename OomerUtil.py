@@ -135,6 +135,64 @@ class MaterialX:
 
                        }
 
+### numeric output precision per attribute class, selected with -precision
+### ( 'sig', n)     n significant digits, %g style, 6 was the only option before profiles
+### ( 'repr', 0)    shortest string that round-trips the float64, used for transforms
+### ( 'dec', n)     quantized to n decimal places, trailing zeros dropped
+### indices are always written as integers
+class Precision:
+    def __init__( self ):
+        self.classes = [ ( 'mat4f', 'instances'), ### bella type prefix -> attribute class, mat4f before mat4
+                         ( 'mat4',  'matrix'),
+                         ( 'pos3f', 'points'),
+                         ( 'vec3f', 'normals'),
+                         ( 'vec2f', 'uvs'),
+                         ( 'vec4u', 'indices'),
+                         ( 'uint32','indices'),
+                       ]
+        self.profiles = { 'legacy':   { 'matrix': ( 'sig', 6), 'instances': ( 'sig', 6), 'points': ( 'sig', 6), 'normals': ( 'sig', 6), 'uvs': ( 'sig', 6)},
+                          'exact':    { 'matrix': ( 'repr', 0), 'instances': ( 'sig', 9), 'points': ( 'sig', 9), 'normals': ( 'sig', 9), 'uvs': ( 'sig', 9)},
+                          'balanced': { 'matrix': ( 'repr', 0), 'instances': ( 'sig', 9), 'points': ( 'sig', 9), 'normals': ( 'dec', 4), 'uvs': ( 'dec', 5)},
+                          'compact':  { 'matrix': ( 'repr', 0), 'instances': ( 'sig', 9), 'points': ( 'sig', 7), 'normals': ( 'dec', 3), 'uvs': ( 'dec', 4)},
+                        }
+
+### _integerDigits, 'dec' width from the whole array when it is formatted a chunk at a time, see integerDigits()
+def formatNumpy( npArray, _mode = ( 'sig', 6), _integerDigits = False):
+    mode, digits = _mode
+    if npArray.size == 0: return ''
+    if mode == 'int':
+        return ' '.join( [ '%d'] * npArray.size) % tuple( npArray)
+    if mode == 'repr': ### float64 round trip, '1' rather than '1.0' to match %g
+        return ' '.join( [ value[ :-2] if value.endswith( '.0') else value for value in map( repr, npArray.astype( np.float64).tolist())])
+    if mode == 'dec':
+        npArray = np.round( npArray.astype( np.float64, copy = False), digits) + 0.0 ### + 0.0 drops -0, float32 input rounds half way cases wrong in float32
+        finite = np.abs( npArray[ np.isfinite( npArray)]) ### nan and inf pass through as text like %g, they don't set the width
+        digits += _integerDigits or ( len( str( int( finite.max()))) if finite.size else 1)
+    return ' '.join( [ '%.' + str( digits) + 'g'] * npArray.size) % tuple( npArray)
+
+### digits left of the point once rounded to _digits places, the max over chunks equals the whole array's
+### nan and inf are skipped, same as formatNumpy()
+def integerDigits( npArray, _digits = 0):
+    npArray = np.round( npArray.astype( np.float64, copy = False), _digits)
+    finite = np.abs( npArray[ np.isfinite( npArray)])
+    if finite.size == 0: return 1
+    return len( str( int( finite.max())))
+
+### triangulated face counts plus the authored corner each output corner reads from
+### triangles and quads keep corners 0..n-1, ngon triangle k takes corners 0, k+1, k+2
+### _cornerStart offsets the map when the counts are one chunk of a larger mesh
+def triangulatedCorners( _faceVertexCounts, _cornerStart = 0):
+    npCounts = np.asarray( _faceVertexCounts, dtype = np.int64)
+    isNgon = npCounts >= 5
+    faceStarts = _cornerStart + np.concatenate( ( [ 0], np.cumsum( npCounts)[ :-1]))
+    newVertexCounts = np.repeat( np.where( isNgon, 3, npCounts), np.where( isNgon, npCounts - 2, 1)).astype( np.int32)
+    outCorners = np.where( isNgon, 3 * ( npCounts - 2), npCounts)
+    cornerFace = np.repeat( np.arange( npCounts.size), outCorners)
+    cornerPosition = np.arange( cornerFace.size) - np.repeat( np.cumsum( outCorners) - outCorners, outCorners)
+    triangle, vertex = np.divmod( cornerPosition, 3)
+    cornerMap = faceStarts[ cornerFace] + np.where( isNgon[ cornerFace], np.where( vertex == 0, 0, triangle + vertex), cornerPosition)
+    return newVertexCounts, cornerMap
+
 def str_increment(s):
     reg_search = re.search(r'\d*(\D*)$', str(s))
     if reg_search:
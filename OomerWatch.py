@@ -0,0 +1,211 @@
+### Live watch module
+
+'''
+MIT License
+
+Copyright (c) 2023 Harvey Fong
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+### -watch keeps the Usd.Stage open and polls the files of its used layers
+### a saved layer is reloaded, Usd.Notice.ObjectsChanged reports which prims were touched
+### and only the writers of those prims are re-run, their text is patched into the previous .bsa
+# - [x] attribute edits ( material tweaks, xforms, lights) re-export only the touched prims
+# - [x] structural edits ( resynced prims) fall back to a full traversal, the stage stays open
+# - [ ] animated range, only a single timeCode is watched
+
+## standard modules
+import io
+import os
+import os.path
+import time
+
+## third party modules
+from pxr import Usd
+from pxr import Sdf
+from pxr import Tf
+
+class Watcher:
+    def __init__( self,
+                  _converter = False, # OomerConvert.Converter
+                  _timeCode = 1,
+                  _interval = 0.5,    # seconds between layer file checks
+                ):
+        self.converter = _converter
+        self.usdScene = _converter.usdScene
+        self.stage = self.usdScene.stage
+        self.timeCode = _timeCode
+        self.interval = _interval
+        self.bsa = False
+        self.header = ''
+        self.writers = {} ### job key -> writer
+        self.chunks = {}  ### job key -> bsa text written by writer
+        self.order = []   ### job keys in bsa write order
+        self.layerTimes = {}
+        self.changedPaths = set()
+        self.resynced = False
+        self.listener = Tf.Notice.Register( Usd.Notice.ObjectsChanged, self.onObjectsChanged, self.stage)
+
+    def onObjectsChanged( self, _notice, _sender):
+        for sdfPath in _notice.GetResyncedPaths(): 
+            if sdfPath.IsPropertyPath(): ### new or removed attribute spec, the prim itself is unchanged
+                self.changedPaths.add( sdfPath.GetPrimPath())
+            else:
+                self.resynced = True
+        for sdfPath in _notice.GetChangedInfoOnlyPaths():
+            ### a reloaded layer always reports the pseudo root, real edits come with their own paths
+            if sdfPath != Sdf.Path.absoluteRootPath:
+                self.changedPaths.add( sdfPath.GetPrimPath())
+
+    ### modification times of every layer file that composes the stage
+    def layerModTimes( self):
+        modTimes = {}
+        for layer in self.stage.GetUsedLayers():
+            if layer.realPath and os.path.exists( layer.realPath):
+                modTimes[ layer] = os.path.getmtime( layer.realPath)
+        return modTimes
+
+    def changedLayers( self):
+        modTimes = self.layerModTimes()
+        changed = [ layer for layer in modTimes if self.layerTimes.get( layer) != modTimes[ layer]]
+        self.layerTimes = modTimes
+        return changed
+
+    ### run a writer with the bsa file swapped for an in memory buffer, return what it wrote
+    def capture( self, _writer):
+        self.bsa.file = io.StringIO()
+        _writer()
+        return self.bsa.file.getvalue()
+
+    def fullExport( self):
+        self.bsa = self.converter.openScene( self.timeCode, _memoryFile = True)
+        self.header = self.bsa.file.getvalue()
+        self.writers = {}
+        self.chunks = {}
+        self.order = []
+        for key, writer in self.converter.frameJobs( self.bsa, self.timeCode):
+            self.order.append( key)
+            self.writers[ key] = writer
+            self.chunks[ key] = self.capture( writer)
+        self.flush()
+        return len( self.order)
+
+    def isDirty( self, _key):
+        category, prim = _key
+        if not prim: return False ### scene wide nodes only depend on the traversal
+        primPath = prim.GetPath()
+        for changedPath in self.changedPaths:
+            if changedPath == primPath: return True
+            ### xforms only write their own matrix and child names, other writers read below the prim, ie shader inputs under a Material
+            if category not in ( 'xform', 'scope') and changedPath.HasPrefix( primPath): return True 
+            if category == 'camera' and primPath.HasPrefix( changedPath): return True ### camera xform is written in world space
+        return False
+
+    def patch( self):
+        if self.resynced: ### prims added or removed, traverse again but keep the stage
+            self.resynced = False
+            self.changedPaths = set()
+            self.usdScene.resetTraversal()
+            self.usdScene.traverseScene()
+            self.usdScene.xform_cache.Clear()
+            self.usdScene.bbox_cache.Clear()
+            return self.fullExport()
+        self.usdScene.xform_cache.Clear()
+        self.usdScene.bbox_cache.Clear() ### frameBound() and -frustum read world bounds through it
+        ### traversal stores shader values and texture paths, gather edited Materials again
+        materials = set()
+        for changedPath in self.changedPaths:
+            materialPrim = self.materialOf( changedPath)
+            if materialPrim: materials.add( materialPrim)
+        for materialPrim in materials:
+            self.usdScene.traverseMaterial( materialPrim, _refresh = True)
+            self.changedPaths.add( materialPrim.GetPath()) ### its textures live below the Material
+        if materials: ### writers were bound to the old values
+            self.converter.prepareTextures()
+            jobs = self.converter.frameJobs( self.bsa, self.timeCode)
+            if [ key for key, writer in jobs] != self.order: ### unique texture set changed
+                self.changedPaths = set()
+                return self.fullExport()
+            for key, writer in jobs:
+                self.writers[ key] = writer
+        ### visibility and purpose are read at traversal, meshes at or below an edited prim read them again
+        refreshed = [ prim for prim in list( self.usdScene.meshes) 
+                      if any( prim.GetPath().HasPrefix( changedPath) for changedPath in self.changedPaths) and self.usdScene.refreshMesh( prim)]
+        for prim in refreshed: self.changedPaths.add( prim.GetPath())
+        if refreshed: ### proxy, guide and -cull meshes drop out of the job list or come back
+            jobs = self.converter.frameJobs( self.bsa, self.timeCode)
+            if [ key for key, writer in jobs] != self.order:
+                self.changedPaths = set()
+                return self.fullExport()
+            for key, writer in jobs:
+                self.writers[ key] = writer
+        dirtyKeys = [ key for key in self.order if self.isDirty( key)]
+        self.changedPaths = set()
+        ### without a usd camera oomerCamera frames the world bound, anything that moves or reshapes geometry moves it
+        if ( 'oomerCamera', False) in self.writers and any( key[ 0] in [ 'mesh', 'xform', 'scope', 'primitive', 'instancer'] for key in dirtyKeys):
+            dirtyKeys.append( ( 'oomerCamera', False))
+        for key in dirtyKeys:
+            if key[ 0] == 'mesh': ### cached once per mesh
+                self.usdScene.meshes[ key[ 1]].pop( 'subsets', None)
+                self.usdScene.meshes[ key[ 1]].pop( 'lods', None)
+            self.chunks[ key] = self.capture( self.writers[ key])
+        if dirtyKeys: self.flush()
+        return len( dirtyKeys)
+
+    def materialOf( self, _sdfPath):
+        prim = self.stage.GetPrimAtPath( _sdfPath)
+        while prim and not prim.IsPseudoRoot():
+            if prim in self.usdScene.previewSurfaces or prim in self.usdScene.mtlxSurfaces: return prim
+            prim = prim.GetParent()
+        return False
+
+    ### stitch header, prim chunks and footer, replace previous .bsa in one step so Bella never reads half a file
+    def flush( self):
+        footer = self.capture( self.bsa.writeFooter)
+        bsaFile = self.bsa.bsaFile
+        tmpFile = bsaFile.with_suffix( '.bsa.tmp')
+        with open( str( tmpFile), 'w') as file:
+            file.write( self.header)
+            for key in self.order:
+                file.write( self.chunks[ key])
+            file.write( footer)
+        os.replace( str( tmpFile), str( bsaFile))
+
+    def run( self):
+        startTime = time.time()
+        numJobs = self.fullExport()
+        self.layerTimes = self.layerModTimes()
+        print( 'watch:', numJobs, 'writers ->', self.bsa.bsaFile, 'in', round( time.time() - startTime, 3), 's')
+        print( 'watch: waiting for layer saves, ctrl-c to stop')
+        try:
+            while True:
+                time.sleep( self.interval)
+                layers = self.changedLayers()
+                if not layers: continue
+                startTime = time.time()
+                for layer in layers:
+                    layer.Reload()
+                numPatched = self.patch()
+                self.layerTimes = self.layerModTimes() ### a resync may bring in new layers
+                print( 'watch:', numPatched, 'prims re-exported in', round( time.time() - startTime, 3), 's')
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.listener.Revoke()
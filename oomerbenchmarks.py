@@ -0,0 +1,225 @@
+### oomer benchmarks
+
+'''
+MIT License
+
+Copyright (c) 2023 Harvey Fong
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+### Run from the repo directory
+### python oomerbenchmarks.py
+### each timing runs in a fresh interpreter because python caches imported modules
+### python oomerbenchmarks.py -writers                 SceneAscii write paths only, compared to oomerbenchmarks_baseline.json
+### python oomerbenchmarks.py -writers -savebaseline   after a change you are happy with, baselines are per machine
+
+# standard modules
+from pathlib import Path
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+repoDir = Path( __file__).resolve().parent
+baselineFile = repoDir / 'oomerbenchmarks_baseline.json'
+
+class Benchmark:
+    def __init__(   self, 
+                    _runs = 5,
+                ):
+        self.runs = _runs
+
+    ### median seconds spent importing _module in a new interpreter
+    def importTime( self, _module):
+        code = 'import time; t = time.perf_counter(); import ' + _module + '; print( time.perf_counter() - t)'
+        timings = []
+        for run in range( self.runs):
+            result = subprocess.run( [ sys.executable, '-c', code], cwd = str( repoDir), capture_output = True, text = True)
+            timings.append( float( result.stdout.split()[ -1]))
+        seconds = statistics.median( timings)
+        print( 'BENCH: import', f'{_module:20}', f'{seconds:.4f}', 's')
+        return seconds
+
+    ### median wall time of a whole oomerusd2bella.py process
+    def startupTime( self, _label, _argv):
+        timings = []
+        for run in range( self.runs):
+            startTime = time.perf_counter()
+            subprocess.run( [ sys.executable, 'oomerusd2bella.py'] + _argv, cwd = str( repoDir), capture_output = True)
+            timings.append( time.perf_counter() - startTime)
+        seconds = statistics.median( timings)
+        print( 'BENCH: startup', f'{_label:19}', f'{seconds:.4f}', 's')
+        return seconds
+
+    ### encode arrays like a mesh writer while a simulated network share absorbs the text
+    ### compares writing on the converting thread with OomerBella.BackgroundWriter
+    def slowSink( self, _megabytesPerSecond = 40, _latency = 0.002, _arrays = 60, _arraySize = 30000):
+        import io
+        import numpy as np
+        import OomerBella as oomBella
+        import OomerUtil  as oomUtil
+
+        class SlowFile( io.StringIO): ### NFS like, fixed latency per write plus bandwidth
+            def write( self, _text):
+                time.sleep( _latency + len( _text) / ( _megabytesPerSecond * 1e6))
+                return len( _text)
+
+        npArrays = [ np.random.default_rng( seed).uniform( -1000, 1000, _arraySize) for seed in range( _arrays)]
+        def convert( _file):
+            startTime = time.perf_counter()
+            for npArray in npArrays:
+                _file.write( '  .steps[0].points           = pos3f[' + str( npArray.size // 3) + ']{')
+                _file.write( oomUtil.formatNumpy( npArray, ( 'sig', 9)))
+                _file.write( '};\n')
+            _file.close()
+            return time.perf_counter() - startTime
+
+        class ChunkedFile( SlowFile): ### the text file buffer batches small writes, so does BackgroundWriter
+            def __init__( self):
+                super().__init__()
+                self.parts = []
+            def write( self, _text):
+                self.parts.append( _text)
+                if sum( map( len, self.parts)) >= 1 << 20: self.close()
+                return len( _text)
+            def close( self):
+                if self.parts: SlowFile.write( self, ''.join( self.parts))
+                self.parts = []
+
+        syncSeconds = statistics.median( [ convert( ChunkedFile()) for run in range( self.runs)])
+        backgroundSeconds = statistics.median( [ convert( oomBella.BackgroundWriter( _file = SlowFile())) for run in range( self.runs)])
+        print( 'BENCH: slow sink sync      ', f'{syncSeconds:.4f}', 's')
+        print( 'BENCH: slow sink background', f'{backgroundSeconds:.4f}', 's', f'{syncSeconds / backgroundSeconds:.2f}', 'x')
+        return syncSeconds, backgroundSeconds
+
+    ### SceneAscii hot paths driven in _unitTest mode with synthetic payloads, size is the scalar count of the payload
+    ### each call writes into a fresh StringIO, MB/s is text produced per second, median of self.runs
+    ### alloc is the tracemalloc peak of one extra call, numpy buffers and the formatted string included
+    ### writeXform and writePointInstance are python loops per node / instance, they stop at 1M scalars
+    def writers( self, _sizes = [ 1000, 10000, 100000, 1000000], _saveBaseline = False):
+        import numpy as np
+        import OomerUsd   as oomUsd
+        import OomerBella as oomBella
+
+        baseline = json.loads( baselineFile.read_text()) if baselineFile.is_file() else { 'results': {}}
+        results = {}
+        for size in _sizes:
+            usdScene, prims = self.syntheticScene( max( 1, size // 16))
+            bsa = oomBella.SceneAscii( _usdScene = usdScene, _unitTest = True)
+            rng = np.random.default_rng( size)
+            vertexCount = max( 3, size // 10) ### points, normals, uvs and quads come to about size scalars
+            npPoints = rng.uniform( -1000, 1000, ( vertexCount, 3)).astype( np.float32)
+            npNormals = rng.normal( size = ( vertexCount, 3)).astype( np.float32)
+            npNormals /= np.linalg.norm( npNormals, axis = 1)[ :, None]
+            npTxcoords = rng.uniform( 0, 1, ( vertexCount, 2)).astype( np.float32)
+            npIndices = rng.integers( 0, vertexCount, ( max( 1, vertexCount // 2), 4)).astype( np.uint32)
+            npScalars = rng.uniform( -1000, 1000, size).astype( np.float32)
+            npPolygons = rng.integers( 0, vertexCount, size).astype( np.uint32) ### a flat index list the labelled size, not the mesh's quads
+            npUnits = npScalars / 1000 ### normal range, the dec quantized class
+            cases = [ ( 'writeAttribNumpy pos3f', 1, lambda: bsa.writeAttribNumpy( _name = 'steps[0].points', _type = 'pos3f[' + str( size // 3) + ']', _nparray = npScalars)),
+                      ( 'writeAttribNumpy vec3f', 1, lambda: bsa.writeAttribNumpy( _name = 'steps[0].normals', _type = 'vec3f[' + str( size // 3) + ']', _nparray = npUnits)),
+                      ( 'writeAttribNumpy uint32', 1, lambda: bsa.writeAttribNumpy( _name = 'polygons', _type = 'uint32[' + str( size) + ']', _nparray = npPolygons)),
+                      ( 'writeNodeAttribNumpy', 1, lambda: bsa.writeNodeAttribNumpy( _name = 'steps[0].points', _type = 'pos3f[' + str( size // 3) + ']', _nparray = npScalars)),
+                    ]
+            if size <= 1000000:
+                cases += [ ( 'writeMesh', 1, lambda: bsa.writeMesh( _prim = prims[ 'mesh'], _npVertexCount = npIndices[ :, 0], _npVertexIndices = npIndices, 
+                                                                    _npPoints = npPoints, _npNormals = npNormals, _npTxcoords = npTxcoords, 
+                                                                    _xformCache = usdScene.xform_cache)),
+                           ( 'writeXform', max( 1, size // 16), lambda: [ bsa.writeXform( _prim = prims[ 'xform']) for call in range( max( 1, size // 16))]),
+                           ( 'writePointInstance', 1, lambda: bsa.writePointInstance( _prim = prims[ 'instancer'])),
+                         ]
+            for label, calls, writer in cases:
+                key = label + ' ' + str( size)
+                results[ key] = self.writerCase( bsa, writer, _calls = calls, _runs = self.runs if size <= 1000000 else 1)
+                stats = results[ key]
+                line = [ 'BENCH: writer', f'{label:24}', f'{size:>10}', 'scalars', f"{stats[ 'mbPerSecond']:9.2f}", 'MB/s', f"{stats[ 'allocMBPerCall']:9.3f}", 'MB alloc/call']
+                previous = baseline[ 'results'].get( key)
+                if previous: line.append( f"( {100.0 * ( stats[ 'mbPerSecond'] / previous[ 'mbPerSecond'] - 1):+.1f}% vs baseline)")
+                print( *line, flush = True)
+        if _saveBaseline:
+            baseline[ 'results'].update( results)
+            baseline[ 'machine'] = { 'platform': platform.platform(), 'processor': platform.processor(), 'python': platform.python_version(), 'numpy': np.__version__}
+            baselineFile.write_text( json.dumps( baseline, indent = 1, sort_keys = True) + '\n')
+            print( 'BENCH: writer baseline saved to', baselineFile.name)
+        return results
+
+    def writerCase( self, _bsa, _writer, _calls = 1, _runs = 5):
+        import io
+        import tracemalloc
+        timings = []
+        for run in range( _runs):
+            _bsa.file = io.StringIO()
+            startTime = time.perf_counter()
+            _writer()
+            timings.append( time.perf_counter() - startTime)
+        textBytes = len( _bsa.file.getvalue().encode( 'utf-8'))
+        _bsa.file = io.StringIO()
+        tracemalloc.start()
+        _writer()
+        peakBytes = tracemalloc.get_traced_memory()[ 1]
+        tracemalloc.stop()
+        _bsa.file = io.StringIO()
+        seconds = statistics.median( timings)
+        return { 'seconds': seconds, 'bytes': textBytes, 'mbPerSecond': textBytes / 1e6 / max( seconds, 1e-9), 'allocMBPerCall': peakBytes / 1e6 / _calls}
+
+    ### in memory stage for the prim based writers, a mesh under an xform and a point instancer of _instances
+    def syntheticScene( self, _instances = 1):
+        import numpy as np
+        from pxr import Usd, UsdGeom, Vt
+        import OomerUsd as oomUsd
+        stage = Usd.Stage.CreateInMemory()
+        xformPrim = UsdGeom.Xform.Define( stage, '/set').GetPrim()
+        meshPrim = UsdGeom.Mesh.Define( stage, '/set/mesh').GetPrim()
+        UsdGeom.Cube.Define( stage, '/set/proto')
+        instancer = UsdGeom.PointInstancer.Define( stage, '/set/instancer')
+        instancer.CreatePrototypesRel().AddTarget( '/set/proto')
+        rng = np.random.default_rng( _instances)
+        instancer.CreatePositionsAttr().Set( Vt.Vec3fArray.FromNumpy( rng.uniform( -100, 100, ( _instances, 3)).astype( np.float32)))
+        instancer.CreateScalesAttr().Set( Vt.Vec3fArray.FromNumpy( rng.uniform( 0.5, 2, ( _instances, 3)).astype( np.float32)))
+        instancer.CreateOrientationsAttr().Set( Vt.QuathArray.FromNumpy( np.tile( np.array( [ 0, 0, 0, 1], dtype = np.float16), ( _instances, 1))))
+        instancer.CreateProtoIndicesAttr().Set( Vt.IntArray.FromNumpy( np.zeros( _instances, dtype = np.int32)))
+        usdScene = oomUsd.Reader( _usdFile = stage, _unitTest = True)
+        usdScene.traverseScene()
+        return usdScene, { 'mesh': meshPrim, 'xform': xformPrim, 'instancer': instancer.GetPrim()}
+
+    def imports( self):
+        for module in [ 'numpy', 'pxr.Usd', 'pxr.UsdGeom', 'pxr.UsdShade', 'pxr.UsdLux', 'OomerUsd', 'OomerBella', 'OomerConvert']:
+            self.importTime( module)
+
+    def startup( self):
+        self.startupTime( '--help', [ '--help'])
+        self.startupTime( 'missing file', [ 'missing.usda'])
+
+
+parser = argparse.ArgumentParser( "oomerbenchmarks")
+parser.add_argument( '-writers', help = "only run the SceneAscii writer microbenchmarks", action = 'store_true')
+parser.add_argument( '-full', help = "writer payloads up to 100M scalars, needs several GB of memory", action = 'store_true')
+parser.add_argument( '-savebaseline', help = "store the writer results as the baseline later runs are compared to", action = 'store_true')
+args = parser.parse_args()
+
+oomBench = Benchmark()
+if not args.writers:
+    oomBench.imports()
+    oomBench.startup()
+    oomBench.slowSink()
+oomBench.writers( _sizes = [ 1000, 10000, 100000, 1000000] + ( [ 10000000, 100000000] if args.full else []), _saveBaseline = args.savebaseline)
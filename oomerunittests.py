@@ -24,13 +24,23 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 '''
 
+# standard modules
+from pathlib import Path
+import io
+import os
+import contextlib
+import tempfile
+
 # third party modules
 import numpy as np
-from pxr import Usd, Tf, Sdf
+from pxr import Usd, Tf, Sdf, UsdGeom
 
 # oomer modules
 import OomerUsd     as oomUsd   # USD read routines
 import OomerBella   as oomBella # Bella write routines
+import OomerConvert as oomConvert
+import OomerWatch   as oomWatch
+import oomerusd2bella # parser, tests start from the command line defaults
 
 class Test:
     def __init__(   self, 
@@ -49,12 +59,23 @@ class Test:
         usdStage = Usd.Stage.CreateInMemory( 'tempusd', sdfLayer)
         return usdStage
 
+    ### command line defaults plus the flags a test exercises, new options never need adding to every fixture
+    def converterArgs( self, _usdFile = '', _flags = []):
+        return oomerusd2bella.parser.parse_args( [ str( _usdFile)] + [ str( flag) for flag in _flags])
+
+    ### usda text in a fresh temp dir, the caller cleans up the returned TemporaryDirectory
+    def tempUsdFile( self, _usdaString = '', _name = 'scene.usda'):
+        tempDir = tempfile.TemporaryDirectory()
+        usdFile = Path( tempDir.name) / _name
+        usdFile.write_text( _usdaString)
+        return tempDir, usdFile
+
     # Test single ngon with 5 verts 
     def triangulateNgons ( self):
         faceVertexCounts = [ 5]
         faceVertexIndices = [ 0, 1, 3, 2, 4]
         _faceVertexCounts, _faceVertexIndices = self.usdScene.triangulateNgons( faceVertexCounts, faceVertexIndices)
-        if (_faceVertexCounts, _faceVertexIndices) == ([ 3, 3, 3] , [ 0, 1, 3, 0, 3, 2, 0, 2, 4]):
+        if ( _faceVertexCounts.tolist(), _faceVertexIndices.tolist()) == ([ 3, 3, 3] , [ 0, 1, 3, 0, 3, 2, 0, 2, 4]):
             print( 'PASSED:', 'oomUsd.Reader.triangulateNgons()')
         else:
             print( 'FAILED:', 'oomUsd.Reader.triangulateNgons()')
@@ -113,7 +134,7 @@ def PointInstancer "copies" (
         instancerStage = self.createInlineUsdStage( _bigString = usdaString)
         usdScene = oomUsd.Reader( _usdFile = instancerStage, _unitTest = True)
         usdScene.traverseScene()
-        bsa = oomBella.SceneAscii( _usdScene = usdScene, _unitTest = True)
+        bsa = oomBella.SceneAscii( _usdScene = usdScene, _unitTest = True, _precision = 'legacy') ### expected string is %g
         for prim in usdScene.instancers.keys():
             bsa.writePointInstance( _prim = prim)
         bellaString = bsa.file.getvalue()
@@ -124,10 +145,804 @@ def PointInstancer "copies" (
         if expected in bellaString: print( 'Passed: PointInstancer')    
         else: print( 'Failed: PointInstancer')        
 
+    def watchPatch( self):
+        usdaString = """
+def Xform "root"
+{
+    def Material "mat"
+    {
+        def Shader "pbr"
+        {
+            uniform token info:id = "UsdPreviewSurface"
+            float inputs:roughness = 0.5
+        }
+    }
+    def SphereLight "light"
+    {
+        float inputs:intensity = 5
+    }
+}
+"""
+        watchStage = self.createInlineUsdStage( _bigString = usdaString)
+        usdScene = oomUsd.Reader( _usdFile = watchStage, _unitTest = True)
+        usdScene.traverseScene()
+        tempDir = tempfile.TemporaryDirectory()
+        usdScene.file = Path( tempDir.name) / 'watch.usda'
+        watcher = oomWatch.Watcher( _converter = oomConvert.Converter( _usdScene = usdScene, _args = self.converterArgs()))
+        watcher.fullExport()
+        watchStage.SetEditTarget( watchStage.GetSessionLayer()) ### inline usda lands in the session layer
+        watchStage.GetPrimAtPath( '/root/mat/pbr').GetAttribute( 'inputs:roughness').Set( 0.25)
+        numPatched = watcher.patch()
+        bellaString = open( str( watcher.bsa.bsaFile)).read()
+        watcher.listener.Revoke()
+        tempDir.cleanup()
+        if numPatched == 1 and '.specular.roughness         = 25.0f;' in bellaString: print( 'PASSED: OomerWatch.Watcher.patch()')
+        else: print( 'FAILED: OomerWatch.Watcher.patch()')
+
+    ### visibility and purpose edits under -watch, hiding a mesh patches its chunk and oomerCamera, a guide purpose drops it
+    def watchVisibility( self):
+        usdaString = """
+def Xform "root"
+{
+    def Mesh "m"
+    {
+        int[] faceVertexCounts = [3]
+        int[] faceVertexIndices = [0, 1, 2]
+        point3f[] points = [(0,0,0), (1,0,0), (0,1,0)]
+    }
+}
+"""
+        watchStage = self.createInlineUsdStage( _bigString = usdaString)
+        usdScene = oomUsd.Reader( _usdFile = watchStage, _unitTest = True)
+        usdScene.traverseScene()
+        tempDir = tempfile.TemporaryDirectory()
+        usdScene.file = Path( tempDir.name) / 'watch.usda'
+        watcher = oomWatch.Watcher( _converter = oomConvert.Converter( _usdScene = usdScene, _args = self.converterArgs()))
+        watcher.fullExport()
+        watchStage.SetEditTarget( watchStage.GetSessionLayer())
+        meshPrim = watchStage.GetPrimAtPath( '/root/m')
+        UsdGeom.Imageable( meshPrim).GetVisibilityAttr().Set( 'invisible')
+        hiddenPatched = watcher.patch()
+        hiddenString = open( str( watcher.bsa.bsaFile)).read()
+        UsdGeom.Imageable( meshPrim).GetPurposeAttr().Set( 'guide')
+        watcher.patch()
+        guideString = open( str( watcher.bsa.bsaFile)).read()
+        watcher.listener.Revoke()
+        tempDir.cleanup()
+        if hiddenPatched == 2 and '"hidden"' in hiddenString and 'mesh ' in hiddenString and 'mesh ' not in guideString:
+            print( 'PASSED: OomerWatch.Watcher.patch() visibility and purpose')
+        else: print( 'FAILED: OomerWatch.Watcher.patch() visibility and purpose')
+
+    ### no usd camera, moving the only mesh re-frames oomerCamera through a fresh bbox cache
+    def watchOomerCamera( self):
+        usdaString = """
+def Xform "root"
+{
+    def Mesh "m"
+    {
+        int[] faceVertexCounts = [3]
+        int[] faceVertexIndices = [0, 1, 2]
+        point3f[] points = [(0,0,0), (1,0,0), (0,1,0)]
+        float3[] extent = [(0,0,0), (1,1,0)]
+    }
+}
+"""
+        watchStage = self.createInlineUsdStage( _bigString = usdaString)
+        usdScene = oomUsd.Reader( _usdFile = watchStage, _unitTest = True)
+        usdScene.traverseScene()
+        tempDir = tempfile.TemporaryDirectory()
+        usdScene.file = Path( tempDir.name) / 'watch.usda'
+        watcher = oomWatch.Watcher( _converter = oomConvert.Converter( _usdScene = usdScene, _args = self.converterArgs()))
+        watcher.fullExport()
+        cameraBefore = watcher.chunks[ ( 'oomerCamera', False)]
+        watchStage.SetEditTarget( watchStage.GetSessionLayer())
+        meshPrim = watchStage.GetPrimAtPath( '/root/m')
+        meshPrim.GetAttribute( 'points').Set( [ ( 100, 0, 0), ( 110, 0, 0), ( 100, 10, 0)])
+        meshPrim.GetAttribute( 'extent').Set( [ ( 100, 0, 0), ( 110, 10, 0)])
+        numPatched = watcher.patch()
+        cameraAfter = watcher.chunks[ ( 'oomerCamera', False)]
+        watcher.listener.Revoke()
+        tempDir.cleanup()
+        if numPatched == 2 and cameraAfter != cameraBefore: print( 'PASSED: OomerWatch.Watcher.patch() oomerCamera')
+        else: print( 'FAILED: OomerWatch.Watcher.patch() oomerCamera')
+
+    def textureDedupe( self):
+        usdaString = """
+def Xform "root"
+{
+    def Material "matA"
+    {
+        def Shader "pbr"
+        {
+            uniform token info:id = "UsdPreviewSurface"
+            color3f inputs:diffuseColor.connect = </root/matA/tex.outputs:rgb>
+        }
+        def Shader "tex"
+        {
+            uniform token info:id = "UsdUVTexture"
+            asset inputs:file = @./missing_wood.png@
+            float3 outputs:rgb
+        }
+    }
+    def Material "matB"
+    {
+        def Shader "pbr"
+        {
+            uniform token info:id = "UsdPreviewSurface"
+            color3f inputs:diffuseColor.connect = </root/matB/tex.outputs:rgb>
+        }
+        def Shader "tex"
+        {
+            uniform token info:id = "UsdUVTexture"
+            asset inputs:file = @./missing_wood.png@
+            float3 outputs:rgb
+        }
+    }
+}
+"""
+        textureStage = self.createInlineUsdStage( _bigString = usdaString)
+        usdScene = oomUsd.Reader( _usdFile = textureStage, _unitTest = True)
+        usdScene.traverseScene()
+        missing = usdScene.resolveTextures()
+        if len( usdScene.uv_textures) == 2 and len( usdScene.textures) == 1 and len( missing) == 1:
+            print( 'PASSED: oomUsd.Reader.resolveTextures()')
+        else: print( 'FAILED: oomUsd.Reader.resolveTextures()')
+
+    ### faceVertexCount [ 5,5,4,4,4,4] triangulates to [ 3,3,3,3,3,3,4,4,4,4]
+    def remapSubsets( self):
+        faceVertexCounts = [ 5, 5, 4, 4, 4, 4]
+        subsets = self.usdScene.remapSubsets( [ [ 1, 2, 3, 5], [ 0, 4]], faceVertexCounts)
+        overlapping = self.usdScene.remapSubsets( [ [ 1, 2], [ 0, 1]], faceVertexCounts)
+        if [ list( indices) for indices in subsets] == [ [ 3, 4, 5, 6, 7, 9], [ 0, 1, 2, 8]] and \
+           [ list( indices) for indices in overlapping] == [ [ 3, 4, 5, 6], [ 0, 1, 2, 3, 4, 5]] and \
+           subsets[ 0].dtype == np.uint32:
+            print( 'PASSED: oomUsd.Reader.remapSubsets()')
+        else: print( 'FAILED: oomUsd.Reader.remapSubsets()')
+
+    def compositionCache( self):
+        usdaString = """
+def Xform "src"
+{
+    def Mesh "m"
+    {
+    }
+}
+def Mesh "a" (
+    prepend references = </src/m>
+)
+{
+}
+def Mesh "b" (
+    prepend references = </src/m>
+)
+{
+}
+def Xform "i1" (
+    instanceable = true
+    prepend references = </src>
+)
+{
+}
+def Xform "i2" (
+    instanceable = true
+    prepend references = </src>
+)
+{
+}
+"""
+        compositionStage = self.createInlineUsdStage( _bigString = usdaString)
+        usdScene = oomUsd.Reader( _usdFile = compositionStage, _unitTest = True)
+        usdScene.traverseScene()
+        meshA = compositionStage.GetPrimAtPath( '/a')
+        meshB = compositionStage.GetPrimAtPath( '/b')
+        instance1 = compositionStage.GetPrimAtPath( '/i1')
+        instance2 = compositionStage.GetPrimAtPath( '/i2')
+        if usdScene.compositionStats == { 'hits': 1, 'misses': 1} and \
+           usdScene.meshes[ meshA][ 'instance'] == usdScene.meshes[ meshB][ 'instance'] == usdScene.queryInstance( meshB) and \
+           usdScene.xforms[ instance1][ 'instanceUUID'] == usdScene.xforms[ instance2][ 'instanceUUID']:
+            print( 'PASSED: oomUsd.Reader.resolveInstance()')
+        else: print( 'FAILED: oomUsd.Reader.resolveInstance()')
+
+    ### native instancing, mesh count scales with prototypes not instances
+    def prototypes( self):
+        usdaString = """
+def Xform "src"
+{
+    def Mesh "m"
+    {
+        int[] faceVertexCounts = [3]
+        int[] faceVertexIndices = [0, 1, 2]
+        point3f[] points = [(0,0,0), (1,0,0), (0,1,0)]
+    }
+}
+"""
+        for instance in range( 5):
+            usdaString += 'def Xform "i' + str( instance) + '" (\n    instanceable = true\n    prepend references = </src>\n)\n{\n}\n'
+        prototypeStage = self.createInlineUsdStage( _bigString = usdaString)
+        usdScene = oomUsd.Reader( _usdFile = prototypeStage, _unitTest = True)
+        usdScene.traverseScene()
+        prototypeUUID = usdScene.instanceUUID( list( usdScene.prototypes.keys())[ 0])
+        instanceUUIDs = { usdScene.xforms[ prim][ 'instanceUUID'] for prim in usdScene.xforms if prim.IsInstance()}
+        if len( usdScene.prototypes) == 1 and len( usdScene.meshes) == 2 and instanceUUIDs == { prototypeUUID}:
+            print( 'PASSED: oomUsd.Reader prototypes')
+        else: print( 'FAILED: oomUsd.Reader prototypes')
+
+    ### an unrelated instanced asset discovered first renumbers /__Prototype_N, the written prototype nodes must not change
+    def prototypeNames( self):
+        assetString = """
+def Xform "{name}"
+{{
+    def Mesh "m"
+    {{
+        int[] faceVertexCounts = [3]
+        int[] faceVertexIndices = [0, 1, 2]
+        point3f[] points = [(0,0,0), (1,0,0), (0,1,0)]
+    }}
+}}
+def Xform "{name}_i" (
+    instanceable = true
+    prepend references = </{name}>
+)
+{{
+}}
+"""
+        prototypeTexts = []
+        for assets in [ [ 'b'], [ 'a', 'b']]:
+            prototypeStage = self.createInlineUsdStage( _bigString = ''.join( assetString.format( name = name) for name in assets))
+            usdScene = oomUsd.Reader( _usdFile = prototypeStage, _unitTest = True)
+            usdScene.traverseScene()
+            bsa = oomBella.SceneAscii( _usdScene = usdScene, _unitTest = True)
+            bsa.file = io.StringIO()
+            for prototypePrim in usdScene.prototypes:
+                if usdScene.primName( prototypePrim) != 'b': continue
+                bsa.writePrototype( _prim = prototypePrim) ### its children list carries the mesh uuid
+            prototypeTexts.append( bsa.file.getvalue())
+        if prototypeTexts[ 0] and prototypeTexts[ 0] == prototypeTexts[ 1] and '__Prototype' not in prototypeTexts[ 0]:
+            print( 'PASSED: oomUsd.Reader.prototypeSources()')
+        else: print( 'FAILED: oomUsd.Reader.prototypeSources()')
+
+    def usdzTextures( self):
+        from pxr import UsdUtils
+        tempDir = tempfile.TemporaryDirectory()
+        tempPath = Path( tempDir.name)
+        ( tempPath / 'tex').mkdir()
+        ( tempPath / 'tex' / 'wood.png').write_bytes( bytes( range( 256)) * 64)
+        ( tempPath / 'pkg.usda').write_text( '''#usda 1.0
+def Material "mat"
+{
+    def Shader "pbr"
+    {
+        uniform token info:id = "UsdPreviewSurface"
+        color3f inputs:diffuseColor.connect = </mat/tex.outputs:rgb>
+    }
+    def Shader "tex"
+    {
+        uniform token info:id = "UsdUVTexture"
+        asset inputs:file = @./tex/wood.png@
+        float3 outputs:rgb
+    }
+}
+''')
+        UsdUtils.CreateNewUsdzPackage( str( tempPath / 'pkg.usda'), str( tempPath / 'pkg.usdz'))
+        args = self.converterArgs( tempPath / 'pkg.usdz', [ '-usdzcache', tempPath / 'cache'])
+        converter = oomConvert.openConverter( _usdFile = tempPath / 'pkg.usdz', _args = args)
+        texture = list( converter.usdScene.textures.values())[ 0]
+        extracted = Path( texture[ 'file'])
+        passed = texture[ 'exists'] and extracted.read_bytes() == ( tempPath / 'tex' / 'wood.png').read_bytes()
+        passed = passed and str( texture[ 'relPath']).startswith( 'cache')
+        tempDir.cleanup()
+        if passed: print( 'PASSED: OomerUsdz.extractTextures()')
+        else: print( 'FAILED: OomerUsdz.extractTextures()')
+
+    ### a texture shared by a UsdPreviewSurface and a MaterialX Material is read once
+    def shaderGraph( self):
+        usdaString = """
+def Xform "root"
+{
+    def Shader "sharedTex"
+    {
+        uniform token info:id = "UsdUVTexture"
+        asset inputs:file = @./shared.png@
+        float3 outputs:rgb
+    }
+    def Material "preview"
+    {
+        def Shader "pbr"
+        {
+            uniform token info:id = "UsdPreviewSurface"
+            color3f inputs:diffuseColor.connect = </root/sharedTex.outputs:rgb>
+            float inputs:roughness = 0.5
+        }
+    }
+    def Material "mtlx"
+    {
+        def Shader "surface"
+        {
+            uniform token info:id = "ND_standard_surface_surfaceshader"
+            color3f inputs:base_color.connect = </root/sharedTex.outputs:rgb>
+        }
+    }
+}
+"""
+        shaderStage = self.createInlineUsdStage( _bigString = usdaString)
+        usdScene = oomUsd.Reader( _usdFile = shaderStage, _unitTest = True)
+        usdScene.traverseScene()
+        preview = shaderStage.GetPrimAtPath( '/root/preview')
+        mtlx = shaderStage.GetPrimAtPath( '/root/mtlx')
+        sharedTex = shaderStage.GetPrimAtPath( '/root/sharedTex')
+        if list( usdScene.previewSurfaces) == [ preview] and list( usdScene.mtlxSurfaces) == [ mtlx] and \
+           usdScene.previewSurfaces[ preview][ 'roughness'] == 0.5 and \
+           usdScene.previewSurfaces[ preview][ 'diffuseColor'].GetPrim() == sharedTex and \
+           usdScene.mtlxSurfaces[ mtlx][ 'base_color'].GetPrim() == sharedTex and \
+           list( usdScene.uv_textures) == [ sharedTex] and len( [ node for node in usdScene.shaderNodes.values() if node[ 'id']]) == 3:
+            print( 'PASSED: oomUsd.Reader.readShader()')
+        else: print( 'FAILED: oomUsd.Reader.readShader()')
+
+    def precisionProfiles( self):
+        bsa = oomBella.SceneAscii( _usdScene = self.usdScene, _unitTest = True, _precision = 'balanced')
+        bsa.writeAttribNumpy( _name = 'steps[0].xform', _type = 'mat4', _bracket = '(', 
+                              _nparray = np.array( [ 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 12345.678901234, 0.1, -7.3, 1]))
+        bsa.writeAttribNumpy( _name = 'polygons', _type = 'vec4u[1]', _nparray = np.array( [ 1234567, 1234568, 1234569, 1234569]))
+        bsa.writeAttribNumpy( _name = 'steps[0].normals', _type = 'vec3f[1]', _nparray = np.array( [ 0.70710678, -0.000001, -0.70710678]))
+        bellaString = bsa.file.getvalue()
+        if '(1 0 0 0 0 1 0 0 0 0 1 0 12345.678901234 0.1 -7.3 1)' in bellaString and \
+           '{1234567 1234568 1234569 1234569}' in bellaString and \
+           '{0.7071 0 -0.7071}' in bellaString:
+            print( 'PASSED: oomBella.SceneAscii.formatNumpy()')
+        else: print( 'FAILED: oomBella.SceneAscii.formatNumpy()')
+
+    ### nan and inf normals and uvs are written as text by the 'dec' classes, not a crash
+    def precisionNonFinite( self):
+        bsa = oomBella.SceneAscii( _usdScene = self.usdScene, _unitTest = True, _precision = 'balanced')
+        bsa.writeAttribNumpy( _name = 'steps[0].normals', _type = 'vec3f[2]', _nparray = np.array( [ np.nan, 0.5, -12.25, 0, 1, 0], dtype = np.float32))
+        bsa.writeAttribNumpy( _name = 'steps[0].uvs', _type = 'vec2f[2]', _nparray = np.array( [ np.nan, np.inf, np.nan, np.nan], dtype = np.float32))
+        bellaString = bsa.file.getvalue()
+        if '{nan 0.5 -12.25 0 1 0}' in bellaString and '{nan inf nan nan}' in bellaString:
+            print( 'PASSED: oomUtil.formatNumpy() nan and inf')
+        else: print( 'FAILED: oomUtil.formatNumpy() nan and inf')
+
+    ### 32 x 32 quad grid with a uv seam down the middle and the left half in a subset
+    def lodDecimate( self):
+        import OomerLod as oomLod
+        numQuads = 32
+        quadX, quadY = np.meshgrid( np.arange( numQuads), np.arange( numQuads))
+        quadX, quadY = quadX.ravel(), quadY.ravel()
+        cornerX = np.stack( [ quadX, quadX + 1, quadX + 1, quadX], axis = 1).ravel()
+        cornerY = np.stack( [ quadY, quadY, quadY + 1, quadY + 1], axis = 1).ravel()
+        npPoints = np.stack( [ cornerX, cornerY, np.zeros( cornerX.size)], axis = 1).astype( np.float64)
+        npTxcoords = np.stack( [ cornerX / numQuads + 0.5 * ( quadX.repeat( 4) >= numQuads // 2), cornerY / numQuads], axis = 1)
+        leftFaces = np.flatnonzero( quadX < numQuads // 2).astype( np.uint32)
+        counts, indices, points, normals, txcoords, subsets = oomLod.decimate( np.full( quadX.size, 4), np.arange( cornerX.size), npPoints, 
+                                                                                npTxcoords = npTxcoords, 
+                                                                                _cellSize = oomLod.cellSize( ( ( 0, 0, 0), ( numQuads, numQuads, 0)), 4),
+                                                                                _subsets = [ ( 'left', leftFaces)])
+        seamPoints = np.isclose( points[ :, 0], numQuads // 2, atol = 1.0)
+        triangles = indices.reshape( -1, 4)[ :, :3]
+        leftCentres = points[ triangles[ subsets[ 0][ 1]]].mean( axis = 1)[ :, 0]
+        passed = len( counts) <= quadX.size // 2 and len( np.unique( np.round( txcoords[ seamPoints, 0], 1))) >= 2
+        passed = passed and indices.max() < len( points) and len( subsets[ 0][ 1]) and leftCentres.max() < numQuads // 2
+        if passed: print( 'PASSED: OomerLod.decimate()')
+        else: print( 'FAILED: OomerLod.decimate()')
+
+    ### a deforming quad decimated over a sequence, only the current frame's lod stays memoized
+    def lodDeformingFrames( self):
+        usdaString = """
+def Mesh "m"
+{
+    int[] faceVertexCounts = [4]
+    int[] faceVertexIndices = [0, 1, 2, 3]
+    point3f[] points.timeSamples = {
+        1: [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)],
+        2: [(0, 0, 1), (1, 0, 1), (1, 1, 1), (0, 1, 1)],
+        3: [(0, 0, 2), (1, 0, 2), (1, 1, 2), (0, 1, 2)],
+    }
+}
+"""
+        deformStage = self.createInlineUsdStage( _bigString = usdaString)
+        usdScene = oomUsd.Reader( _usdFile = deformStage, _unitTest = True)
+        usdScene.traverseScene()
+        mesh = deformStage.GetPrimAtPath( '/m')
+        for timeCode in ( 1, 2, 3): points = usdScene.getMeshLod( _prim = mesh, _lod = 2, _timeCode = timeCode)[ 2]
+        if list( usdScene.meshes[ mesh][ 'lods']) == [ ( 2, 3)] and np.allclose( points[ :, 2], 2):
+            print( 'PASSED: oomUsd.Reader.getMeshLod() deforming frames')
+        else: print( 'FAILED: oomUsd.Reader.getMeshLod() deforming frames')
+
+    ### a 10 unit box away from the origin, the camera must look at its centre from outside its bounding sphere
+    def autoFrame( self):
+        usdaString = """
+def Cube "box"
+{
+    double size = 10
+    double3 xformOp:translate = (100, 0, -50)
+    uniform token[] xformOpOrder = ["xformOp:translate"]
+}
+def Cube "guide"
+{
+    uniform token purpose = "guide"
+    double size = 1000
+}
+"""
+        frameStage = self.createInlineUsdStage( _bigString = usdaString)
+        usdScene = oomUsd.Reader( _usdFile = frameStage, _unitTest = True)
+        bsa = oomBella.SceneAscii( _usdScene = usdScene, _unitTest = True)
+        np_matrix4, focusDistance = bsa.frameBound( usdScene.worldBound( _timeCode = 1))
+        centre = np.array( [ 100, 0, -50, 1]) @ bsa.np_basis_change_mat4
+        toCentre = centre[ :3] - np_matrix4[ 3, :3]
+        sameBound = usdScene.bbox_cache.ComputeWorldBound( frameStage.GetPrimAtPath( '/box')).ComputeAlignedRange() == usdScene.worldBound( frameStage.GetPrimAtPath( '/box'))
+        if np.allclose( toCentre / np.linalg.norm( toCentre), np_matrix4[ 2, :3]) and np.isclose( np.linalg.norm( toCentre), focusDistance) \
+           and 1 < focusDistance / ( 5 * 3 ** 0.5 * usdScene.meters_per_unit) < 10 and np_matrix4[ 1, 2] < 0 and sameBound:
+            print( 'PASSED: oomBella.SceneAscii.frameBound()')
+        else: print( 'FAILED: oomBella.SceneAscii.frameBound()')
+
+    ### a mesh in front of the camera, one behind it, an invisible one and an invisible instance source
+    def culling( self):
+        usdaString = """
+def Camera "cam"
+{
+}
+def Mesh "front"
+{
+    int[] faceVertexCounts = [3]
+    int[] faceVertexIndices = [0, 1, 2]
+    point3f[] points = [(0,0,-10), (1,0,-10), (0,1,-10)]
+}
+def Mesh "behind"
+{
+    int[] faceVertexCounts = [3]
+    int[] faceVertexIndices = [0, 1, 2]
+    point3f[] points = [(0,0,10), (1,0,10), (0,1,10)]
+}
+def Xform "hidden" 
+{
+    token visibility = "invisible"
+    def Mesh "unused"
+    {
+        point3f[] points = [(0,0,-10), (1,0,-10), (0,1,-10)]
+    }
+    def Mesh "source"
+    {
+        int[] faceVertexCounts = [3]
+        int[] faceVertexIndices = [0, 1, 2]
+        point3f[] points = [(0,0,-10), (1,0,-10), (0,1,-10)]
+    }
+}
+def Mesh "copy" (
+    prepend references = </hidden/source>
+)
+{
+}
+"""
+        cullStage = self.createInlineUsdStage( _bigString = usdaString)
+        usdScene = oomUsd.Reader( _usdFile = cullStage, _unitTest = True)
+        usdScene.traverseScene()
+        args = self.converterArgs( _flags = [ '-cull', '-frustum'])
+        bsa = oomBella.SceneAscii( _usdScene = usdScene, _unitTest = True)
+        with contextlib.redirect_stdout( io.StringIO()) as report:
+            jobs = oomConvert.Converter( _usdScene = usdScene, _args = args).frameJobs( bsa, 1)
+        meshNames = sorted( prim.GetName() for ( category, prim), writer in jobs if category == 'mesh')
+        if meshNames == [ 'copy', 'front', 'source'] and 'hidden_' in ' '.join( bsa.culled) and '2 of 5' in report.getvalue():
+            print( 'PASSED: oomConvert.Converter.cullJobs()')
+        else: print( 'FAILED: oomConvert.Converter.cullJobs()')
+
+    ### purpose inherited through the traversal stack must agree with ComputePurpose(), including inside a prototype
+    def purposeTraversal( self):
+        usdaString = """
+def Xform "rig" 
+{
+    uniform token purpose = "guide"
+    def Mesh "handle"
+    {
+    }
+    def Xform "body"
+    {
+        def Mesh "skin"
+        {
+            uniform token purpose = "render"
+        }
+        def Mesh "ctrl"
+        {
+        }
+    }
+}
+def Xform "asset" 
+{
+    def Mesh "lowres"
+    {
+        uniform token purpose = "proxy"
+    }
+    def Mesh "hires"
+    {
+    }
+}
+def Xform "copy" (
+    instanceable = true
+    prepend references = </asset>
+)
+{
+}
+"""
+        purposeStage = self.createInlineUsdStage( _bigString = usdaString)
+        usdScene = oomUsd.Reader( _usdFile = purposeStage, _unitTest = True)
+        usdScene.traverseScene()
+        computed = all( record[ 'purpose'] == UsdGeom.Imageable( prim).ComputePurpose() for prim, record in usdScene.meshes.items())
+        bsa = oomBella.SceneAscii( _usdScene = usdScene, _unitTest = True)
+        jobs = oomConvert.Converter( _usdScene = usdScene, _args = self.converterArgs()).frameJobs( bsa, 1)
+        meshNames = sorted( prim.GetName() for ( category, prim), writer in jobs if category == 'mesh')
+        if computed and len( usdScene.meshes) == 7 and meshNames == [ 'hires', 'hires', 'skin'] and len( bsa.culled) == 4:
+            print( 'PASSED: oomUsd.Reader.resolvePurpose()')
+        else: print( 'FAILED: oomUsd.Reader.resolvePurpose()')
+
+    def backgroundWriter( self):
+        class FailingFile( io.StringIO):
+            def write( self, _text):
+                raise OSError( 'disk full')
+            def close( self):
+                pass
+        class KeptFile( io.StringIO):
+            def close( self):
+                self.text = self.getvalue()
+        keptFile = KeptFile()
+        writer = oomBella.BackgroundWriter( _file = keptFile, _queueSize = 2, _chunkSize = 16)
+        expected = ''.join( [ str( line) + '\n' for line in range( 1000)])
+        for line in range( 1000): writer.write( str( line) + '\n')
+        writer.close()
+        writer = oomBella.BackgroundWriter( _file = FailingFile(), _queueSize = 2, _chunkSize = 16)
+        raised = False
+        try:
+            for line in range( 1000): writer.write( str( line) + '\n')
+            writer.close()
+        except OSError:
+            raised = True
+            try: writer.close() ### what SceneAscii.abort() does
+            except OSError: pass
+        if keptFile.text == expected and raised and not writer.thread.is_alive():
+            print( 'PASSED: oomBella.BackgroundWriter')
+        else: print( 'FAILED: oomBella.BackgroundWriter')
+
+    ### two models sharing a Material, each shard carries its own copy, a second run rewrites nothing
+    def shardedOutput( self):
+        import OomerBatch as oomBatch
+        usdaString = '#usda 1.0\ndef Material "mat"\n{\n    def Shader "pbr"\n    {\n        uniform token info:id = "UsdPreviewSurface"\n    }\n}\n'
+        for model in range( 2):
+            usdaString += 'def Xform "model' + str( model) + '"\n{\n    def Mesh "m"\n    {\n'
+            usdaString += '        int[] faceVertexCounts = [3]\n        int[] faceVertexIndices = [0, 1, 2]\n        point3f[] points = [(0,0,0), (1,0,0), (0,1,0)]\n'
+            usdaString += '        rel material:binding = </mat>\n    }\n}\n'
+        tempDir, usdFile = self.tempUsdFile( usdaString, 'set.usda')
+        tempPath = usdFile.parent
+        with contextlib.redirect_stdout( io.StringIO()):
+            converter = oomConvert.openConverter( _usdFile = usdFile, _args = self.converterArgs( usdFile, [ '-shard', '-workers', 0]))
+            firstRun = converter.writeShardedFrames()
+            secondRun = converter.writeShardedFrames()
+            ( tempPath / 'copy.usda').write_text( usdaString)
+            batchResults = oomBatch.runBatch( _usdFiles = [ str( tempPath / 'set.usda'), str( tempPath / 'copy.usda')], _workers = 2, ### -shard inside daemonic batch workers
+                                              _args = self.converterArgs( tempPath / '*.usda', [ '-shard', '-workers', 2]))
+        masterString = ( tempPath / 'set.bsa').read_text()
+        shardStrings = [ Path( shardFile).read_text() for shardFile, changed in firstRun if 'model' in shardFile]
+        tempDir.cleanup()
+        passed = len( firstRun) == 3 and all( changed for shardFile, changed in firstRun) and not any( changed for shardFile, changed in secondRun)
+        passed = passed and len( batchResults) == 2 and all( result[ 'ok'] for result in batchResults)
+        passed = passed and masterString.count( 'reference ') == 3 and 'mesh ' not in masterString and 'camera ' in masterString
+        passed = passed and len( shardStrings) == 2 and all( 'uber mat_' in shardString and 'mesh m_' in shardString for shardString in shardStrings)
+        if passed: print( 'PASSED: oomConvert.Converter.writeShardedFrames()')
+        else: print( 'FAILED: oomConvert.Converter.writeShardedFrames()')
+
+    ### an interrupted sequence, -resume rewrites only the frames that are missing, damaged or made with other options
+    def resumeManifest( self):
+        usdaString = '#usda 1.0\ndef Xform "model"\n{\n    double3 xformOp:translate.timeSamples = { 1: (0,0,0), 4: (3,0,0) }\n'
+        usdaString += '    uniform token[] xformOpOrder = ["xformOp:translate"]\n    def Mesh "m"\n    {\n'
+        usdaString += '        int[] faceVertexCounts = [3]\n        int[] faceVertexIndices = [0, 1, 2]\n        point3f[] points = [(0,0,0), (1,0,0), (0,1,0)]\n    }\n}\n'
+        tempDir, usdFile = self.tempUsdFile( usdaString, 'seq.usda')
+        tempPath = usdFile.parent
+        args = self.converterArgs( usdFile, [ '-start', 1, '-end', 4])
+        with contextlib.redirect_stdout( io.StringIO()): oomConvert.convertFile( _usdFile = usdFile, _args = args)
+        plainManifest = ( tempPath / 'seq_bsa.manifest.jsonl').exists() ### plain exports skip the fingerprint and checksums
+        args.resume = True
+        reports = []
+        for damage in [ False, 'frames', 'options']:
+            if damage == 'frames':
+                ( tempPath / 'seq_bsa' / 'seq00002.bsa').write_text( 'truncated')
+                ( tempPath / 'seq_bsa' / 'seq00004.bsa').unlink()
+                with open( tempPath / 'seq_bsa.manifest.jsonl', 'a') as manifestFile: manifestFile.write( '{"frame": 3, "sta') ### killed mid line
+            if damage == 'options': args.precision = 'exact'
+            with contextlib.redirect_stdout( io.StringIO()) as report:
+                oomConvert.convertFile( _usdFile = usdFile, _args = args)
+            reports.append( report.getvalue())
+        with contextlib.redirect_stdout( io.StringIO()) as report:
+            oomConvert.convertFile( _usdFile = usdFile, _args = args)
+        reports.append( report.getvalue())
+        manifestLines = len( ( tempPath / 'seq_bsa.manifest.jsonl').read_text().splitlines()) ### compacted on load, reruns don't grow it
+        tempDir.cleanup()
+        expected = [ '0 of 4 frames current', '2 of 4 frames current', '0 of 4 frames current', '4 of 4 frames current']
+        if all( phrase in reportString for phrase, reportString in zip( expected, reports)) and not plainManifest and manifestLines == 4:
+            print( 'PASSED: OomerManifest.Manifest.isCurrent()')
+        else: print( 'FAILED: OomerManifest.Manifest.isCurrent()')
+
+    ### -progress json, one line per frame plus the final one, counters match what is on disk
+    def progressStream( self):
+        import json
+        usdaString = '#usda 1.0\ndef Mesh "m"\n{\n    int[] faceVertexCounts = [4, 3]\n    int[] faceVertexIndices = [0, 1, 2, 3, 0, 2, 4]\n'
+        usdaString += '    point3f[] points = [(0,0,0), (1,0,0), (1,1,0), (0,1,0), (2,2,0)]\n}\n'
+        tempDir, usdFile = self.tempUsdFile( usdaString, 'seq.usda')
+        tempPath = usdFile.parent
+        args = self.converterArgs( usdFile, [ '-start', 1, '-end', 3, '-progress', 'json', '-nodedupe']) ### static frames, keep every byte written
+        with contextlib.redirect_stdout( io.StringIO()), contextlib.redirect_stderr( io.StringIO()) as stream:
+            converter = oomConvert.openConverter( _usdFile = usdFile, _args = args)
+            converter.writeFrames()
+        states = [ json.loads( line) for line in stream.getvalue().splitlines()]
+        bytesOnDisk = sum( bsaFile.stat().st_size for bsaFile in ( tempPath / 'seq_bsa').glob( '*.bsa'))
+        tempDir.cleanup()
+        if [ state[ 'event'] for state in states] == [ 'frame', 'frame', 'frame', 'done'] and [ state.get( 'frame') for state in states[ :3]] == [ 1, 2, 3] \
+           and states[ -1][ 'done'] == 3 and states[ -1][ 'faces'] == 6 and states[ -1][ 'bytes'] == bytesOnDisk and states[ 0][ 'eta'] is not None:
+            print( 'PASSED: OomerProgress.Progress.report()')
+        else: print( 'FAILED: OomerProgress.Progress.report()')
+
+    ### two workers share a job dir, a chunk locked by a dead worker is reclaimed, a live lock is left alone
+    def workQueue( self):
+        import OomerQueue as oomQueue
+        import threading
+        tempDir = tempfile.TemporaryDirectory()
+        jobDire = Path( tempDir.name)
+        chunks = oomQueue.frameChunks( 1, 24, 5)
+        ( jobDire / 'f00006-00010.lock').write_text( 'deadnode.1\n')
+        os.utime( jobDire / 'f00006-00010.lock', ( 0, 0))
+        liveLock = oomQueue.WorkQueue( _jobDire = jobDire, _chunks = chunks, _heartbeat = 30, _workerName = 'livenode.1').claim( 'f00021-00023')
+        stolen = oomQueue.WorkQueue( _jobDire = jobDire, _chunks = chunks, _heartbeat = 30, _workerName = 'thief.1').claim( 'f00021-00023')
+        os.unlink( jobDire / 'f00021-00023.lock') ### livenode finishes without completing, its chunk goes back to the queue
+        written = []
+        workers = [ oomQueue.WorkQueue( _jobDire = jobDire, _chunks = chunks, _heartbeat = 0.2, _workerName = 'node' + str( worker)) for worker in range( 2)]
+        threads = [ threading.Thread( target = worker.run, kwargs = { '_writeChunk': written.extend}) for worker in workers]
+        with contextlib.redirect_stdout( io.StringIO()):
+            for thread in threads: thread.start()
+            for thread in threads: thread.join()
+        doneFiles = sorted( doneFile.name for doneFile in jobDire.glob( '*.done'))
+        leftovers = [ leftover.name for leftover in jobDire.iterdir() if leftover.suffix in [ '.lock', '.stale', '.tmp']]
+        tempDir.cleanup()
+        if [ chunkName for chunkName, timeCodes in chunks] == [ 'f00001-00005', 'f00006-00010', 'f00011-00015', 'f00016-00020', 'f00021-00023'] \
+           and liveLock and not stolen and sorted( written) == list( range( 1, 24)) and len( doneFiles) == 5 and not leftovers \
+           and sum( len( worker.reclaimed) for worker in workers) == 1:
+            print( 'PASSED: OomerQueue.WorkQueue.run()')
+        else: print( 'FAILED: OomerQueue.WorkQueue.run()')
+
+    ### -outofcore chunks of one face give the same .bsa as the in memory path, nan and inf normals included, and leave no scratch files
+    def outOfCore( self):
+        usdaString = '#usda 1.0\ndef Mesh "m"\n{\n    int[] faceVertexCounts = [4, 5, 3, 6]\n    int[] faceVertexIndices = [0, 1, 2, 3, 1, 4, 5, 6, 2, 3, 2, 6, 0, 6, 5, 4, 7, 3]\n'
+        usdaString += '    point3f[] points = [(0,0,0), (1,0,0), (1,1,0), (0,1,0), (2,0,0), (2.5,1,0), (2,2,0), (-1,-1,0.5)]\n'
+        usdaString += '    texCoord2f[] primvars:st = [(0,0), (1,0), (1,1), (0,1)] (\n        interpolation = "faceVarying"\n    )\n'
+        usdaString += '    int[] primvars:st:indices = [0, 1, 2, 3, 0, 1, 2, 3, 0, 1, 2, 3, 0, 1, 2, 3, 0, 1]\n'
+        usdaString += '    normal3f[] primvars:normals = [(0,0,1), (nan,0,-1), (inf,0,0)] (\n        interpolation = "faceVarying"\n    )\n'
+        usdaString += '    int[] primvars:normals:indices = [0, 0, 0, 0, 1, 1, 1, 1, 1, 0, 0, 0, 1, 0, 1, 0, 1, 2]\n}\n'
+        tempDir, usdFile = self.tempUsdFile( usdaString, 'big.usda')
+        tempPath = usdFile.parent
+        ( tempPath / 'scratch').mkdir()
+        bsaTexts = []
+        for threshold in [ 0, 1]:
+            args = self.converterArgs( usdFile, [ '-outofcore', threshold, '-outofcorechunk', 1, '-scratch', tempPath / 'scratch'])
+            with contextlib.redirect_stdout( io.StringIO()):
+                converter = oomConvert.openConverter( _usdFile = usdFile, _args = args)
+                bsaTexts.append( converter.writeFrame( 1).read_text())
+        leftovers = list( ( tempPath / 'scratch').iterdir())
+        tempDir.cleanup()
+        if bsaTexts[ 0] == bsaTexts[ 1] and 'vec4u[9]' in bsaTexts[ 1] and 'vec2f[28]' in bsaTexts[ 1] and 'nan 0 -1' in bsaTexts[ 1] \
+           and 'inf 0 0' in bsaTexts[ 1] and not leftovers:
+            print( 'PASSED: OomerOutOfCore.MeshChunks')
+        else: print( 'FAILED: OomerOutOfCore.MeshChunks')
+
+    ### a held pose is hardlinked to the frame before, rewriting one frame leaves its former siblings untouched
+    def identicalFrames( self):
+        usdaString = '#usda 1.0\ndef Xform "model"\n{\n    double3 xformOp:translate.timeSamples = { 1: (0,0,0), 3: (0,0,0), 4: (1,0,0) }\n'
+        usdaString += '    uniform token[] xformOpOrder = ["xformOp:translate"]\n    def Mesh "m"\n    {\n        int[] faceVertexCounts = [3]\n'
+        usdaString += '        int[] faceVertexIndices = [0, 1, 2]\n        point3f[] points = [(0,0,0), (1,0,0), (0,1,0)]\n    }\n}\n'
+        tempDir, usdFile = self.tempUsdFile( usdaString, 'hold.usda')
+        with contextlib.redirect_stdout( io.StringIO()) as stdout:
+            converter = oomConvert.openConverter( _usdFile = usdFile, _args = self.converterArgs( usdFile, [ '-start', 1, '-end', 4]))
+            converter.writeFrames()
+            bsaFiles = [ oomConvert.bsaPath( usdFile, timeCode, True) for timeCode in range( 1, 5)]
+            inodes = [ os.stat( bsaFile).st_ino for bsaFile in bsaFiles]
+            firstText = bsaFiles[ 0].read_text()
+            converter.writeFrame( 2)
+        linked = inodes[ 0] == inodes[ 1] == inodes[ 2] != inodes[ 3]
+        unlinked = os.stat( bsaFiles[ 0]).st_nlink == 2 and os.stat( bsaFiles[ 1]).st_nlink == 1 
+        unchanged = bsaFiles[ 0].read_text() == firstText == bsaFiles[ 1].read_text()
+        tempDir.cleanup()
+        if linked and unlinked and unchanged and 'dedupe: 2 of 4 frames' in stdout.getvalue():
+            print( 'PASSED: OomerConvert.linkFrame()')
+        else: print( 'FAILED: OomerConvert.linkFrame()')
+
+    ### -serve streams the same .bsa as a local conversion, repeats are cache hits, a tight budget evicts the older stage
+    def conversionService( self):
+        import OomerService as oomService
+        import http.server
+        import threading
+        tempDir = tempfile.TemporaryDirectory()
+        tempPath = Path( tempDir.name)
+        for name in [ 'a', 'b']:
+            usdaString = '#usda 1.0\ndef Mesh "' + name + '"\n{\n    int[] faceVertexCounts = [4, 5]\n    int[] faceVertexIndices = [0, 1, 2, 3, 1, 4, 5, 6, 2]\n'
+            usdaString += '    point3f[] points = [(0,0,0), (1,0,0), (1,1,0), (0,1,0), (2,0,0), (2.5,1,0), (2,2,0)]\n}\n'
+            ( tempPath / ( name + '.usda')).write_text( usdaString)
+        args = self.converterArgs( tempPath / 'a.usda', [ '-precision', 'compact'])
+        with contextlib.redirect_stdout( io.StringIO()) as stdout:
+            oomConvert.convertFile( _usdFile = tempPath / 'a.usda', _args = args)
+            localText = ( tempPath / 'a.bsa').read_text()
+            ( tempPath / 'a.bsa').unlink()
+            server = oomService.openServer( '127.0.0.1:0', _args = self.converterArgs(), _memoryBudget = 0)
+            thread = threading.Thread( target = server.serve_forever, daemon = True)
+            thread.start()
+            url = 'http://127.0.0.1:' + str( server.server_address[ 1])
+            for usdFile in [ 'a', 'a', 'b']:
+                oomService.convertRemote( _url = url, _usdFile = tempPath / ( usdFile + '.usda'), _args = args)
+            server.shutdown()
+            server.server_close()
+            refused = oomService.convertRemote( _url = url, _usdFile = tempPath / 'b.usda', _args = args)
+            class Truncated( http.server.BaseHTTPRequestHandler): ### promises more bytes than it sends, then hangs up
+                def do_POST( self):
+                    self.send_response( 200)
+                    self.send_header( 'X-Oomer-Bsa', 'c.bsa')
+                    self.send_header( 'Content-Length', '1000')
+                    self.end_headers()
+                    self.wfile.write( b'# partial')
+                    self.close_connection = True
+                def log_message( self, *_args): pass
+            truncatedServer = http.server.HTTPServer( ( '127.0.0.1', 0), Truncated)
+            threading.Thread( target = truncatedServer.handle_request, daemon = True).start()
+            truncated = oomService.convertRemote( _url = 'http://127.0.0.1:' + str( truncatedServer.server_address[ 1]), _usdFile = tempPath / 'b.usda', _args = args)
+            truncatedServer.server_close()
+        service = server.service
+        remoteText = ( tempPath / 'a.bsa').read_text()
+        leftovers = sorted( each.name for each in tempPath.iterdir() if each.suffix == '.tmp' or each.name == 'c.bsa')
+        tempDir.cleanup()
+        if remoteText == localText and 'service: miss a.bsa' in stdout.getvalue() and 'service: hit a.bsa' in stdout.getvalue() \
+           and service.stats[ 'evictions'] == 1 and service.stageCache.Size() == 1 and list( service.status()[ 'entries'][ 0].values())[ 0].endswith( 'b.usda') \
+           and refused is False and truncated is False and not leftovers and stdout.getvalue().count( 'service:') == 5:
+            print( 'PASSED: OomerService.Service')
+        else: print( 'FAILED: OomerService.Service')
+
+    def textureProxy( self):
+        try:
+            from PIL import Image
+        except ImportError:
+            print( 'SKIPPED: OomerTexture.ProxyCache.proxies(), requires Pillow')
+            return
+        import OomerTexture as oomTexture
+        tempDir = tempfile.TemporaryDirectory()
+        source = str( Path( tempDir.name) / 'big.png')
+        Image.new( 'RGB', ( 2048, 1024)).save( source)
+        proxyCache = oomTexture.ProxyCache( _cacheDire = Path( tempDir.name) / 'cache', _maxSize = 256)
+        proxies = proxyCache.proxies( [ source, source])
+        reused = oomTexture.ProxyCache( _cacheDire = Path( tempDir.name) / 'cache', _maxSize = 256).proxies( [ source])
+        with Image.open( proxies[ source]) as proxy: size = proxy.size
+        tempDir.cleanup()
+        if size == ( 256, 128) and reused == proxies: print( 'PASSED: OomerTexture.ProxyCache.proxies()')
+        else: print( 'FAILED: OomerTexture.ProxyCache.proxies()')
+
 
 oomTest = Test()
 oomTest.triangulateNgons()
 oomTest.oomerUsdNormals()
 oomTest.pointInstancer()
+oomTest.remapSubsets()
+oomTest.compositionCache()
+oomTest.prototypes()
+oomTest.prototypeNames()
+oomTest.watchPatch()
+oomTest.watchVisibility()
+oomTest.watchOomerCamera()
+oomTest.textureDedupe()
+oomTest.shaderGraph()
+oomTest.precisionProfiles()
+oomTest.precisionNonFinite()
+oomTest.lodDecimate()
+oomTest.lodDeformingFrames()
+oomTest.autoFrame()
+oomTest.culling()
+oomTest.purposeTraversal()
+oomTest.backgroundWriter()
+oomTest.shardedOutput()
+oomTest.resumeManifest()
+oomTest.progressStream()
+oomTest.workQueue()
+oomTest.outOfCore()
+oomTest.identicalFrames()
+oomTest.conversionService()
       
-
+oomTest.textureProxy()
+oomTest.usdzTextures()
@@ -55,7 +55,7 @@ SOFTWARE.
 
 ### TODO
 ###===== 
-# - [ ] add UsdGeomSubset allowing different materials per face
+# - [ x ] add UsdGeomSubset allowing different materials per face
 # - [ ] split mesh along UsdGeomSubsets as seen in apple/fender_stratocaster.usda, not compatible with subdivision
 # - [ ] partial MaterialX translator, UsdPreviewSurface does not support transmission
 # - [ ] Usd prim variants
@@ -74,18 +74,11 @@ from pathlib import Path  # for cross platform file paths
 import time
 import argparse
 
-### third party modules
-import numpy as np
-
-### oomer modules
-import OomerUsd     as oomUsd   # USD read routines
-import OomerBella   as oomBella # Bella write routines
-
 start_time=time.time()
 
 ###
 parser = argparse.ArgumentParser( "oomerusd2bella")
-parser.add_argument( 'usdfile', help = "path to usd file", default = "", type = str)
+parser.add_argument( 'usdfile', help = "path to usd file, or a glob / .txt list of usd files for batch conversion", default = "", type = str, nargs = '?')
 parser.add_argument( '-start', dest = "start", help = "sequence start frame", default = 0, type = int)
 parser.add_argument( '-end', dest = "end", help = "sequence end frame", default = 0, type = int)
 parser.add_argument( '-debug', action = 'store_true') 
@@ -95,173 +88,100 @@ parser.add_argument( '-ignorelights', help = "ignorelights", action = 'store_tru
 parser.add_argument( '-ignorematerials', help = "ignorematerials", action = 'store_true')
 parser.add_argument( '-subdivision', dest = "subdivision", help="force subdivision level", default = 0, type = int)
 parser.add_argument( '-ignoreroughness', help = "ignore specular roughness", action = 'store_true')
-args = parser.parse_args()
-usdFile = Path( args.usdfile)
-if not usdFile.exists():
-    print( args.usdFile, "does not exist")
-    quit()
-if not usdFile.suffix in [ '.usd', '.usdc', '.usda', '.usdz']:
-    print( args.usdFile, "is not a .usd, .usdc, .usda or .usdz file")
-    quit()
-
-###
-usdScene = oomUsd.Reader( _usdFile = usdFile, 
-                          _debug = args.debug,
-                          _usda = args.usda,
-                        )
-
-### USD can store both transform and mesh deformation animations
-### when no startFrame is defined, use frame 1
-if args.start<=0: startFrame,endFrame,isSequence = 1, 1, False
-else:
-    startFrame,isSequence = args.start, True
-    if args.end < args.start: endFrame = startFrame
-    else: endFrame = args.end
-endFrame += 1 # Python range end not inclusive, requires end to be +1
-
-### Walk scenegraph sorting prims into Python dictionaries
-    # oomUSD class in OomerUSD module
-usdScene.traverseScene() 
-
-### Write bella ascii file on each frame
-for timeCode in range( startFrame, endFrame, 1):  # usd timecode starts on frame 1 not 0
-    if isSequence:
-        bsaDire = usdFile.parent.joinpath( str( usdFile.stem)+'_bsa')  # use subdir for output, helps organize sequences
-        bsaFile = Path( usdFile.stem + str( timeCode).zfill(5) + '.bsa')
-        bsa = oomBella.SceneAscii( _bsaFile = bsaDire / bsaFile, 
-                                   _usdScene = usdScene, 
-                                   _colorDome = args.colordome
-                                 ) 
-    else:
-        bsaFile = Path( usdFile.name ).with_suffix( '.bsa')
-        bsa = oomBella.SceneAscii( _bsaFile = usdFile.parent / bsaFile, 
-                                   _usdScene = usdScene,
-                                   _colorDome = args.colordome
-                                 )
-    bsa.setTimeCode( _timeCode = timeCode) 
-    ### MESH 
-    ###=====
-    for prim in usdScene.meshes.keys():
-        if usdScene.debug: 
-            print( 'usd mesh:', prim)
-            npFaceVertexCount, \
-            npFaceVertexIndices, \
-            npPoints, \
-            npNormals, \
-            npTxcoords, \
-            = usdScene.getMesh( _prim = prim, _timeCode = timeCode )
-        else:
-            try: # Bypass prims that crash with calls to pxr API 
-                npFaceVertexCount, \
-                npFaceVertexIndices, \
-                npPoints, \
-                npNormals, \
-                npTxcoords \
-                = usdScene.getMesh( _prim = prim, _timeCode = timeCode)
-                if not isinstance( npFaceVertexCount, np.ndarray): 
-                    continue # return var == False indicates BAD ( ie zero faces ) geometry .. skip
-            except:
-                if usdScene.debug: print( "FAIL:", prim, 'ERROR')
-                continue
-
-        ### isinstance(x,y) Python function to check if x is of object type y
-        if isinstance( npFaceVertexCount, np.ndarray): 
-            if usdScene.debug: print( '\tnpFaceVertexCount', len( npFaceVertexCount))
-        if isinstance( npFaceVertexIndices, np.ndarray):
-            if usdScene.debug: print( '\tnpFaceVertexIndices', len( npFaceVertexIndices))
-        if isinstance( npPoints, np.ndarray):
-            if usdScene.debug: print( '\tnpPoints', len( npPoints))
-        if isinstance( npNormals, np.ndarray):
-            if usdScene.debug: print( '\tnpNormals', len( npNormals))
-        if isinstance( npTxcoords, np.ndarray):
-            if usdScene.debug: print( '\tnpTxcoords', len( npTxcoords))
-
-        ### MATERIALS
-        ###==========
-        if 'material_prim' in usdScene.meshes[ prim]:
-            materialPrim = usdScene.meshes[ prim][ 'material_prim'] 
-        else: materialPrim = False
-        if not usdScene.meshes[ prim][ 'instance']: ### TODO is this still appropriate to flag instances
-            bsa.writeMesh(  _prim = prim,
-                            _npVertexCount = npFaceVertexCount,
-                            _npVertexIndices = npFaceVertexIndices,
-                            _npPoints = npPoints,
-                            _npNormals = npNormals,
-                            _npTxcoords = npTxcoords,
-                            _xformCache = usdScene.xform_cache,
-                            _subdivision = args.subdivision,
-                        )
-        else:
-            bsa.writeInstance( prim,
-                               usdScene.meshes[ prim][ 'instance']
-                             )
-
-    ### LIGHTS 
-    ###=======
-    if not args.ignorelights:
-        bsa.writeRenderFlags()
-        for prim in usdScene.lights.keys():
-            bsa.writeLight( _prim = prim)
-
-    ### CAMERA
-    ###=======
-    ### [ 2024 ] Use extents to frame scene
-    if not usdScene.cameras: 
-        bsa.writeOomerCamera()
-    for prim in usdScene.cameras.keys(): bsa.writeCamera( prim)
-
-    ### XFORM
+parser.add_argument( '-watch', help = "keep stage open, re-export prims whose layers are saved", action = 'store_true')
+parser.add_argument( '-watchinterval', dest = "watchinterval", help = "seconds between layer checks in -watch", default = 0.5, type = float)
+parser.add_argument( '-workers', dest = "workers", help = "batch or -shard worker processes, 0 converts in this process", default = -1, type = int)
+parser.add_argument( '-texturemax', dest = "texturemax", help = "downsample textures and image domes to this many pixels, needs Pillow", default = 0, type = int)
+parser.add_argument( '-texturecache', dest = "texturecache", help = "proxy texture cache dir, default texture_cache next to usd file", default = "", type = str)
+parser.add_argument( '-usdzcache', dest = "usdzcache", help = "dir for textures extracted from .usdz, default usdz_cache next to usd file", default = "", type = str)
+parser.add_argument( '-precision', dest = "precision", help = "numeric precision profile, balanced keeps transforms exact and quantizes normals/uvs", default = "balanced", choices = [ 'legacy', 'exact', 'balanced', 'compact'])
+parser.add_argument( '-precisionreport', help = "print max error and bytes per attribute class", action = 'store_true')
+parser.add_argument( '-lod', dest = "lod", help = "decimated preview meshes, each level halves the 128 cell grid across a mesh's extent", default = 0, type = int)
+parser.add_argument( '-cull', help = "drop prims in invisible subtrees before geometry is read", action = 'store_true')
+parser.add_argument( '-frustum', help = "also drop meshes outside the usd camera frustum, per frame", action = 'store_true')
+parser.add_argument( '-frustumpadding', dest = "frustumpadding", help = "-frustum window growth on each side, fraction of its size", default = 0.1, type = float)
+parser.add_argument( '-shard', help = "write each top level prim to its own .bsa in parallel, referenced by the master .bsa", action = 'store_true')
+parser.add_argument( '-resume', help = "skip frames the output manifest records as written from the same stage and options", action = 'store_true')
+parser.add_argument( '-manifest', help = "record written frames in the output manifest for a later -resume, without skipping any", action = 'store_true')
+parser.add_argument( '-queue', dest = "queue", help = "shared job dir, workers on any number of machines claim -chunk frame chunks from it", default = "", type = str)
+parser.add_argument( '-chunk', dest = "chunk", help = "frames per -queue chunk", default = 10, type = int)
+parser.add_argument( '-heartbeat', dest = "heartbeat", help = "seconds before a -queue chunk held by a silent worker is reclaimed", default = 60.0, type = float)
+parser.add_argument( '-progress', dest = "progress", help = "stream frames done, prims, faces/s, MB/s and ETA to stderr", default = "off", choices = [ 'off', 'human', 'json'])
+parser.add_argument( '-progressinterval', dest = "progressinterval", help = "seconds between -progress lines inside a long frame", default = 2.0, type = float)
+parser.add_argument( '-outofcore', dest = "outofcore", help = "meshes with more faces than this are written in face chunks through memory mapped scratch files, 0 is off", default = 0, type = int)
+parser.add_argument( '-outofcorechunk', dest = "outofcorechunk", help = "faces per -outofcore chunk, peak memory grows with it", default = 100000, type = int)
+parser.add_argument( '-scratch', dest = "scratch", help = "dir for -outofcore scratch files, default system temp dir", default = "", type = str)
+parser.add_argument( '-nodedupe', help = "write every frame of a sequence, frames identical to the one before are hardlinked by default", action = 'store_true')
+parser.add_argument( '-serve', dest = "serve", help = "run a local conversion service on [host:]port, usdfile is not needed", default = "", type = str)
+parser.add_argument( '-servememory', dest = "servememory", help = "MB of stages and traversals -serve keeps cached", default = 2048, type = int)
+parser.add_argument( '-service', dest = "service", help = "convert through a running -serve, e.g. http://127.0.0.1:8765", default = "", type = str)
+parser.add_argument( '-writequeue', dest = "writequeue", help = "1MB chunks queued for the background .bsa writer, 0 writes synchronously", default = 8, type = int)
+
+### guarded, batch worker processes re-import this file on platforms that spawn
+if __name__ == '__main__':
+    args = parser.parse_args()
+
+    ### SERVICE
+    ###========
+    ### long running, stages and traversals stay cached between requests
+    if args.serve:
+        import OomerService as oomService
+        oomService.serve( _address = args.serve, _args = args, _memoryBudget = args.servememory)
+        quit()
+    if not args.usdfile: parser.error( 'usdfile is required unless -serve is given')
+
+    ### BATCH
     ###======
-    for prim in usdScene.xforms.keys():
-        bsa.writeXform( _prim = prim,
-                        #_hasAuthoredReferences = usdScene.xforms[ prim][ 'hasAuthoredReferences'],
-                        _instanceUUID = usdScene.xforms[ prim][ 'instanceUUID'],
-                      )
-    for prim in usdScene.scopes.keys():
-        bsa.writeScope( _prim = prim)
-
-
-    ### USDPREVIEWSURFACE
-    ###==================
-    if not args.ignorematerials:
-        for prim in usdScene.previewSurfaces.keys():  
-            bsa.writeUberMaterial(  _prim = prim, 
-                                    _ignoreRoughness = args.ignoreroughness,
-                                 )
-
-        for prim in usdScene.mtlxSurfaces.keys(): 
-            bsa.writeUberMaterialFromMaterialX(  _prim = prim)
-
-        for prim in usdScene.mtlxNodes.keys(): 
-            bsa.writeMaterialXNodes(  _prim = prim)
-            #if usdScene.mtlxNodes[ prim][ 'type'] == 'ND_worleynoise3d_float':
-            #    print( 'found worley')
-
-
-    ### USDUVTEXTURE
-    ###============= 
-    ### usd file string surrounded by @
-    for shader in usdScene.uv_textures.keys(): 
-        bsa.writeShaderTexture( shader, 
-                                usdScene.uv_textures[ shader][ 'file'], 
-                              )
-    for prim in usdScene.primitives.keys(): 
-        bsa.writePrimitive( _prim = prim, 
-                            #_primitives = usdScene.primitives, 
-                            #_xformCache = usdScene.xform_cache,
-                          )
-    
-    for prim in usdScene.instancers.keys():
-        bsa.writePointInstance( _prim = prim,
-                                #_instancers = usdScene.instancers[ prim], 
-                              )
-    
-    # not sure how I can tell that a file is used as a normalmap
-    #for usd_prim in usdScene.uv_textures.keys(): # write out usd uv textures as bella file textures
-    #    bsa.write_normal_texture(   usd_prim, 
-    #                                str(usdScene.uv_textures[ usd_prim ][ 'file' ])[ 1:-1 ], 
-    #                            )
-    bsa.writeEmitter2() #hack
-    bsa.close( usdScene)
-execution_time = ( time.time() - start_time)
-if usdScene.debug: print( 'Execution time in seconds', execution_time)
+    ### glob or .txt list of usd files, converted by a pool of long lived worker processes
+    if any( char in args.usdfile for char in '*?[') or Path( args.usdfile).suffix == '.txt':
+        import OomerBatch as oomBatch # no pxr import in this process
+        usdFiles = oomBatch.expandInputs( args.usdfile)
+        if not usdFiles:
+            print( args.usdfile, "matched no .usd, .usdc, .usda or .usdz files")
+            quit()
+        oomBatch.runBatch( _usdFiles = usdFiles, _args = args, _workers = args.workers)
+        quit()
+
+    ### pre-stage validation, runs before pxr and numpy are imported so --help and bad paths return fast
+    usdFile = Path( args.usdfile)
+    if not usdFile.is_file():
+        print( args.usdfile, "does not exist")
+        quit()
+    if not usdFile.suffix in [ '.usd', '.usdc', '.usda', '.usdz']:
+        print( args.usdfile, "is not a .usd, .usdc, .usda or .usdz file")
+        quit()
+
+    if args.service: ### a running -serve converts, this process never imports pxr
+        import OomerService as oomService
+        oomService.convertRemote( _url = args.service, _usdFile = usdFile, _args = args)
+        quit()
+
+    ### oomer modules
+    ### imported late, pxr + numpy dominate startup, see oomerbenchmarks.py
+    import OomerConvert as oomConvert # per frame bsa writing
+
+    ### Walk scenegraph sorting prims into Python dictionaries
+        # oomUSD class in OomerUSD module
+    converter = oomConvert.openConverter( _usdFile = usdFile, _args = args)
+    usdScene = converter.usdScene
+
+    if args.watch: ### long running, stage stays open
+        import OomerWatch as oomWatch
+        watcher = oomWatch.Watcher( _converter = converter, 
+                                    _timeCode = converter.startFrame, 
+                                    _interval = args.watchinterval,
+                                  )
+        watcher.run()
+    elif args.queue: ### one of many workers sharing the frame range through a job dir
+        import OomerQueue as oomQueue
+        workQueue = oomQueue.WorkQueue( _jobDire = args.queue,
+                                        _chunks = oomQueue.frameChunks( converter.startFrame, converter.endFrame, args.chunk),
+                                        _heartbeat = args.heartbeat,
+                                      )
+        workQueue.run( _writeChunk = converter.writeFrames)
+        converter.progress.finish()
+        workQueue.printSummary()
+    else:
+        converter.writeFrames()
+    execution_time = ( time.time() - start_time)
+    if usdScene.debug: print( 'Execution time in seconds', execution_time)